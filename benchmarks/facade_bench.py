@@ -0,0 +1,356 @@
+"""
+Бенчмарк аддона «Быстрые фасады» на синтетических зданиях.
+
+Запуск (из корня репозитория):
+    blender -b --factory-startup --python benchmarks/facade_bench.py -- --scales S M --output bench.json
+    blender -b --factory-startup --python benchmarks/facade_bench.py -- --vertices 250000 --facades 24 --context-objects 100
+
+Для каждого масштаба строится здание-призма (фасад - сетка квадов, число вершин задаётся),
+вокруг - контекстные объекты в дочерней коллекции сцены. Замеряются горячие пути:
+кадрирование и clipping planes (compute_framing_batch, холодный и тёплый кэш геометрии),
+выбор имени файла с версией (просмотр папки и индекс версий), создание камер оператором,
+рендер Workbench и запись кадров высокого разрешения. Результаты - JSON с версиями Blender
+и аддона, чтобы прогоны разных версий можно было сравнивать.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fac_cams  # noqa: E402
+
+
+# Масштабы: вершины здания, фасады (стороны призмы), контекстные объекты
+SCALES = {
+    'S': {'vertices': 10_000, 'facades': 8, 'context_objects': 10},
+    'M': {'vertices': 100_000, 'facades': 16, 'context_objects': 50},
+    'L': {'vertices': 1_000_000, 'facades': 32, 'context_objects': 200},
+}
+BUILDING_NAME = "BenchBuilding"
+BUILDING_RADIUS = 20.0   # Расстояние от центра до фасада (метры)
+BUILDING_HEIGHT = 30.0
+EXISTING_FILES = 500     # Файлов в папке для замера выбора имени с версией
+CONTEXT_COLLECTION_NAME = "BenchContext"
+HIGH_RES_RESOLUTION = 10000  # Большая сторона кадра пресета «Высокое разрешение»
+HIGH_RES_CAMERAS = 2         # Камер в замере записи кадров высокого разрешения
+
+
+def parse_args(argv=None):
+    """Разобрать аргументы после «--»"""
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(
+        prog="blender -b --factory-startup --python benchmarks/facade_bench.py --",
+        description="Бенчмарк создания камер и рендера фасадов на синтетических зданиях",
+    )
+    parser.add_argument("--scales", nargs="*", default=['S', 'M'], choices=sorted(SCALES),
+                        help="Готовые масштабы (по умолчанию S и M)")
+    parser.add_argument("--vertices", type=int, default=None, help="Свой масштаб: вершин здания")
+    parser.add_argument("--facades", type=int, default=8, help="Свой масштаб: фасадов здания")
+    parser.add_argument("--context-objects", type=int, default=10, help="Свой масштаб: контекстных объектов")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов каждого замера")
+    parser.add_argument("--max-resolution", type=int, default=1000, help="Максимальное разрешение камер")
+    parser.add_argument("--no-render", action="store_true", help="Не замерять рендер Workbench")
+    parser.add_argument("--no-high-res", action="store_true",
+                        help="Не замерять рендер и запись кадров высокого разрешения")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора расстановки контекста")
+    parser.add_argument("--output", default=None, help="Файл JSON с результатами (по умолчанию - stdout)")
+    return parser.parse_args(argv)
+
+
+# ------------------------------------------------------------------------
+# СИНТЕТИЧЕСКАЯ СЦЕНА
+# ------------------------------------------------------------------------
+def clear_scene():
+    """Удалить объекты, меши, камеры и коллекции предыдущего масштаба"""
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+    for camera in list(bpy.data.cameras):
+        bpy.data.cameras.remove(camera)
+    for collection in list(bpy.data.collections):
+        bpy.data.collections.remove(collection)
+    fac_cams.invalidate_geometry_cache()
+
+
+def build_building(name, vertex_count, facades):
+    """
+    Здание-призма: facades вертикальных фасадов, каждый - сетка квадов,
+    всего около vertex_count вершин. Нормали полигонов направлены наружу.
+    """
+    per_facade = max(4, vertex_count // facades)
+    columns = max(2, int(round(math.sqrt(per_facade))))
+    rows = max(2, per_facade // columns)
+    half_width = BUILDING_RADIUS * math.tan(math.pi / facades)
+    u, z = np.meshgrid(np.linspace(-half_width, half_width, columns), np.linspace(0.0, BUILDING_HEIGHT, rows))
+
+    vertices = []
+    faces = []
+    for i in range(facades):
+        angle = 2.0 * math.pi * i / facades
+        normal = np.array([math.cos(angle), math.sin(angle), 0.0])
+        tangent = np.array([-math.sin(angle), math.cos(angle), 0.0])
+        points = normal * BUILDING_RADIUS + u[..., None] * tangent + z[..., None] * np.array([0.0, 0.0, 1.0])
+        vertices.append(points.reshape(-1, 3))
+
+        index = i * rows * columns + np.arange(rows * columns).reshape(rows, columns)
+        faces.append(np.stack([index[:-1, :-1], index[:-1, 1:], index[1:, 1:], index[1:, :-1]], axis=-1).reshape(-1, 4))
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(np.concatenate(vertices).tolist(), [], np.concatenate(faces).tolist())
+    mesh.update()
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def build_context(count, seed):
+    """
+    Контекстные объекты (кубы общего меша) кольцом вокруг здания.
+
+    Объекты лежат в дочерней коллекции, как в рабочих сценах: изоляция при рендере
+    исключает коллекцию целиком, а не скрывает каждый объект мастер-коллекции.
+    """
+    rng = np.random.default_rng(seed)
+    collection = bpy.data.collections.new(CONTEXT_COLLECTION_NAME)
+    bpy.context.scene.collection.children.link(collection)
+    mesh = bpy.data.meshes.new("BenchContext")
+    corners = [(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (0, 2)]
+    mesh.from_pydata(corners, [], [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)])
+    for i in range(count):
+        angle = rng.uniform(0.0, 2.0 * math.pi)
+        distance = rng.uniform(1.5, 4.0) * BUILDING_RADIUS
+        obj = bpy.data.objects.new(f"BenchContext_{i:04d}", mesh)
+        obj.location = (distance * math.cos(angle), distance * math.sin(angle), 0.0)
+        obj.scale = (rng.uniform(2, 8), rng.uniform(2, 8), rng.uniform(2, 15))
+        collection.objects.link(obj)
+
+
+# ------------------------------------------------------------------------
+# ЗАМЕРЫ
+# ------------------------------------------------------------------------
+def measure(func, repeat, setup=None):
+    """Замерить func() repeat раз (setup() перед каждым замером не учитывается)"""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return {'runs': [round(run, 5) for run in runs], 'min': round(min(runs), 5),
+            'median': round(statistics.median(runs), 5)}, result
+
+
+def facade_directions(facades):
+    """Нормали и центры фасадов здания-призмы"""
+    angles = 2.0 * np.pi * np.arange(facades) / facades
+    normals = np.stack([np.cos(angles), np.sin(angles), np.zeros(facades)], axis=-1)
+    centers = normals * BUILDING_RADIUS + np.array([0.0, 0.0, BUILDING_HEIGHT / 2])
+    return normals, centers
+
+
+def bench_framing(obj, facades, max_resolution, repeat):
+    """Кадрирование и clipping planes всех фасадов (холодный и тёплый кэш геометрии)"""
+    normals, centers = facade_directions(facades)
+    params = fac_cams.get_framing_params(50.0, True, True, max_resolution)
+
+    def framing():
+        return fac_cams.compute_framing_batch(fac_cams.get_framing_points(obj), normals, centers, **params)
+
+    results = {}
+    results['framing_batch_cold'], _ = measure(framing, repeat, setup=fac_cams.invalidate_geometry_cache)
+    results['framing_batch_warm'], _ = measure(framing, repeat)
+    return results
+
+
+def bench_versioned_filename(facades, repeat):
+    """Выбор имён файлов для всех фасадов в папке с EXISTING_FILES рендерами: просмотр папки и индекс версий"""
+    base_dir = tempfile.mkdtemp(prefix="sde_bench_versions_")
+    try:
+        for i in range(EXISTING_FILES):
+            open(os.path.join(base_dir, f"Old_{i:03d}-С_2000-01-01_1.png"), 'w').close()
+
+        def scan():
+            for i in range(facades):
+                fac_cams.get_versioned_filename(base_dir, BUILDING_NAME, f"{i:03d}", "С")
+
+        def index():
+            version_index = fac_cams.VersionIndex(base_dir)
+            for i in range(facades):
+                fac_cams.get_versioned_filename(base_dir, BUILDING_NAME, f"{i:03d}", "С", version_index=version_index)
+
+        return {'versioned_filename_scan': measure(scan, repeat)[0],
+                'versioned_filename_index': measure(index, repeat)[0]}
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def remove_cameras():
+    """Удалить камеры аддона и их коллекции (между повторами создания камер)"""
+    for collection in list(bpy.data.collections):
+        if collection.name.startswith(fac_cams.CAM_COLLECTION_PREFIX):
+            for obj in list(collection.objects):
+                bpy.data.objects.remove(obj)
+            bpy.data.collections.remove(collection)
+    for camera in list(bpy.data.cameras):
+        if camera.users == 0:
+            bpy.data.cameras.remove(camera)
+
+
+def bench_create_cameras(obj, max_resolution, repeat):
+    """Создание камер оператором: все полигоны выделены, одна камера на плоскость фасада"""
+    bpy.context.view_layer.objects.active = obj
+    obj.select_set(True)
+    selection = np.ones(len(obj.data.polygons), dtype=bool)
+    obj.data.polygons.foreach_set('select', selection)
+    obj.data.update()
+
+    def create():
+        bpy.ops.object.mode_set(mode='EDIT')
+        try:
+            bpy.ops.object.sde_create_cameras_pro(distance=50.0, max_resolution=max_resolution, auto_distance=True,
+                                                  auto_clipping=True, use_extreme_points=True,
+                                                  cluster_coplanar=True)
+        finally:
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+    def setup():
+        remove_cameras()
+        fac_cams.invalidate_geometry_cache()
+
+    stats, _ = measure(create, repeat, setup=setup)
+    cameras = len(fac_cams.collect_addon_cameras())
+    return stats, cameras
+
+
+def bench_render(repeat):
+    """Рендер Workbench всех камер пакетным режимом аддона"""
+    settings = bpy.context.scene.sde_cam_pro_settings
+    settings.write_timing_report = False
+    settings.render_skip_mode = 'ALL'
+    output_dir = tempfile.mkdtemp(prefix="sde_bench_render_")
+    summaries = []
+    try:
+        stats, _ = measure(lambda: summaries.append(
+            fac_cams.run_batch_render(bpy.context, [BUILDING_NAME], output_dir=output_dir, engine='WORKBENCH')),
+            repeat)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    last = summaries[-1]
+    return {'render_workbench': stats, 'rendered': last['rendered'], 'failed': last['failed'],
+            'render_timings': last.get('timings')}
+
+
+def bench_high_res_write(repeat):
+    """
+    Рендер Workbench и запись PNG кадров пресета «Высокое разрешение» (большая сторона
+    HIGH_RES_RESOLUTION, сжатие 15%, без тайлов): сохранение и проверка полного кадра.
+    """
+    settings = bpy.context.scene.sde_cam_pro_settings
+    saved = (settings.write_timing_report, settings.render_skip_mode, settings.output_format,
+             settings.output_compression, settings.use_tiled_render)
+    cameras = sorted(fac_cams.collect_addon_cameras(), key=lambda cam: cam.name)[:HIGH_RES_CAMERAS]
+    saved_sizes = [(cam[fac_cams.CAM_RES_X_PROP], cam[fac_cams.CAM_RES_Y_PROP]) for cam in cameras]
+    output_dir = tempfile.mkdtemp(prefix="sde_bench_write_")
+    results = {}
+    try:
+        settings.write_timing_report = False
+        settings.render_skip_mode = 'ALL'
+        settings.output_format = 'PNG'
+        settings.output_compression = 15
+        settings.use_tiled_render = False  # Замеряется сохранение полного кадра, а не сшивка тайлов
+        for cam, (res_x, res_y) in zip(cameras, saved_sizes):
+            scale = HIGH_RES_RESOLUTION / max(res_x, res_y)
+            cam[fac_cams.CAM_RES_X_PROP] = round(res_x * scale)
+            cam[fac_cams.CAM_RES_Y_PROP] = round(res_y * scale)
+        camera_names = [cam.name for cam in cameras]
+
+        results['high_res_write'], _ = measure(lambda: fac_cams.run_batch_render(
+            bpy.context, [BUILDING_NAME], output_dir=output_dir, engine='WORKBENCH',
+            camera_names=camera_names), repeat)
+    finally:
+        for cam, (res_x, res_y) in zip(cameras, saved_sizes):
+            cam[fac_cams.CAM_RES_X_PROP] = res_x
+            cam[fac_cams.CAM_RES_Y_PROP] = res_y
+        (settings.write_timing_report, settings.render_skip_mode, settings.output_format,
+         settings.output_compression, settings.use_tiled_render) = saved
+        shutil.rmtree(output_dir, ignore_errors=True)
+    results['high_res_cameras'] = len(cameras)
+    return results
+
+
+def run_scale(name, params, args):
+    """Построить сцену масштаба и выполнить все замеры"""
+    clear_scene()
+    start = time.perf_counter()
+    obj = build_building(BUILDING_NAME, params['vertices'], params['facades'])
+    build_context(params['context_objects'], args.seed)
+    result = {
+        'scale': name,
+        'params': dict(params),
+        'mesh': {'vertices': len(obj.data.vertices), 'faces': len(obj.data.polygons)},
+        'build_scene_seconds': round(time.perf_counter() - start, 3),
+    }
+    timings = {}
+    timings.update(bench_framing(obj, params['facades'], args.max_resolution, args.repeat))
+    timings.update(bench_versioned_filename(params['facades'], args.repeat))
+    timings['create_cameras'], result['cameras'] = bench_create_cameras(obj, args.max_resolution, args.repeat)
+    if not args.no_render:
+        timings.update(bench_render(args.repeat))
+    if not args.no_high_res:
+        timings.update(bench_high_res_write(args.repeat))
+    result['timings'] = timings
+    fac_cams.logger.warning("[BENCH] %s: %s вершин, %s камер, создание камер %.3f с",
+                            name, result['mesh']['vertices'], result['cameras'], timings['create_cameras']['median'])
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not hasattr(bpy.types.Scene, "sde_cam_pro_settings"):
+        fac_cams.register()
+    fac_cams.setup_logging('WARNING')
+
+    scales = [(name, SCALES[name]) for name in args.scales]
+    if args.vertices:
+        scales.append(('custom', {'vertices': args.vertices, 'facades': args.facades,
+                                  'context_objects': args.context_objects}))
+
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'blender_version': bpy.app.version_string,
+        'addon_version': ".".join(map(str, fac_cams.bl_info['version'])),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'max_resolution': args.max_resolution,
+        'results': [run_scale(name, params, args) for name, params in scales],
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
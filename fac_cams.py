@@ -12,25 +12,142 @@ bl_info = {
 
 import bpy
 import bmesh
-from mathutils import Vector, Matrix
+from mathutils import Vector
+import numpy as np
+import argparse
+import contextlib
+import csv
+import fnmatch
+import json
+import logging
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import time
 import datetime
+import hashlib
+import html
+import itertools
 import math
+import struct
+import zlib
+from collections import deque
+
+logger = logging.getLogger("fac_cams")
 
 CAM_COLLECTION_PREFIX = "CAMS_"
 CAM_RES_X_PROP = "sde_resolution_x"
 CAM_RES_Y_PROP = "sde_resolution_y"
 CAM_DIRECTION_PROP = "sde_facade_direction"  # Сохраняет сторону света фасада
+CAM_SOURCE_OBJECT_PROP = "sde_source_object"  # Имя объекта, по которому создана камера
+CAM_SOURCE_FACES_PROP = "sde_source_faces"    # Индексы полигонов (кластер при «Одна камера на плоскость»)
+CAM_FRAMING_PARAMS_PROP = "sde_framing_params"  # Параметры кадрирования при создании
+CAM_FINGERPRINT_PROP = "sde_geometry_fingerprint"  # Отпечаток исходной геометрии для инкрементального обновления
+CAM_SOURCE_PLANE_PROP = "sde_source_plane"    # Плоскость исходных полигонов [nx, ny, nz, d] в координатах объекта
+CAM_SOURCE_TOPOLOGY_PROP = "sde_source_topology"  # Хеш топологии меша, при которой сохранены индексы полигонов
 
 # Константы для математических расчетов
 VERTICAL_THRESHOLD = 0.001  # Порог для определения вертикальных поверхностей (крыши/полы)
 ANGLE_45_DEGREES = 0.707    # cos(45°) для определения направления нормали вверх/вниз
 FRAME_PADDING = 1.05        # 5% отступ вокруг объекта в кадре
-MIN_FILE_SIZE = 1000        # Минимальный размер файла для считания рендера успешным (байты)
+RENDER_PROBE_SIZE = 32      # Размер кадра тестового рендера для выбора метода (пиксели)
+VALIDATION_SAMPLE_ROWS = 64 # Строк в выборочной проверке содержимого кадра
 MIN_CLIPPING_RANGE = 1.0    # Минимальный диапазон между clip_start и clip_end (метры)
 DEFAULT_CLIPPING_START = 0.1    # Значение clipping start по умолчанию
 DEFAULT_CLIPPING_END = 1000.0   # Значение clipping end по умолчанию
+MODAL_RENDER_INTERVAL = 0.05    # Интервал таймера модального рендера (секунды)
+# События, которые модальный рендер пропускает дальше: навигация во viewport
+MODAL_NAVIGATION_EVENTS = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+    'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'MOUSESMARTZOOM', 'NDOF_MOTION',
+    'WINDOW_DEACTIVATE',
+}
+ISOLATION_COLLECTION_NAME = "SDE_RENDER_ISOLATION"  # Временная коллекция изоляции объекта при рендере
+VERSION_MANIFEST_NAME = ".sde_versions.json"  # Манифест версий файлов в папке рендера
+RENDER_CACHE_NAME = ".sde_render_cache.json"  # Отпечатки входных данных рендера камер в папке рендера
+# Свойства источника света, которые входят в хеш освещения кэша рендера
+LIGHT_HASH_PROPS = ('color', 'energy', 'shadow_soft_size', 'use_shadow', 'spot_size', 'spot_blend',
+                    'shape', 'size', 'size_y', 'angle')
+TIMING_REPORT_PREFIX = "render_timings_"  # Префикс отчётов о времени рендера в папке рендеров
+PREVIEW_DIR_NAME = "preview"    # Подпапка превью в папке рендеров
+CONTACT_SHEET_NAME = "contact_sheet.html"  # Лист просмотра превью в папке превью
+RENDER_FINGERPRINT_VERSION = 1  # Увеличивается при изменении конвейера рендера (сбрасывает кэш рендера)
+FARM_POLL_INTERVAL = 0.5        # Интервал опроса воркеров фермы рендера (секунды)
+FILE_LOCK_TIMEOUT = 30.0        # Ожидание межпроцессной блокировки файла (секунды)
+FILE_LOCK_STALE = 120.0         # Возраст оставленного файла-замка, после которого он снимается (секунды)
+PROJECTION_CHUNK_SIZE = 1 << 22  # Максимум элементов в промежуточной матрице проекций (N × осей)
+EXTREME_POINTS_MIN_VERTICES = 20000  # Меши меньше этого размера обрабатываются полным перебором вершин
+EXTREME_POINTS_DIRECTIONS = 64       # Количество направлений выборки для внутреннего многогранника
+EXTREME_POINTS_MARGIN = 1e-9         # Запас (доля габарита) для отбрасывания внутренних точек
+
+DEFAULT_LOG_LEVEL = 'INFO'
+
+LOG_LEVEL_ITEMS = [
+    ('DEBUG', "Отладка", "Подробный вывод по каждой камере и каждому файлу (замедляет рендер больших сцен)"),
+    ('INFO', "Информация", "План рендера, итоги и важные события"),
+    ('WARNING', "Предупреждения", "Только предупреждения и ошибки"),
+    ('ERROR', "Ошибки", "Только ошибки"),
+]
+
+OUTPUT_FORMAT_ITEMS = [
+    ('PNG', "PNG", "Без потерь; скорость и размер задаются сжатием"),
+    ('WEBP', "WebP", "Компактнее PNG; при качестве 100 - без потерь"),
+    ('TIFF', "TIFF (LZW)", "Архивный TIFF со сжатием LZW без потерь"),
+    ('JPEG', "JPEG", "С потерями и без прозрачности; самый быстрый и компактный"),
+]
+OUTPUT_FORMAT_EXTENSIONS = {'PNG': '.png', 'WEBP': '.webp', 'TIFF': '.tif', 'JPEG': '.jpg'}
+OUTPUT_COLOR_MODE_ITEMS = [
+    ('RGBA', "RGBA", "Цвет с прозрачностью"),
+    ('RGB', "RGB", "Цвет без прозрачности"),
+    ('BW', "Ч/Б", "Оттенки серого"),
+]
+OUTPUT_COLOR_CHANNELS = {'BW': 1, 'RGB': 3, 'RGBA': 4}
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_IDAT_CHUNK_SIZE = 1 << 20  # Размер блока IDAT при потоковой записи PNG (байты)
+# Настройки формата файла сцены, которые сохраняются и восстанавливаются при рендере
+IMAGE_SETTINGS_PROPS = ('file_format', 'color_mode', 'color_depth', 'compression', 'quality', 'tiff_codec')
+
+# Уровни report() оператора -> уровни логирования (для пакетного режима)
+REPORT_LOG_LEVELS = {'DEBUG': logging.DEBUG, 'INFO': logging.INFO, 'WARNING': logging.WARNING, 'ERROR': logging.ERROR}
+
+
+# ------------------------------------------------------------------------
+# ЛОГИРОВАНИЕ
+# ------------------------------------------------------------------------
+_log_handler = None
+
+
+def get_log_level_preference():
+    """Уровень логирования из настроек аддона (в пакетном режиме без включённого аддона - по умолчанию)"""
+    try:
+        return bpy.context.preferences.addons[__name__].preferences.log_level
+    except (AttributeError, KeyError):
+        return DEFAULT_LOG_LEVEL
+
+
+def setup_logging(level=None):
+    """Подключить вывод логгера аддона в консоль и установить уровень (по умолчанию - из настроек)"""
+    global _log_handler
+    if _log_handler is None:
+        _log_handler = logging.StreamHandler(sys.stdout)
+        _log_handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        logger.addHandler(_log_handler)
+        logger.propagate = False
+    logger.setLevel(level or get_log_level_preference())
+
+
+def teardown_logging():
+    """Отключить вывод логгера аддона"""
+    global _log_handler
+    if _log_handler is not None:
+        logger.removeHandler(_log_handler)
+        _log_handler = None
+
+
+def _update_log_level(self, context):
+    setup_logging(self.log_level)
 
 
 # Функция автоматического создания имени папки
@@ -51,7 +168,7 @@ def get_cardinal_direction(face_normal_world):
     
     # Проверяем на случай вертикальных поверхностей (крыши, полы)
     if abs(x) < VERTICAL_THRESHOLD and abs(y) < VERTICAL_THRESHOLD:
-        print(f"[DIRECTION DEBUG] Вертикальная поверхность обнаружена (Z={face_normal_world.z:.3f})")
+        logger.debug("[DIRECTION] Вертикальная поверхность обнаружена (Z=%.3f)", face_normal_world.z)
         return "Верт"  # Вертикальная поверхность (крыша/пол)
     
     # Рассчитываем угол относительно севера (положительная ось Y)
@@ -62,7 +179,7 @@ def get_cardinal_direction(face_normal_world):
     if angle_degrees < 0:
         angle_degrees += 360
         
-    print(f"[DIRECTION DEBUG] Нормаль: ({x:.3f}, {y:.3f}, {face_normal_world.z:.3f}) -> Угол: {angle_degrees:.1f}°")
+    logger.debug("[DIRECTION] Нормаль: (%.3f, %.3f, %.3f) -> Угол: %.1f°", x, y, face_normal_world.z, angle_degrees)
     
     # Определяем сторону света по углу
     # Север: 337.5° - 22.5° (0°)
@@ -92,593 +209,3215 @@ def get_cardinal_direction(face_normal_world):
     else:  # 292.5° - 337.5°
         direction = "СЗ"  # Северо-запад
         
-    print(f"[DIRECTION DEBUG] -> Определено направление: {direction}")
+    logger.debug("[DIRECTION] -> Определено направление: %s", direction)
     return direction
 
 
 # Функция создания имени файла с версионностью
-def get_versioned_filename(base_dir, obj_name, face_index, direction):
-    """Создать имя файла с версионностью"""
+def get_versioned_filename(base_dir, obj_name, face_index, direction, version_index=None, extension='.png'):
+    """
+    Создать имя файла с версионностью.
+
+    С version_index номер версии берётся из индекса папки за O(1) (расширение задаёт индекс),
+    без него папка просматривается целиком (os.listdir) по файлам с расширением extension.
+    """
     
     # Форматируем дату
     current_date = datetime.datetime.now().strftime("%Y-%m-%d")
     
     # Базовое имя файла
     base_name = f"{obj_name}_{face_index}-{direction}_{current_date}"
+
+    if version_index is not None:
+        return version_index.allocate(base_name)
     
     # Ищем максимальный номер версии
     version = 1
     if os.path.exists(base_dir):
         try:
             existing_files = os.listdir(base_dir)
-            print(f"[VERSIONING DEBUG] Проверяем папку: {base_dir}")
-            print(f"[VERSIONING DEBUG] Найдено файлов: {len(existing_files)}")
+            logger.debug("[VERSIONING] Проверяем папку: %s", base_dir)
+            logger.debug("[VERSIONING] Найдено файлов: %s", len(existing_files))
             
             for filename in existing_files:
-                if filename.startswith(base_name) and filename.endswith('.png'):
-                    print(f"[VERSIONING DEBUG] Найден похожий файл: {filename}")
+                if filename.startswith(base_name) and filename.endswith(extension):
+                    logger.debug("[VERSIONING] Найден похожий файл: %s", filename)
                     # Извлекаем номер версии из имени файла
                     try:
-                        # Формат: basename_version.png
-                        version_part = filename[len(base_name):].replace('.png', '')
+                        # Формат: basename_version.ext
+                        version_part = filename[len(base_name):-len(extension)]
                         if version_part.startswith('_'):
                             current_version = int(version_part[1:])
                             version = max(version, current_version + 1)
-                            print(f"[VERSIONING DEBUG] Обновлена версия до: {version}")
+                            logger.debug("[VERSIONING] Обновлена версия до: %s", version)
                     except (ValueError, IndexError):
                         continue
         except OSError as e:
-            print(f"[VERSIONING ERROR] Ошибка чтения папки: {e}")
+            logger.error("[VERSIONING] Ошибка чтения папки: %s", e)
     
-    final_filename = f"{base_name}_{version}.png"
-    print(f"[VERSIONING DEBUG] Финальное имя файла: {final_filename}")
+    final_filename = f"{base_name}_{version}{extension}"
+    logger.debug("[VERSIONING] Финальное имя файла: %s", final_filename)
     return final_filename
 
 
-# Функция для расчёта оптимальных clipping planes
-def calculate_clipping_planes(obj, camera_location, camera_direction):
-    """Рассчитать оптимальные clipping planes на основе габаритов объекта и позиции камеры"""
-    try:
-        # Получаем мировые координаты всех вершин объекта
-        world_matrix = obj.matrix_world
-        mesh = obj.data
+class VersionIndex:
+    """
+    Индекс версий файлов рендера одной папки: базовое имя -> последняя занятая версия.
+
+    Строится один раз на папку (из манифеста или одним проходом os.listdir) и обновляется
+    при выдаче каждого имени, поэтому выбор имени файла не зависит от количества файлов в папке.
+    """
+
+    def __init__(self, base_dir, extension='.png', use_manifest=False):
+        self.base_dir = base_dir
+        self.extension = extension
+        self.use_manifest = use_manifest
+        self.versions = {}
+        self.dirty = False
+        self._load()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.base_dir, VERSION_MANIFEST_NAME)
+
+    def _load(self):
+        if self.use_manifest and self._load_manifest():
+            logger.info("[VERSIONING] Индекс версий из манифеста: %s (%s имён)", self.base_dir, len(self.versions))
+            return
+
+        try:
+            filenames = os.listdir(self.base_dir)
+        except OSError as e:
+            # Папки ещё нет или она недоступна - начинаем с пустого индекса
+            if os.path.exists(self.base_dir):
+                logger.error("[VERSIONING] Ошибка чтения папки: %s", e)
+            filenames = []
+
+        for filename in filenames:
+            if not filename.endswith(self.extension):
+                continue
+            base_name, _, version_part = filename[:-len(self.extension)].rpartition('_')
+            if base_name and version_part.isdigit():
+                version = int(version_part)
+                if version > self.versions.get(base_name, 0):
+                    self.versions[base_name] = version
+        # Индекс построен по папке - манифест нужно перезаписать
+        self.dirty = self.use_manifest
+        logger.info("[VERSIONING] Индекс версий по папке: %s (файлов: %s, имён: %s)",
+                    self.base_dir, len(filenames), len(self.versions))
+
+    def _load_manifest(self):
+        """Загрузить манифест, если после его записи в папке не появлялось и не удалялось файлов"""
+        try:
+            # Любое добавление/удаление файла меняет mtime папки - такой манифест устарел
+            if os.stat(self.base_dir).st_mtime_ns > os.stat(self.manifest_path).st_mtime_ns:
+                return False
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('extension') != self.extension:
+                return False
+            self.versions = {str(name): int(version) for name, version in manifest.get('versions', {}).items()}
+            return True
+        except (OSError, ValueError, TypeError, AttributeError):
+            self.versions = {}
+            return False
+
+    def allocate(self, base_name):
+        """Выдать следующее имя файла для базового имени и занять его в индексе"""
+        version = self.versions.get(base_name, 0) + 1
+        filename = f"{base_name}_{version}{self.extension}"
+        # Страховка от файлов, появившихся в обход индекса (одна проверка, без просмотра папки)
+        while os.path.exists(os.path.join(self.base_dir, filename)):
+            version += 1
+            filename = f"{base_name}_{version}{self.extension}"
+
+        self.versions[base_name] = version
+        self.dirty = True
+        return filename
+
+    def save(self):
+        """Записать манифест (только если он включён и индекс менялся)"""
+        if not (self.use_manifest and self.dirty):
+            return
+        try:
+            # Запись на месте: mtime манифеста становится не меньше mtime папки
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                json.dump({'extension': self.extension, 'versions': self.versions}, f, ensure_ascii=False)
+            self.dirty = False
+        except OSError as e:
+            logger.error("[VERSIONING] Не удалось сохранить манифест версий: %s", e)
+
+
+def clipping_planes_from_range(min_distance, max_distance):
+    """
+    Рассчитать clipping planes по диапазону расстояний от камеры до вершин вдоль направления взгляда.
+
+    Args:
+        min_distance: Минимальное расстояние (отрицательное значение = позади камеры)
+        max_distance: Максимальное расстояние
+
+    Returns:
+        tuple: (clip_start, clip_end)
+    """
+    # Clip start: минимальное расстояние минус небольшой буфер (но не меньше 0.001)
+    if min_distance > 0:
+        # Если объект перед камерой
+        clip_start = max(0.001, min_distance * 0.9 - 1.0)
+    else:
+        # Если объект позади камеры или пересекает плоскость камеры
+        clip_start = 0.001
+
+    # Clip end: максимальное расстояние с разумным буфером
+    if max_distance > 0:
+        # Добавляем буфер 20% от максимального расстояния, но минимум 2 метра
+        buffer = max(2.0, abs(max_distance) * 0.2)
+        clip_end = max_distance + buffer
+    else:
+        # Если весь объект позади камеры - устанавливаем разумное значение
+        clip_end = max(10.0, abs(min_distance) + 5.0)
+
+    # Проверяем минимальный диапазон между start и end
+    if clip_end - clip_start < MIN_CLIPPING_RANGE:
+        clip_end = clip_start + 10.0  # Минимальный диапазон 10 метров вместо 1000
+
+    return clip_start, clip_end
+
+
+# ------------------------------------------------------------------------
+# ВЕКТОРИЗОВАННЫЙ РАСЧЁТ КАДРИРОВАНИЯ (NumPy)
+# ------------------------------------------------------------------------
+def matrix_to_numpy(matrix):
+    """Преобразовать mathutils.Matrix в массив NumPy float64"""
+    return np.array(matrix, dtype=np.float64)
+
+
+def get_local_vertices(mesh):
+    """Получить локальные координаты вершин меша массивом (N, 3) через foreach_get"""
+    count = len(mesh.vertices)
+    coords = np.empty(count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    return coords.reshape(count, 3)
+
+
+def transform_points(points, matrix):
+    """Перевести массив точек (N, 3) в мировые координаты одним матричным умножением"""
+    m = matrix_to_numpy(matrix)
+    return points @ m[:3, :3].T + m[:3, 3]
+
+
+def project_extents(points, axes):
+    """
+    Найти минимумы и максимумы проекций набора точек на набор осей.
+
+    Проекции считаются блоками, чтобы промежуточная матрица (N × осей)
+    не превышала PROJECTION_CHUNK_SIZE элементов.
+
+    Args:
+        points: Массив точек (N, 3)
+        axes: Массив осей (A, 3)
+
+    Returns:
+        tuple: (mins, maxs) - массивы формы (A,)
+    """
+    axes = np.asarray(axes, dtype=np.float64).reshape(-1, 3)
+    mins = np.full(len(axes), np.inf)
+    maxs = np.full(len(axes), -np.inf)
+    if len(points) == 0 or len(axes) == 0:
+        return mins, maxs
+
+    step = max(1, PROJECTION_CHUNK_SIZE // len(axes))
+    for start in range(0, len(points), step):
+        proj = points[start:start + step] @ axes.T
+        np.minimum(mins, proj.min(axis=0), out=mins)
+        np.maximum(maxs, proj.max(axis=0), out=maxs)
+    return mins, maxs
+
+
+def get_faces_world(obj, indices):
+    """
+    Получить полигоны объекта с заданными индексами в мировых координатах.
+
+    В режиме редактирования перед вызовом нужно выполнить obj.update_from_editmode().
+
+    Returns:
+        tuple: (normals, centers, areas) - нормализованные мировые нормали (K, 3),
+               мировые центры (K, 3) и мировые площади (K,)
+    """
+    mesh = obj.data
+    count = len(mesh.polygons)
+    indices = np.asarray(indices, dtype=np.int64)
+
+    normals = np.empty(count * 3, dtype=np.float32)
+    centers = np.empty(count * 3, dtype=np.float32)
+    areas = np.empty(count, dtype=np.float32)
+    mesh.polygons.foreach_get("normal", normals)
+    mesh.polygons.foreach_get("center", centers)
+    mesh.polygons.foreach_get("area", areas)
+
+    m = matrix_to_numpy(obj.matrix_world)
+    local_normals = normals.reshape(count, 3)[indices]
+
+    # По стандарту Blender нормаль направлена "наружу" от поверхности
+    normals_world = local_normals @ m[:3, :3].T
+    lengths = np.linalg.norm(normals_world, axis=1)
+    lengths[lengths == 0] = 1.0
+    normals_world /= lengths[:, None]
+
+    centers_world = centers.reshape(count, 3)[indices] @ m[:3, :3].T + m[:3, 3]
+
+    # Площадь плоского полигона после аффинного преобразования: A * |cof(M) @ n|
+    areas_world = areas[indices].astype(np.float64)
+    determinant = np.linalg.det(m[:3, :3])
+    if determinant != 0:
+        cofactor = determinant * np.linalg.inv(m[:3, :3]).T
+        areas_world *= np.linalg.norm(local_normals @ cofactor.T, axis=1)
+    return normals_world, centers_world, areas_world
+
+
+def get_mesh_topology_hash(mesh):
+    """
+    Хеш топологии полигонов: число углов каждого полигона и индексы вершин углов.
+
+    Меняется при любой правке, перенумеровывающей полигоны (удаление, выдавливание, фаска,
+    нож), и не меняется при перемещении вершин.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    h.update(loop_totals.tobytes())
+    vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', vertex_indices)
+    h.update(vertex_indices.tobytes())
+    return h.hexdigest()
+
+
+def get_faces_local(mesh):
+    """
+    Нормали, центры и площади всех полигонов меша в локальных координатах объекта.
+
+    Returns:
+        tuple: (normals (N, 3), centers (N, 3), areas (N,))
+    """
+    count = len(mesh.polygons)
+    normals = np.empty(count * 3, dtype=np.float32)
+    centers = np.empty(count * 3, dtype=np.float32)
+    areas = np.empty(count, dtype=np.float32)
+    mesh.polygons.foreach_get("normal", normals)
+    mesh.polygons.foreach_get("center", centers)
+    mesh.polygons.foreach_get("area", areas)
+    return normals.reshape(count, 3).astype(np.float64), centers.reshape(count, 3).astype(np.float64), areas
+
+
+def get_faces_plane(normals, centers, areas, faces):
+    """
+    Плоскость группы полигонов (нормаль, взвешенная по площади, и смещение по центру).
+
+    Returns:
+        list: [nx, ny, nz, d] - плоскость n · p = d в координатах входных массивов
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    weights = np.maximum(areas[faces].astype(np.float64), 1e-12)
+    normal = (normals[faces] * weights[:, None]).sum(axis=0)
+    length = np.linalg.norm(normal)
+    normal = normal / length if length > 0 else normals[faces[0]]
+    center = (centers[faces] * weights[:, None]).sum(axis=0) / weights.sum()
+    return [float(v) for v in normal] + [float(normal @ center)]
+
+
+def match_plane_faces(normals, centers, plane, angle_tolerance, distance_tolerance):
+    """
+    Индексы полигонов, лежащих в плоскости [nx, ny, nz, d] с заданными допусками.
+
+    Returns:
+        list: Индексы полигонов (пустой, если плоскости больше нет)
+    """
+    plane_normal = np.asarray(plane[:3], dtype=np.float64)
+    matched = ((normals @ plane_normal >= math.cos(angle_tolerance)) &
+               (np.abs(centers @ plane_normal - plane[3]) <= distance_tolerance))
+    return [int(i) for i in np.flatnonzero(matched)]
+
+
+def get_selected_faces_world(obj):
+    """
+    Получить выделенные полигоны объекта в мировых координатах.
+
+    Returns:
+        tuple: (indices, normals, centers, areas) - индексы полигонов (K,) и данные get_faces_world()
+    """
+    select = np.zeros(len(obj.data.polygons), dtype=bool)
+    obj.data.polygons.foreach_get("select", select)
+    indices = np.flatnonzero(select)
+    return (indices,) + get_faces_world(obj, indices)
+
+
+def cluster_coplanar_faces(normals, centers, angle_tolerance, distance_tolerance):
+    """
+    Сгруппировать полигоны, лежащие в одной плоскости фасада.
+
+    Ключ пространственного хеша - только квантованная нормаль: смещение плоскости, посчитанное
+    по собственной нормали полигона, вдали от начала координат уходит на |c|·Δθ, и почти
+    компланарные полигоны геопривязанных моделей попадали бы в несоседние ячейки. Смещение
+    проверяется в системе представителя кластера - векторно по всем кластерам соседних ячеек.
+
+    Args:
+        normals: Мировые нормали полигонов (K, 3)
+        centers: Мировые центры полигонов (K, 3)
+        angle_tolerance: Допустимый угол между нормалями (радианы)
+        distance_tolerance: Допустимое расстояние между плоскостями (метры)
+
+    Returns:
+        list: Кластеры - списки позиций полигонов во входных массивах
+    """
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    if len(normals) == 0:
+        return []
+
+    cos_tolerance = math.cos(angle_tolerance)
+    # Размер ячейки по нормали - хорда единичной сферы для допустимого угла
+    normal_cell = max(2.0 * math.sin(angle_tolerance / 2.0), 1e-6)
+
+    keys = np.floor(normals / normal_cell).astype(np.int64)
+    neighbours = list(itertools.product((-1, 0, 1), repeat=3))
+
+    # Нормаль, центр и смещение плоскости первого полигона каждого кластера (представителя),
+    # сравнение с ним не даёт плоскости кластера «дрейфовать»
+    rep_normals = np.empty_like(normals)
+    rep_offsets = np.empty(len(normals), dtype=np.float64)
+
+    cells = {}
+    clusters = []
+    for i in range(len(normals)):
+        key = tuple(keys[i])
+        candidates = [cluster_id for delta in neighbours
+                      for cluster_id in cells.get((key[0] + delta[0], key[1] + delta[1], key[2] + delta[2]), ())]
+        target = None
+        if candidates:
+            candidates = np.array(candidates)
+            cand_normals = rep_normals[candidates]
+            accepted = ((cand_normals @ normals[i] >= cos_tolerance) &
+                        (np.abs(cand_normals @ centers[i] - rep_offsets[candidates]) <= distance_tolerance))
+            if accepted.any():
+                target = int(candidates[accepted].min())
+
+        if target is None:
+            target = len(clusters)
+            clusters.append([])
+            rep_normals[target] = normals[i]
+            rep_offsets[target] = normals[i] @ centers[i]
+            cells.setdefault(key, []).append(target)
+        clusters[target].append(i)
+
+    return clusters
+
+
+def merge_face_cluster(normals, centers, areas, cluster):
+    """
+    Объединить кластер полигонов в одну плоскость фасада.
+
+    Returns:
+        tuple: (normal, center) - нормаль, взвешенная по площади, и взвешенный центр
+    """
+    weights = np.asarray(areas, dtype=np.float64)[cluster]
+    if weights.sum() <= 0:
+        weights = np.ones(len(cluster))
+
+    normal = (normals[cluster] * weights[:, None]).sum(axis=0)
+    length = np.linalg.norm(normal)
+    normal = normal / length if length > 0 else normals[cluster[0]]
+    center = (centers[cluster] * weights[:, None]).sum(axis=0) / weights.sum()
+    return normal, center
+
+
+def compute_framing_batch(world_vertices, normals, centers, distance, auto_distance, auto_clipping, max_resolution):
+    """
+    Рассчитать кадрирование камер сразу для всех фасадов.
+
+    Все проекции вершин (на нормали и на оси X/Y вида камер) считаются
+    одним проходом по массиву вершин, поэтому стоимость не зависит от
+    количества вызовов mathutils на вершину.
+
+    Args:
+        world_vertices: Мировые координаты вершин объекта (N, 3)
+        normals: Мировые нормали фасадов (K, 3)
+        centers: Мировые центры фасадов (K, 3)
+        distance: Расстояние от полигона до камеры (минимальное в автоматическом режиме)
+        auto_distance: Рассчитывать расстояние от крайней точки объекта
+        auto_clipping: Рассчитывать clipping planes по габаритам объекта
+        max_resolution: Разрешение для большей стороны кадра
+
+    Returns:
+        list: Для каждого фасада кортеж (location, rotation, ortho_scale, res_x, res_y,
+              clip_start, clip_end, facade_direction) или None, если кадр вырожден
+    """
+    normals = np.array(normals, dtype=np.float64).reshape(-1, 3)
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    face_count = len(normals)
+    if face_count == 0 or len(world_vertices) == 0:
+        logger.error("Объект не содержит вершин")
+        return [None] * face_count
+
+    # ВАЖНО: Инвертируем ТОЛЬКО для горизонтальных полов, не для наклонных поверхностей!
+    # Для истинно горизонтального пола (нормаль почти строго вниз) камера должна быть сверху
+    is_horizontal = (np.abs(normals[:, 0]) < 0.1) & (np.abs(normals[:, 1]) < 0.1)
+    is_floor = (np.abs(normals[:, 2]) > ANGLE_45_DEGREES) & (normals[:, 2] < 0)
+    normals[is_horizontal & is_floor] *= -1.0
+
+    # В Blender камера смотрит вдоль локальной оси -Z.
+    # to_track_quat('Z', 'Y') выравнивает +Z вдоль нормали, тогда -Z смотрит против нормали (на поверхность)
+    rotations = [Vector(n).to_track_quat('Z', 'Y') for n in normals]
+    rotation_mats = np.array([np.array(q.to_matrix()) for q in rotations], dtype=np.float64)
+    x_axes = rotation_mats[:, :, 0]
+    y_axes = rotation_mats[:, :, 1]
+
+    # Один проход по вершинам: проекции на нормали и на оси X/Y вида всех камер
+    mins, maxs = project_extents(world_vertices, np.concatenate((normals, x_axes, y_axes)))
+    normal_min, x_min, y_min = np.split(mins, 3)
+    normal_max, x_max, y_max = np.split(maxs, 3)
+
+    if auto_distance:
+        min_proj = normal_min - np.einsum('ij,ij->i', centers, normals)
+        buffer = np.maximum(10.0, -min_proj * 0.1)
+        final_distance = np.maximum(distance, -min_proj + buffer)
+    else:
+        final_distance = np.full(face_count, float(distance))
+
+    # Позиция камеры = центр полигона + нормаль * расстояние
+    initial_locations = centers + normals * final_distance[:, None]
+
+    # Габариты в пространстве вида камеры: x = (p - location)·ось_X
+    min_x = x_min - np.einsum('ij,ij->i', initial_locations, x_axes)
+    max_x = x_max - np.einsum('ij,ij->i', initial_locations, x_axes)
+    min_y = y_min - np.einsum('ij,ij->i', initial_locations, y_axes)
+    max_y = y_max - np.einsum('ij,ij->i', initial_locations, y_axes)
+
+    widths = max_x - min_x
+    heights = max_y - min_y
+    center_x = (min_x + max_x) / 2
+    center_y = (min_y + max_y) / 2
+    final_locations = initial_locations + x_axes * center_x[:, None] + y_axes * center_y[:, None]
+    scales = np.maximum(widths, heights) * FRAME_PADDING
+
+    # Расстояния до вершин вдоль направления взгляда (-нормаль): d = location·n - p·n
+    location_dots = np.einsum('ij,ij->i', final_locations, normals)
+    near_distances = location_dots - normal_max
+    far_distances = location_dots - normal_min
+
+    results = []
+    for i in range(face_count):
+        width = float(widths[i])
+        height = float(heights[i])
+        if width <= 0 or height <= 0:
+            results.append(None)
+            continue
+
+        content_aspect = width / height
+        res_x, res_y = 1920, 1080
+        if max_resolution > 0:
+            if content_aspect > 1.0:
+                res_x = int(max_resolution)
+                res_y = int(max_resolution / content_aspect)
+            else:
+                res_y = int(max_resolution)
+                res_x = int(max_resolution * content_aspect)
+        res_x = max(res_x, 1)
+        res_y = max(res_y, 1)
+
+        final_scale = float(scales[i])
+        if auto_clipping:
+            clip_start, clip_end = clipping_planes_from_range(float(near_distances[i]), float(far_distances[i]))
+        else:
+            # Значения по умолчанию
+            clip_start = 0.001
+            clip_end = max(100000.0, final_scale * 1000.0)
+
+        # Определяем сторону света для фасада
+        facade_direction = get_cardinal_direction(Vector(normals[i]))
 
-        # Создаём временный bmesh для получения вершин
-        bm = bmesh.new()
-        bm.from_mesh(mesh)
+        results.append((Vector(final_locations[i]), rotations[i], final_scale, res_x, res_y,
+                        clip_start, clip_end, facade_direction))
+    return results
 
-        # Получаем все вершины в мировых координатах
-        world_vertices = [world_matrix @ v.co for v in bm.verts]
+
+def apply_framing_to_camera(camera_obj, cam_data_tuple):
+    """Применить рассчитанное кадрирование к объекту камеры с валидацией параметров"""
+    final_cam_location, cam_rotation_quat, ortho_scale, res_x, res_y, clip_start, clip_end, facade_direction = cam_data_tuple
+
+    # Валидация параметров камеры
+    if ortho_scale <= 0:
+        logger.error("[CAMERA] Некорректный ortho_scale=%.3f, используем значение по умолчанию", ortho_scale)
+        ortho_scale = 10.0
+
+    if clip_start >= clip_end:
+        logger.error("[CAMERA] clip_start (%.3f) >= clip_end (%.3f), корректируем", clip_start, clip_end)
+        clip_start = DEFAULT_CLIPPING_START
+        clip_end = max(clip_start + 10.0, DEFAULT_CLIPPING_END)
+
+    if clip_start < 0.001:
+        clip_start = DEFAULT_CLIPPING_START
+
+    camera_data = camera_obj.data
+    camera_data.type = 'ORTHO'
+    camera_data.ortho_scale = ortho_scale
+    camera_data.clip_start = clip_start
+    camera_data.clip_end = clip_end
+
+    camera_obj.location = final_cam_location
+    if cam_rotation_quat is not None:
+        camera_obj.rotation_euler = cam_rotation_quat.to_euler()
+    else:
+        logger.error("Не удалось установить поворот камеры %s", camera_obj.name)
+
+    camera_obj[CAM_RES_X_PROP] = res_x
+    camera_obj[CAM_RES_Y_PROP] = res_y
+    camera_obj[CAM_DIRECTION_PROP] = facade_direction
+
+
+# ------------------------------------------------------------------------
+# КЭШ ГЕОМЕТРИИ ОБЪЕКТОВ
+# ------------------------------------------------------------------------
+# Ключ - указатель объекта; запись действительна, пока совпадают меш и matrix_world.
+# Записи сбрасываются обработчиком depsgraph при изменении геометрии.
+_geometry_cache = {}
+
+
+def _matrix_key(matrix):
+    """Хешируемое представление матрицы для ключа кэша"""
+    return tuple(tuple(row) for row in matrix)
+
+
+def get_cached_geometry(obj):
+    """
+    Получить запись кэша геометрии объекта, при необходимости пересчитав её.
+
+    Returns:
+        dict: {'mesh', 'matrix', 'count', 'local', 'world'} - указатель меша, ключ матрицы,
+              количество вершин, локальные (N, 3) float32 и мировые (N, 3) float64 координаты
+    """
+    mesh = obj.data
+    mesh_key = mesh.as_pointer()
+    matrix_key = _matrix_key(obj.matrix_world)
+    count = len(mesh.vertices)
+
+    entry = _geometry_cache.get(obj.as_pointer())
+    if entry and entry['mesh'] == mesh_key and entry['matrix'] == matrix_key and entry['count'] == count:
+        return entry
+
+    local = get_local_vertices(mesh)
+    entry = {
+        'mesh': mesh_key,
+        'matrix': matrix_key,
+        'count': count,
+        'local': local,
+        'world': transform_points(local, obj.matrix_world),
+    }
+    _geometry_cache[obj.as_pointer()] = entry
+    return entry
+
+
+def invalidate_geometry_cache(obj=None):
+    """Сбросить кэш геометрии и экстремальных точек для объекта или полностью (obj=None)"""
+    if obj is None:
+        _geometry_cache.clear()
+        _extreme_points_cache.clear()
+    else:
+        _geometry_cache.pop(obj.as_pointer(), None)
+        if obj.data is not None:
+            _extreme_points_cache.pop(obj.data.as_pointer(), None)
+
+
+@bpy.app.handlers.persistent
+def _geometry_cache_depsgraph_handler(scene, depsgraph):
+    """Сбросить записи кэша для объектов и мешей с изменённой геометрией"""
+    if not _geometry_cache and not _extreme_points_cache:
+        return
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        original = update.id.original
+        pointer = original.as_pointer()
+        if isinstance(original, bpy.types.Object):
+            _geometry_cache.pop(pointer, None)
+            if original.data is not None:
+                _extreme_points_cache.pop(original.data.as_pointer(), None)
+        elif isinstance(original, bpy.types.Mesh):
+            _extreme_points_cache.pop(pointer, None)
+            for key in [k for k, entry in _geometry_cache.items() if entry['mesh'] == pointer]:
+                del _geometry_cache[key]
+
+
+@bpy.app.handlers.persistent
+def _geometry_cache_load_handler(*args):
+    """Очистить кэш при загрузке другого файла: указатели становятся недействительными"""
+    invalidate_geometry_cache()
+
+
+# ------------------------------------------------------------------------
+# РЕЕСТР КАМЕР
+# ------------------------------------------------------------------------
+# Камера хранит указатель на свой объект (Object.sde_target_object): связь не зависит
+# от имён и переживает переименование, обрезку и суффиксы .001. Индекс объект -> камеры
+# строится по указателям одним проходом и сбрасывается при изменении состава коллекций.
+# Ключ - session_uid объекта, значения - имена камер (проверяются при каждом обращении).
+_camera_index = {}
+_camera_index_valid = False
+
+
+def _poll_target_object(self, obj):
+    """Целевым объектом камеры может быть только меш"""
+    return obj.type == 'MESH'
+
+
+def get_camera_target(cam):
+    """
+    Объект, для которого создана камера.
+
+    Указатель sde_target_object; для камер старых версий - объект по имени
+    из sde_source_object или из имени камеры (формат: ObjectName_face_XXX).
+
+    Returns:
+        bpy.types.Object или None
+    """
+    target = getattr(cam, "sde_target_object", None)
+    if target is not None:
+        return target
+    source_name = cam.get(CAM_SOURCE_OBJECT_PROP) or cam.name.split('_face_')[0]
+    target = bpy.data.objects.get(source_name)
+    if target is not None and target.type == 'MESH':
+        return target
+    return None
+
+
+def get_camera_target_name(cam):
+    """Имя объекта, для которого создана камера"""
+    target = getattr(cam, "sde_target_object", None)
+    if target is not None:
+        return target.name
+    source_name = cam.get(CAM_SOURCE_OBJECT_PROP)
+    if source_name:
+        return source_name
+    return cam.name.split('_face_')[0]
+
+
+def bind_camera_target(cam, obj):
+    """Записать в камеру указатель и имя её объекта"""
+    cam.sde_target_object = obj
+    cam[CAM_SOURCE_OBJECT_PROP] = obj.name
+    invalidate_camera_index()
+
+
+def invalidate_camera_index():
+    """Пометить индекс объект -> камеры устаревшим (перестроится при следующем обращении)"""
+    global _camera_index_valid
+    _camera_index_valid = False
+
+
+def rebuild_camera_index():
+    """Построить индекс объект -> камеры одним проходом по объектам файла"""
+    global _camera_index_valid
+    _camera_index.clear()
+    for cam in bpy.data.objects:
+        if cam.type != 'CAMERA' or CAM_RES_X_PROP not in cam:
+            continue
+        target = get_camera_target(cam)
+        if target is not None:
+            _camera_index.setdefault(target.session_uid, []).append(cam.name)
+    _camera_index_valid = True
+    logger.debug("[REGISTRY] Индекс камер: объектов %s", len(_camera_index))
+
+
+def get_object_cameras(obj):
+    """
+    Камеры аддона, созданные для объекта.
+
+    Returns:
+        list: Камеры объекта (пустой список, если камер нет)
+    """
+    if obj is None:
+        return []
+    if not _camera_index_valid:
+        rebuild_camera_index()
+    cameras = _lookup_object_cameras(obj)
+    if cameras is None:
+        # Камеру переименовали или удалили без изменения коллекций - перестраиваем один раз
+        rebuild_camera_index()
+        cameras = _lookup_object_cameras(obj) or []
+    return cameras
+
+
+def _lookup_object_cameras(obj):
+    """Камеры объекта из индекса или None, если запись индекса устарела"""
+    cameras = []
+    for cam_name in _camera_index.get(obj.session_uid, ()):
+        cam = bpy.data.objects.get(cam_name)
+        if cam is None or cam.type != 'CAMERA' or get_camera_target(cam) != obj:
+            return None
+        cameras.append(cam)
+    return cameras
+
+
+@bpy.app.handlers.persistent
+def _camera_index_depsgraph_handler(scene, depsgraph):
+    """Сбросить индекс камер при добавлении, удалении и перемещении объектов между коллекциями"""
+    if _camera_index_valid and depsgraph.id_type_updated('COLLECTION'):
+        invalidate_camera_index()
+
+
+@bpy.app.handlers.persistent
+def _camera_index_load_handler(*args):
+    """Сбросить индекс камер при загрузке другого файла"""
+    _camera_index.clear()
+    invalidate_camera_index()
+
+
+# ------------------------------------------------------------------------
+# СОСТОЯНИЕ ИНТЕРФЕЙСА ДЛЯ POLL И ПАНЕЛИ
+# ------------------------------------------------------------------------
+# poll() и draw() вызываются на каждую перерисовку, в том числе при навигации во viewport.
+# Число выделенных камер аддона и наличие коллекций камер считаются один раз и хранятся,
+# пока depsgraph (выделение, состав коллекций) или msgbus (активный объект) их не сбросят.
+_ui_state = {}
+_ui_state_msgbus_owner = object()
+
+
+def get_selected_addon_cameras(context):
+    """Выделенные камеры аддона в текущем слое просмотра"""
+    return [obj for obj in context.view_layer.objects.selected
+            if obj.type == 'CAMERA' and CAM_RES_X_PROP in obj]
+
+
+def get_ui_state(context):
+    """
+    Закэшированное состояние для poll() и панели.
+
+    Returns:
+        dict: {'view_layer', 'selected_cameras', 'camera_collections', 'approved_cameras'} - указатель
+              слоя просмотра, число выделенных камер аддона, наличие коллекций камер CAMS_
+              и число камер, одобренных по превью
+    """
+    view_layer_key = context.view_layer.as_pointer()
+    if _ui_state.get('view_layer') != view_layer_key:
+        _ui_state.clear()
+        _ui_state['view_layer'] = view_layer_key
+        _ui_state['selected_cameras'] = len(get_selected_addon_cameras(context))
+        _ui_state['camera_collections'] = any(coll.name.startswith(CAM_COLLECTION_PREFIX)
+                                              for coll in bpy.data.collections)
+        _ui_state['approved_cameras'] = (sum(1 for cam in collect_addon_cameras() if cam.sde_preview_approved)
+                                         if _ui_state['camera_collections'] else 0)
+    return _ui_state
+
+
+def invalidate_ui_state(*args):
+    """Сбросить закэшированное состояние интерфейса"""
+    _ui_state.clear()
+
+
+def subscribe_ui_state():
+    """Подписаться через msgbus на смену активного объекта"""
+    bpy.msgbus.clear_by_owner(_ui_state_msgbus_owner)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.LayerObjects, "active"),
+        owner=_ui_state_msgbus_owner,
+        args=(),
+        notify=invalidate_ui_state,
+    )
+
+
+@bpy.app.handlers.persistent
+def _ui_state_depsgraph_handler(scene, depsgraph):
+    """Сбросить состояние интерфейса при изменении выделения или состава коллекций"""
+    if _ui_state and (depsgraph.id_type_updated('SCENE') or depsgraph.id_type_updated('COLLECTION')):
+        _ui_state.clear()
+
+
+@bpy.app.handlers.persistent
+def _ui_state_load_handler(*args):
+    """Сбросить состояние и восстановить подписку msgbus (загрузка файла снимает подписки)"""
+    _ui_state.clear()
+    subscribe_ui_state()
+
+
+# ------------------------------------------------------------------------
+# ЭКСТРЕМАЛЬНЫЕ ТОЧКИ (ПРЕДРАСЧЁТ ВЫПУКЛОЙ ОБОЛОЧКИ)
+# ------------------------------------------------------------------------
+# Все величины кадрирования и clipping - это min/max линейных проекций вершин,
+# а они всегда достигаются на выпуклой оболочке. Для плотных мешей заранее
+# отбрасываем вершины, гарантированно лежащие строго внутри оболочки.
+# Ключ - указатель меша: точки хранятся в локальных координатах и не зависят от matrix_world.
+_extreme_points_cache = {}
+
+
+def _sphere_directions(count):
+    """Равномерно распределённые по сфере направления (спираль Фибоначчи)"""
+    i = np.arange(count, dtype=np.float64) + 0.5
+    phi = np.arccos(1.0 - 2.0 * i / count)
+    theta = np.pi * (1.0 + 5.0 ** 0.5) * i
+    return np.column_stack((np.cos(theta) * np.sin(phi), np.sin(theta) * np.sin(phi), np.cos(phi)))
+
+
+def _extreme_indices(points, directions):
+    """Индексы точек с максимальной проекцией на каждое из направлений"""
+    best_values = np.full(len(directions), -np.inf)
+    best_indices = np.zeros(len(directions), dtype=np.int64)
+    step = max(1, PROJECTION_CHUNK_SIZE // len(directions))
+    for start in range(0, len(points), step):
+        proj = points[start:start + step] @ directions.T
+        local_best = proj.argmax(axis=0)
+        values = proj[local_best, np.arange(len(directions))]
+        better = values > best_values
+        best_values[better] = values[better]
+        best_indices[better] = local_best[better] + start
+    return np.unique(best_indices)
+
+
+def _convex_hull_polygons(points):
+    """Построить выпуклую оболочку небольшого набора точек через bmesh (списки индексов вершин граней)"""
+    bm = bmesh.new()
+    try:
+        for co in points:
+            bm.verts.new(co)
+        bm.verts.index_update()
+        result = bmesh.ops.convex_hull(bm, input=bm.verts[:], use_existing_faces=False)
+        return [[v.index for v in ele.verts] for ele in result['geom'] if isinstance(ele, bmesh.types.BMFace)]
+    finally:
         bm.free()
 
-        if not world_vertices:
-            return DEFAULT_CLIPPING_START, DEFAULT_CLIPPING_END
 
-        # Проецируем все вершины на направление камеры
-        camera_dir_normalized = camera_direction.normalized()
+def _closed_hull_triangles(points):
+    """
+    Построить треугольники выпуклой оболочки небольшого набора точек.
+
+    Returns:
+        np.ndarray | None: Индексы вершин треугольников (T, 3) с нормалями наружу
+                           или None, если оболочка вырождена или не замкнута
+    """
+    polygons = _convex_hull_polygons(points)
+
+    # Веерная триангуляция: у каждого треугольника своя точная плоскость
+    triangles = [(poly[0], poly[k], poly[k + 1]) for poly in polygons for k in range(1, len(poly) - 1)]
+    if len(triangles) < 4:
+        return None
+
+    # Поверхность замкнута, если каждое ребро принадлежит ровно двум треугольникам
+    edge_counts = {}
+    for a, b, c in triangles:
+        for edge in ((a, b), (b, c), (c, a)):
+            key = (edge[0], edge[1]) if edge[0] < edge[1] else (edge[1], edge[0])
+            edge_counts[key] = edge_counts.get(key, 0) + 1
+    if any(count != 2 for count in edge_counts.values()):
+        return None
+
+    # Ориентируем нормали наружу: центр масс точек лежит внутри выпуклой оболочки
+    triangles = np.array(triangles, dtype=np.int64)
+    p0, p1, p2 = points[triangles[:, 0]], points[triangles[:, 1]], points[triangles[:, 2]]
+    outward = np.einsum('ij,ij->i', np.cross(p1 - p0, p2 - p0), p0 - points.mean(axis=0))
+    triangles[outward < 0] = triangles[outward < 0][:, ::-1]
+    return triangles
+
+
+def compute_extreme_points(points):
+    """
+    Отобрать точки, которые могут дать экстремум линейной проекции.
+
+    Строится внутренний многогранник - выпуклая оболочка точек, крайних вдоль
+    EXTREME_POINTS_DIRECTIONS направлений. Точки, лежащие строго внутри него
+    (с запасом EXTREME_POINTS_MARGIN от габарита), отбрасываются: для любого
+    направления их проекция строго меньше проекции одной из вершин многогранника,
+    поэтому min/max по результату совпадают с перебором всех точек.
+
+    Args:
+        points: Массив точек (N, 3)
+
+    Returns:
+        np.ndarray: Подмножество точек (M, 3); при вырожденной геометрии - все точки
+    """
+    points64 = np.asarray(points, dtype=np.float64)
+    if len(points64) < 4:
+        return points
+
+    directions = _sphere_directions(EXTREME_POINTS_DIRECTIONS)
+    candidate_indices = _extreme_indices(points64, np.concatenate((directions, -directions)))
+    candidates = points64[candidate_indices]
+    triangles = _closed_hull_triangles(candidates)
+    if triangles is None:
+        return points
+
+    p0, p1, p2 = candidates[triangles[:, 0]], candidates[triangles[:, 1]], candidates[triangles[:, 2]]
+    normals = np.cross(p1 - p0, p2 - p0)
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
+    if not valid.any():
+        return points
+    normals = normals[valid] / lengths[valid, None]
+    offsets = np.einsum('ij,ij->i', normals, p0[valid])
+
+    extent = float(np.linalg.norm(points64.max(axis=0) - points64.min(axis=0)))
+    margin = max(extent * EXTREME_POINTS_MARGIN, np.finfo(np.float64).tiny)
+
+    keep = np.zeros(len(points64), dtype=bool)
+    step = max(1, PROJECTION_CHUNK_SIZE // len(normals))
+    for start in range(0, len(points64), step):
+        signed = points64[start:start + step] @ normals.T - offsets
+        keep[start:start + step] = signed.max(axis=1) > -margin
+    keep[candidate_indices] = True
+    return points[keep]
+
+
+def get_cached_extreme_points(mesh, local_vertices):
+    """Получить экстремальные точки меша в локальных координатах из кэша"""
+    entry = _extreme_points_cache.get(mesh.as_pointer())
+    if entry and entry['count'] == len(local_vertices):
+        return entry['points']
+
+    extreme = compute_extreme_points(local_vertices)
+    logger.info("[EXTREME POINTS] %s: %s из %s вершин", mesh.name, len(extreme), len(local_vertices))
+    _extreme_points_cache[mesh.as_pointer()] = {'count': len(local_vertices), 'points': extreme}
+    return extreme
+
+
+def get_framing_points(obj, use_extreme_points=True):
+    """
+    Получить мировые точки для расчёта кадрирования и clipping planes.
+
+    Для мешей от EXTREME_POINTS_MIN_VERTICES вершин возвращаются только
+    экстремальные точки - результат min/max проекций совпадает с полным набором.
+    """
+    entry = get_cached_geometry(obj)
+    if not use_extreme_points or entry['count'] < EXTREME_POINTS_MIN_VERTICES:
+        return entry['world']
+
+    if 'extreme_world' not in entry:
+        local_extreme = get_cached_extreme_points(obj.data, entry['local'])
+        entry['extreme_world'] = transform_points(local_extreme, obj.matrix_world)
+    return entry['extreme_world']
+
+
+# ------------------------------------------------------------------------
+# ОТПЕЧАТКИ ГЕОМЕТРИИ ДЛЯ ИНКРЕМЕНТАЛЬНОГО ОБНОВЛЕНИЯ КАМЕР
+# ------------------------------------------------------------------------
+def get_framing_params(distance, auto_distance, auto_clipping, max_resolution):
+    """Параметры кадрирования в виде словаря для хранения в свойстве камеры"""
+    return {
+        'distance': float(distance),
+        'auto_distance': bool(auto_distance),
+        'auto_clipping': bool(auto_clipping),
+        'max_resolution': int(max_resolution),
+    }
+
+
+def get_mesh_hash(obj):
+    """Хеш локальных координат вершин меша (кэшируется вместе с геометрией объекта)"""
+    entry = get_cached_geometry(obj)
+    if 'hash' not in entry:
+        entry['hash'] = hashlib.blake2b(entry['local'].tobytes(), digest_size=16).hexdigest()
+    return entry['hash']
+
+
+def compute_geometry_fingerprint(obj, normal, center, params):
+    """
+    Рассчитать отпечаток исходных данных камеры.
+
+    Учитывает хеш и количество вершин меша, matrix_world объекта, нормаль и центр
+    фасада и параметры кадрирования: при их совпадении кадрирование не изменится.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(get_mesh_hash(obj).encode())
+    h.update(str(len(obj.data.vertices)).encode())
+    h.update(matrix_to_numpy(obj.matrix_world).tobytes())
+    # Округляем, чтобы погрешность вычислений не считалась изменением геометрии
+    h.update(np.round(np.asarray(normal, dtype=np.float64), 6).tobytes())
+    h.update(np.round(np.asarray(center, dtype=np.float64), 6).tobytes())
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()
+
+
+def validate_output_path(output_path, blend_filepath):
+    """
+    Валидировать путь вывода для предотвращения path traversal.
+
+    Args:
+        output_path: Путь для проверки
+        blend_filepath: Путь к .blend файлу
+
+    Returns:
+        str: Валидированный путь или None если невалиден
+    """
+    if not output_path or not blend_filepath:
+        return None
+
+    try:
+        # Получаем абсолютные пути
+        abs_output = os.path.abspath(bpy.path.abspath(output_path))
+        abs_blend_dir = os.path.abspath(os.path.dirname(blend_filepath))
+
+        # Получаем реальные пути без символических ссылок
+        real_output = os.path.realpath(abs_output)
+        real_blend = os.path.realpath(abs_blend_dir)
+
+        # Проверяем что output находится внутри проекта
+        # Разрешаем путь только если он находится в папке blend файла или её подпапках
+        if real_output.startswith(real_blend):
+            return abs_output
+        else:
+            logger.warning("[SECURITY] Путь %s находится за пределами проекта", output_path)
+            return None
+    except (OSError, ValueError) as e:
+        logger.error("[SECURITY] Ошибка валидации пути: %s", e)
+        return None
+
+
+def find_3d_viewport(context):
+    """
+    Найти первый 3D viewport и сохранить его настройки.
+
+    Returns:
+        tuple: (area, space_data, original_settings_dict) или (None, None, {})
+    """
+    if not context.screen:
+        return None, None, {}
+
+    for area in context.screen.areas:
+        if area.type == 'VIEW_3D':
+            space_data = area.spaces.active
+            original_settings = {
+                'view_persp': space_data.region_3d.view_perspective,
+                'show_overlays': space_data.overlay.show_overlays,
+                'shading_type': space_data.shading.type,
+                'shading_light': space_data.shading.light,
+                'shading_color': space_data.shading.color_type,
+                'wireframe_threshold': getattr(space_data.overlay, 'wireframe_threshold', None),
+                'show_wireframes': getattr(space_data.overlay, 'show_wireframes', None),
+            }
+            return area, space_data, original_settings
+    return None, None, {}
+
+
+def restore_3d_viewport(area, space_data, original_settings):
+    """Восстановить настройки 3D viewport"""
+    if not area or not space_data or not original_settings:
+        return
+
+    try:
+        if 'view_persp' in original_settings and original_settings['view_persp']:
+            space_data.region_3d.view_perspective = original_settings['view_persp']
+        if 'show_overlays' in original_settings:
+            space_data.overlay.show_overlays = original_settings['show_overlays']
+        if 'shading_type' in original_settings and original_settings['shading_type']:
+            space_data.shading.type = original_settings['shading_type']
+        if 'shading_light' in original_settings and original_settings['shading_light']:
+            space_data.shading.light = original_settings['shading_light']
+        if 'shading_color' in original_settings and original_settings['shading_color']:
+            space_data.shading.color_type = original_settings['shading_color']
+        if 'wireframe_threshold' in original_settings and original_settings['wireframe_threshold'] is not None:
+            if hasattr(space_data.overlay, 'wireframe_threshold'):
+                space_data.overlay.wireframe_threshold = original_settings['wireframe_threshold']
+        if 'show_wireframes' in original_settings and original_settings['show_wireframes'] is not None:
+            if hasattr(space_data.overlay, 'show_wireframes'):
+                space_data.overlay.show_wireframes = original_settings['show_wireframes']
+    except Exception as e:
+        logger.warning("Ошибка при восстановлении настроек viewport: %s", e)
+
+
+# ------------------------------------------------------------------------
+# КЭШ РЕНДЕРА: ПРОПУСК КАМЕР С НЕИЗМЕНЁННЫМИ ВХОДНЫМИ ДАННЫМИ
+# ------------------------------------------------------------------------
+def _hash_value(h, value):
+    """Добавить в хеш значение свойства Blender (массивы свойств - поэлементно)"""
+    if hasattr(value, '__len__') and not isinstance(value, str):
+        value = tuple(value)
+    h.update(repr(value).encode())
+
+
+def _hash_node_tree(h, node_tree):
+    """Добавить в хеш ноды: тип, значения несвязанных входов и текстуры с временем изменения файла"""
+    for node in node_tree.nodes:
+        h.update(node.bl_idname.encode())
+        for socket in node.inputs:
+            if not socket.is_linked and hasattr(socket, 'default_value'):
+                _hash_value(h, socket.default_value)
+        image = getattr(node, 'image', None)
+        if image:
+            image_path = bpy.path.abspath(image.filepath)
+            h.update(image_path.encode())
+            _hash_value(h, image.size)
+            if os.path.isfile(image_path):
+                _hash_value(h, os.path.getmtime(image_path))
+
+
+def _hash_foreach(h, collection, attribute, count, dtype):
+    """Добавить в хеш атрибут коллекции Blender, прочитанный через foreach_get"""
+    values = np.empty(count, dtype=dtype)
+    collection.foreach_get(attribute, values)
+    h.update(values.tobytes())
+
+
+def _get_active_color_attribute(mesh):
+    """Активный цветовой атрибут меша (color_attributes в Blender 3.2+, иначе vertex_colors)"""
+    color_attributes = getattr(mesh, 'color_attributes', None)
+    if color_attributes is not None:
+        return color_attributes.active_color
+    vertex_colors = getattr(mesh, 'vertex_colors', None)
+    return vertex_colors.active if vertex_colors is not None else None
+
+
+def compute_object_render_hash(obj, depsgraph):
+    """
+    Хеш всего, что влияет на вид объекта в кадре: вершины, рёбра (каркас) и полигоны
+    вычисленного меша с назначением материалов, matrix_world, материалы (значения входов нод,
+    текстуры и время изменения их файлов), активная UV-развёртка и активный цветовой атрибут.
+
+    Меш берётся после модификаторов (obj.evaluated_get), поэтому изменение настроек модификатора
+    или объектов, на которые он ссылается (операнд Boolean, кривая Array), меняет хеш.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(matrix_to_numpy(obj.matrix_world).tobytes())
+    # Движки сцены учитывают show_render, а вычисленный меш viewport - show_viewport
+    for modifier in obj.modifiers:
+        h.update(f"{modifier.type}:{modifier.show_viewport}:{modifier.show_render}".encode())
+
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    try:
+        _hash_foreach(h, mesh.vertices, 'co', len(mesh.vertices) * 3, np.float32)
+        _hash_foreach(h, mesh.edges, 'vertices', len(mesh.edges) * 2, np.int32)
+        # Топология полигонов и назначение материалов: удаление полигонов без вершин,
+        # заполнение дыры по существующим рёбрам и смена материала не меняют вершины и рёбра
+        _hash_foreach(h, mesh.polygons, 'loop_total', len(mesh.polygons), np.int32)
+        _hash_foreach(h, mesh.loops, 'vertex_index', len(mesh.loops), np.int32)
+        _hash_foreach(h, mesh.polygons, 'material_index', len(mesh.polygons), np.int32)
+
+        uv_layer = mesh.uv_layers.active
+        if uv_layer:
+            _hash_foreach(h, uv_layer.data, 'uv', len(uv_layer.data) * 2, np.float32)
+
+        # Цвет атрибута виден при shading.color_type == 'ATTRIBUTE' (он уже в ключе настроек)
+        color_attribute = _get_active_color_attribute(mesh)
+        if color_attribute:
+            h.update(f"{color_attribute.name}:{getattr(color_attribute, 'domain', 'CORNER')}".encode())
+            _hash_foreach(h, color_attribute.data, 'color', len(color_attribute.data) * 4, np.float32)
+    finally:
+        evaluated.to_mesh_clear()
+
+    for slot in obj.material_slots:
+        material = slot.material
+        if material is None:
+            h.update(b'-')
+            continue
+        h.update(material.name.encode())
+        _hash_value(h, material.diffuse_color)
+        if material.use_nodes and material.node_tree:
+            _hash_node_tree(h, material.node_tree)
+    return h.hexdigest()
+
+
+def compute_lighting_hash(scene, view_layer):
+    """
+    Хеш освещения сцены для движков EEVEE и Cycles: источники света, которые RenderIsolation
+    оставляет в кадре (видимые при рендере лампы слоя), и мир сцены.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    lights = sorted((obj for obj in view_layer.objects if obj.type == 'LIGHT' and not obj.hide_render),
+                    key=lambda obj: obj.name)
+    for obj in lights:
+        light = obj.data
+        h.update(f"{obj.name}:{light.type}".encode())
+        h.update(matrix_to_numpy(obj.matrix_world).tobytes())
+        for prop in LIGHT_HASH_PROPS:
+            if hasattr(light, prop):
+                _hash_value(h, getattr(light, prop))
+        if light.use_nodes and light.node_tree:
+            _hash_node_tree(h, light.node_tree)
+
+    world = scene.world
+    if world is None:
+        h.update(b'-')
+    else:
+        h.update(world.name.encode())
+        _hash_value(h, world.color)
+        if world.use_nodes and world.node_tree:
+            _hash_node_tree(h, world.node_tree)
+    return h.hexdigest()
+
+
+def _get_scene_setting(scene, path):
+    """Значение свойства сцены по пути через точку (None, если свойства нет в этой версии Blender)"""
+    value = scene
+    for name in path.split('.'):
+        value = getattr(value, name, None)
+        if value is None:
+            return None
+    return tuple(value) if hasattr(value, '__len__') and not isinstance(value, str) else value
+
+
+def get_render_settings_key(scene, view_layer, settings, backend):
+    """
+    Строка настроек сессии, влияющих на кадр: бэкенд и движок сцены, настройки качества бэкенда
+    (выборки, шумоподавление, сглаживание), формат файла, масштаб разрешения, преобразование цвета,
+    освещение и прозрачность. Кадры разных бэкендов не подменяют друг друга в кэше рендера.
+    Для бэкендов со светом сцены (EEVEE, Cycles) добавляется хеш ламп и мира.
+    """
+    shading = scene.display.shading
+    view = scene.view_settings
+    return repr((
+        RENDER_FINGERPRINT_VERSION,
+        backend.key, scene.render.engine,
+        tuple((path, _get_scene_setting(scene, path)) for path in backend.quality_settings),
+        compute_lighting_hash(scene, view_layer) if backend.scene_lighting else None,
+        settings.output_format, settings.output_color_mode, settings.output_compression, settings.output_quality,
+        scene.render.resolution_percentage, scene.render.film_transparent,
+        view.view_transform, view.look, view.exposure, view.gamma,
+        shading.light, shading.color_type, tuple(shading.single_color),
+        shading.show_cavity, shading.show_shadows, shading.show_xray,
+    ))
+
+
+def compute_render_fingerprint(cam, object_hash, settings_key):
+    """
+    Отпечаток входных данных рендера камеры: матрица и параметры камеры, разрешение,
+    хеш объекта фасада и настройки сессии. Совпадение отпечатков - кадр не изменится.
+    """
+    cam_data = cam.data
+    h = hashlib.blake2b(digest_size=16)
+    h.update(matrix_to_numpy(cam.matrix_world).tobytes())
+    _hash_value(h, (cam_data.type, cam_data.ortho_scale, cam_data.lens, cam_data.sensor_fit,
+                    cam_data.clip_start, cam_data.clip_end, cam_data.shift_x, cam_data.shift_y))
+    _hash_value(h, (cam.get(CAM_RES_X_PROP, 1920), cam.get(CAM_RES_Y_PROP, 1080)))
+    h.update(object_hash.encode())
+    h.update(settings_key.encode())
+    return h.hexdigest()
+
+
+def link_or_copy(source, destination):
+    """Жёсткая ссылка на файл (копия, если файловая система не поддерживает ссылки)"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+@contextlib.contextmanager
+def file_lock(path, timeout=FILE_LOCK_TIMEOUT):
+    """
+    Межпроцессная блокировка файла через файл-замок path + ".lock" (O_CREAT | O_EXCL).
+
+    Замок старше FILE_LOCK_STALE секунд считается оставленным упавшим процессом и удаляется.
+    Если замок не получен за timeout секунд - TimeoutError.
+    """
+    lock_path = f"{path}.lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > FILE_LOCK_STALE:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue  # Замок уже снят другим процессом
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Не удалось получить блокировку {lock_path}")
+            time.sleep(0.05)
+    try:
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+class RenderCache:
+    """
+    Кэш рендера одной папки: камера -> отпечаток входных данных и файл последнего рендера.
+
+    Хранится в папке рендеров (RENDER_CACHE_NAME). Сохранение под межпроцессной блокировкой
+    перечитывает манифест и обновляет только записи этой сессии, а временный файл у каждого
+    процесса свой, поэтому воркеры фермы с общей папкой не затирают записи друг друга.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.path = os.path.join(base_dir, RENDER_CACHE_NAME)
+        self.entries = self._load()
+        self.updated = {}
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                cameras = json.load(f).get('cameras')
+        except (OSError, ValueError, AttributeError):
+            return {}
+        return cameras if isinstance(cameras, dict) else {}
+
+    def lookup(self, cam_name, fingerprint):
+        """Путь к файлу прошлого рендера камеры с тем же отпечатком (None, если его нет)"""
+        entry = self.entries.get(cam_name)
+        if not isinstance(entry, dict) or entry.get('fingerprint') != fingerprint:
+            return None
+        filepath = os.path.join(self.base_dir, entry.get('file', ''))
+        return filepath if os.path.isfile(filepath) else None
+
+    def store(self, cam_name, fingerprint, filepath):
+        """Запомнить отпечаток и файл успешного рендера камеры"""
+        entry = {'fingerprint': fingerprint, 'file': os.path.basename(filepath)}
+        self.entries[cam_name] = entry
+        self.updated[cam_name] = entry
+
+    def save(self):
+        """
+        Записать манифест кэша, если в сессии были новые рендеры.
+
+        Returns:
+            bool: True, если манифест записан (или записывать нечего)
+        """
+        if not self.updated:
+            return True
+        temp_path = None
+        try:
+            with file_lock(self.path):
+                entries = self._load()
+                entries.update(self.updated)
+                fd, temp_path = tempfile.mkstemp(prefix=RENDER_CACHE_NAME, suffix=".tmp", dir=self.base_dir)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'cameras': entries}, f, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+                temp_path = None
+            self.entries = entries
+            self.updated = {}
+            return True
+        except OSError as e:
+            logger.warning("[CACHE] Не удалось сохранить кэш рендера %s: %s", self.path, e)
+            return False
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+# ------------------------------------------------------------------------
+# ФОРМАТ ВЫХОДНЫХ ФАЙЛОВ
+# ------------------------------------------------------------------------
+def get_output_extension(settings):
+    """Расширение файлов рендера для формата из настроек аддона"""
+    return OUTPUT_FORMAT_EXTENSIONS[settings.output_format]
+
+
+def get_output_channels(settings):
+    """Число каналов в файле рендера (JPEG не хранит прозрачность)"""
+    if settings.output_color_mode == 'RGBA' and settings.output_format == 'JPEG':
+        return OUTPUT_COLOR_CHANNELS['RGB']
+    return OUTPUT_COLOR_CHANNELS[settings.output_color_mode]
+
+
+def apply_output_format(image_settings, settings):
+    """
+    Настроить формат файлов рендера сцены по настройкам аддона.
+
+    Returns:
+        str: Расширение файлов рендера
+    """
+    image_settings.file_format = settings.output_format
+    image_settings.color_mode = next(mode for mode, channels in OUTPUT_COLOR_CHANNELS.items()
+                                     if channels == get_output_channels(settings))
+    image_settings.color_depth = '8'
+    if settings.output_format == 'PNG':
+        image_settings.compression = settings.output_compression
+    elif settings.output_format == 'TIFF':
+        image_settings.tiff_codec = 'LZW'
+    else:
+        image_settings.quality = settings.output_quality
+    return get_output_extension(settings)
+
+
+def save_image_settings(image_settings):
+    """Сохранить настройки формата файла сцены для восстановления после рендера"""
+    return {prop: getattr(image_settings, prop) for prop in IMAGE_SETTINGS_PROPS if hasattr(image_settings, prop)}
+
+
+def restore_image_settings(image_settings, state):
+    """Восстановить настройки формата файла (формат - первым: от него зависят допустимые режимы цвета)"""
+    for prop, value in state.items():
+        try:
+            setattr(image_settings, prop, value)
+        except (TypeError, ValueError) as e:
+            logger.warning("Не удалось восстановить %s = %s: %s", prop, value, e)
+
+
+# ------------------------------------------------------------------------
+# ФОНОВАЯ ЗАПИСЬ ИЗОБРАЖЕНИЙ
+# ------------------------------------------------------------------------
+def _png_chunk(chunk_type, data):
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def _png_header(width, height, channels):
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+    return PNG_SIGNATURE + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+
+
+def _png_filter_up(rows, previous_row=None):
+    """Строки PNG с фильтром Up (разность с предыдущей строкой, по модулю 256)"""
+    filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 0] = 2  # Фильтр Up
+    if previous_row is None:
+        filtered[0, 1:] = rows[0]
+    else:
+        np.subtract(rows[0], previous_row, out=filtered[0, 1:])
+    np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+    return filtered
+
+
+class StreamingPNGWriter:
+    """
+    Потоковая запись PNG: строки фильтруются, сжимаются и пишутся на диск по мере поступления,
+    поэтому изображение целиком в памяти не хранится.
+
+    Файл пишется под временным именем и появляется под итоговым только после close(commit=True).
+    """
+
+    def __init__(self, filepath, width, height, channels=4, level=6):
+        self.filepath = filepath
+        self.temp_path = f"{filepath}.part"
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        self.previous_row = None
+        self.compressor = zlib.compressobj(level)
+        self.pending = bytearray()
+        self.file = open(self.temp_path, 'wb')
+        self.file.write(_png_header(width, height, channels))
+
+    def write_rows(self, rows):
+        """Дописать строки изображения (строки × ширина × каналы, uint8, сверху вниз)"""
+        rows = rows.reshape(rows.shape[0], self.width * self.channels)
+        self.pending += self.compressor.compress(_png_filter_up(rows, self.previous_row))
+        self.previous_row = rows[-1].copy()
+        self.rows_written += rows.shape[0]
+        if len(self.pending) >= PNG_IDAT_CHUNK_SIZE:
+            self._write_idat()
+
+    def close(self, commit=True):
+        """Завершить файл; при commit=False или неполном изображении временный файл удаляется"""
+        try:
+            if commit and self.rows_written == self.height:
+                self.pending += self.compressor.flush()
+                self._write_idat()
+                self.file.write(_png_chunk(b"IEND", b""))
+                self.file.close()
+                os.replace(self.temp_path, self.filepath)
+                return True
+            return False
+        finally:
+            self.file.close()
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+    def _write_idat(self):
+        if self.pending:
+            self.file.write(_png_chunk(b"IDAT", bytes(self.pending)))
+            self.pending.clear()
+
+
+def iter_png_rows(filepath):
+    """
+    Читать 8-битный PNG построчно без загрузки в bpy.data.
+
+    Первым значением выдаётся (ширина, высота, каналы), затем строки uint8 (ширина × каналы)
+    сверху вниз. Данные распаковываются по мере чтения, изображение целиком в памяти не хранится.
+    Поддерживаются фильтры None, Sub и Up (их пишут Blender и StreamingPNGWriter); для остальных
+    фильтров, палитры, 16 бит и чересстрочных PNG - ValueError.
+    """
+    with open(filepath, 'rb') as f:
+        if f.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+            raise ValueError("файл не PNG")
+        length, chunk_type = struct.unpack(">I4s", f.read(8))
+        if chunk_type != b"IHDR":
+            raise ValueError("нет заголовка IHDR")
+        width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", f.read(length))
+        f.read(4)  # CRC
+        channels = {0: 1, 4: 2, 2: 3, 6: 4}.get(color_type)
+        if depth != 8 or channels is None or interlace:
+            raise ValueError(f"неподдерживаемый PNG (глубина {depth}, тип цвета {color_type}, interlace {interlace})")
+        yield width, height, channels
+
+        stride = width * channels + 1
+        decompressor = zlib.decompressobj()
+        buffer = bytearray()
+        previous = np.zeros(width * channels, dtype=np.uint8)
+        rows_read = 0
+        while rows_read < height:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("PNG обрывается до конца изображения")
+            length, chunk_type = struct.unpack(">I4s", header)
+            data = f.read(length)
+            f.read(4)  # CRC
+            if chunk_type == b"IEND":
+                raise ValueError("PNG обрывается до конца изображения")
+            if chunk_type != b"IDAT":
+                continue
+            buffer += decompressor.decompress(data)
+            # Строки читаются по смещению, буфер укорачивается один раз на блок IDAT
+            # (удаление каждой строки из начала буфера квадратично по размеру блока)
+            offset = 0
+            while len(buffer) - offset >= stride and rows_read < height:
+                filter_type = buffer[offset]
+                row = np.frombuffer(buffer, dtype=np.uint8, count=stride - 1, offset=offset + 1).copy()
+                offset += stride
+                if filter_type == 1:    # Sub: накопленная сумма по пикселям строки, по модулю 256
+                    row = np.cumsum(row.reshape(width, channels), axis=0, dtype=np.uint8).ravel()
+                elif filter_type == 2:  # Up
+                    row = row + previous
+                elif filter_type != 0:
+                    raise ValueError(f"неподдерживаемый фильтр строк PNG: {filter_type}")
+                previous = row
+                rows_read += 1
+                yield row.reshape(width, channels)
+            del buffer[:offset]
+
+
+def read_png_pixels(filepath):
+    """
+    Прочитать 8-битный PNG целиком (см. iter_png_rows).
+
+    Returns:
+        np.ndarray: Пиксели uint8 (высота × ширина × каналы, строки сверху вниз)
+    """
+    rows = iter_png_rows(filepath)
+    width, height, channels = next(rows)
+    pixels = np.empty((height, width, channels), dtype=np.uint8)
+    for index, row in enumerate(rows):
+        pixels[index] = row
+    return pixels
+
+
+# ------------------------------------------------------------------------
+# МЕТОДЫ РЕНДЕРА OPENGL: ПРОВЕРКА ОДИН РАЗ ЗА СЕАНС
+# ------------------------------------------------------------------------
+_render_method_cache = {}  # 'VIEW_3D' / 'NO_VIEW' -> рабочий метод рендера в этом сеансе Blender
+
+
+def _render_method_opengl(context, view3d_area, cam):
+    """Метод 1: OpenGL рендер по настройкам сцены в Render Result"""
+    bpy.ops.render.opengl(write_still=False)
+
+
+def _render_method_view_context(context, view3d_area, cam):
+    """Метод 2: OpenGL рендер из 3D viewport в Render Result"""
+    if not view3d_area:
+        raise RuntimeError("3D viewport не найден")
+
+    # Находим 3D viewport region
+    for region in view3d_area.regions:
+        if region.type == 'WINDOW':
+            # Устанавливаем контекст для области
+            override = {
+                'area': view3d_area,
+                'region': region,
+                'scene': context.scene,
+                'camera': cam
+            }
+            with context.temp_override(**override):
+                bpy.ops.render.opengl(write_still=False, view_context=True)
+            return
+    raise RuntimeError("Область WINDOW в 3D viewport не найдена")
+
+
+def _render_method_engine(context, view3d_area, cam):
+    """Метод 3: рендер движком сцены (Workbench, EEVEE, Cycles) в Render Result"""
+    bpy.ops.render.render(write_still=False)
+
+
+# Все методы рендерят в память, файл пишет save_validated_render()
+RENDER_METHODS = {
+    'OPENGL': _render_method_opengl,
+    'OPENGL_VIEW': _render_method_view_context,
+    'RENDER': _render_method_engine,
+}
+VIEWPORT_RENDER_METHODS = ('OPENGL', 'OPENGL_VIEW')  # Методы viewport в порядке предпочтения
+
+
+# ------------------------------------------------------------------------
+# БЭКЕНДЫ РЕНДЕРА
+# ------------------------------------------------------------------------
+class RenderBackend:
+    """
+    Бэкенд рендера: движок сцены и методы получения кадра.
+
+    Все бэкенды проходят через одну сессию (CameraRenderSession), поэтому изоляция,
+    пакеты по объектам, кэш рендера, фоновая запись, тайлы и замеры времени у них общие.
+    Бэкенд viewport (engines=None) выбирает рабочий метод тестовым рендером и настраивает
+    затенение 3D viewport; бэкенды движков переключают scene.render.engine на время сессии.
+    """
+
+    def __init__(self, key, label, engines=None, methods=VIEWPORT_RENDER_METHODS, direction_suffix="",
+                 quality_settings=(), scene_lighting=False):
+        self.key = key
+        self.label = label
+        self.engines = engines                    # Идентификаторы движка Blender в порядке предпочтения
+        self.methods = methods                    # Ключи RENDER_METHODS в порядке предпочтения
+        self.direction_suffix = direction_suffix  # Суффикс направления в имени файла
+        self.quality_settings = quality_settings  # Пути свойств сцены, от которых зависит кадр (кэш рендера)
+        self.scene_lighting = scene_lighting      # Кадр освещают лампы и мир сцены (кэш рендера)
+        self.viewport = engines is None
+
+    def resolve_engine(self):
+        """Идентификатор движка Blender (None - бэкенд не меняет движок сцены)"""
+        if self.engines is None:
+            return None
+        available = {item.identifier for item in bpy.types.RenderSettings.bl_rna.properties['engine'].enum_items}
+        for identifier in self.engines:
+            if identifier in available:
+                return identifier
+        raise ValueError(f"Движок {self.label} недоступен в этой версии Blender")
+
+
+RENDER_BACKENDS = {}
+
+
+def register_render_backend(backend):
+    """Зарегистрировать бэкенд рендера (ключ доступен операторам, пакетному режиму и ферме)"""
+    RENDER_BACKENDS[backend.key] = backend
+    return backend
+
+
+register_render_backend(RenderBackend('OPENGL', "OpenGL", quality_settings=('display.render_aa',)))
+# Кадры движков получают суффикс «-V» в направлении, как раньше в Vulkan-режиме
+register_render_backend(RenderBackend(
+    'WORKBENCH', "Workbench", engines=('BLENDER_WORKBENCH',), methods=('RENDER',), direction_suffix="-V",
+    quality_settings=('display.render_aa', 'display.shading.show_object_outline',
+                      'display.shading.show_specular_highlight', 'display.shading.use_dof')))
+register_render_backend(RenderBackend(
+    'EEVEE', "EEVEE", engines=('BLENDER_EEVEE_NEXT', 'BLENDER_EEVEE'), methods=('RENDER',), direction_suffix="-V",
+    quality_settings=('eevee.taa_render_samples', 'eevee.use_raytracing', 'eevee.use_shadows',
+                      'eevee.use_gtao', 'eevee.use_ssr', 'eevee.use_soft_shadows', 'eevee.use_bloom'),
+    scene_lighting=True))
+register_render_backend(RenderBackend(
+    'CYCLES', "Cycles", engines=('CYCLES',), methods=('RENDER',), direction_suffix="-V",
+    quality_settings=('cycles.samples', 'cycles.use_adaptive_sampling', 'cycles.adaptive_threshold',
+                      'cycles.use_denoising', 'cycles.denoiser', 'cycles.max_bounces'),
+    scene_lighting=True))
+
+RENDER_BACKEND_ITEMS = [
+    ('OPENGL', "OpenGL (viewport)", "Быстрый рендер viewport с плоским затенением"),
+    ('WORKBENCH', "Workbench", "Рендер движком Workbench (совместим с Vulkan и старыми GPU)"),
+    ('EEVEE', "EEVEE", "Финальный рендер EEVEE"),
+    ('CYCLES', "Cycles", "Финальный рендер Cycles"),
+]
+
+
+# ------------------------------------------------------------------------
+# ПРОФИЛИ WORKBENCH
+# ------------------------------------------------------------------------
+# Настройки scene.display (путь через точку), которые профиль задаёт на время сессии рендера.
+# Черновик отключает всё, что не нужно техническому чертежу фасада; финальный - качество.
+WORKBENCH_PROFILES = {
+    'DRAFT': {
+        'render_aa': 'FXAA',
+        'shading.light': 'FLAT',
+        'shading.show_shadows': False,
+        'shading.show_cavity': False,
+        'shading.use_dof': False,
+        'shading.show_object_outline': False,
+        'shading.show_specular_highlight': False,
+        'shading.show_xray': False,
+    },
+    'FINAL': {
+        'render_aa': '16',
+        'shading.light': 'STUDIO',
+        'shading.show_shadows': False,
+        'shading.show_cavity': True,
+        'shading.use_dof': False,
+        'shading.show_object_outline': True,
+        'shading.show_specular_highlight': True,
+        'shading.show_xray': False,
+    },
+}
+
+WORKBENCH_PROFILE_ITEMS = [
+    ('DRAFT', "Черновик", "Минимальная стоимость: FXAA, плоский свет, без теней, cavity, DOF и обводки"),
+    ('FINAL', "Финальный", "Качество: 16 выборок сглаживания, студийный свет, cavity и обводка"),
+    ('SCENE', "Настройки сцены", "Рендерить с текущими настройками Workbench сцены"),
+]
+
+
+def _resolve_display_setting(display, path):
+    """Владелец и имя свойства по пути через точку от scene.display"""
+    *parents, name = path.split('.')
+    owner = display
+    for parent in parents:
+        owner = getattr(owner, parent)
+    return owner, name
+
+
+def apply_workbench_profile(display, profile):
+    """
+    Применить профиль Workbench к scene.display.
+
+    Returns:
+        dict: Исходные значения изменённых свойств для restore_workbench_profile()
+    """
+    saved = {}
+    for path, value in WORKBENCH_PROFILES[profile].items():
+        try:
+            owner, name = _resolve_display_setting(display, path)
+            saved[path] = getattr(owner, name)
+            setattr(owner, name, value)
+        except (AttributeError, TypeError) as e:
+            logger.warning("[WORKBENCH] Не удалось установить %s = %s: %s", path, value, e)
+    return saved
+
+
+def restore_workbench_profile(display, saved):
+    """Вернуть настройки scene.display, изменённые apply_workbench_profile()"""
+    for path, value in saved.items():
+        try:
+            owner, name = _resolve_display_setting(display, path)
+            setattr(owner, name, value)
+        except (AttributeError, TypeError) as e:
+            logger.warning("[WORKBENCH] Не удалось восстановить %s: %s", path, e)
+
+
+def get_output_size(scene):
+    """Фактический размер кадра с учётом процента разрешения"""
+    render = scene.render
+    percentage = render.resolution_percentage
+    return render.resolution_x * percentage // 100, render.resolution_y * percentage // 100
+
+
+def _check_frame_content(pixels, channels):
+    """Причина брака содержимого кадра (пиксели - массив с последней осью каналов) или None"""
+    pixels = pixels.reshape(-1, channels)
+    if channels == 4 and not pixels[:, 3].any():
+        return "кадр полностью прозрачный"
+    if (pixels == pixels[0]).all():
+        return "кадр пустой (один цвет)"
+    return None
+
+
+def validate_render_pixels(pixels, width, height, channels=4):
+    """
+    Проверить пиксели кадра: размер, не пустой (один цвет на весь кадр) и не полностью прозрачный.
+
+    Сначала проверяется выборка строк с шагом: у годного кадра она почти всегда разнородная,
+    и весь кадр просматривается, только если выборка однотонная или прозрачная.
+
+    Returns:
+        str: Причина брака или None, если кадр годный
+    """
+    pixels = np.asarray(pixels)
+    if pixels.size != width * height * channels:
+        return f"размер буфера {pixels.size} не соответствует кадру {width}×{height}×{channels}"
+    frame = pixels.reshape(height, width, channels)
+    step = max(1, height // VALIDATION_SAMPLE_ROWS)
+    if step > 1 and _check_frame_content(frame[::step], channels) is None:
+        return None
+    return _check_frame_content(frame, channels)
+
+
+def validate_png_file(filepath, width, height, check_content=True):
+    """
+    Проверить сохранённый 8-битный PNG, читая его построчно (см. iter_png_rows).
+
+    Чтение останавливается, как только найдены разные пиксели и непрозрачный пиксель,
+    поэтому у годного кадра обычно распаковывается только начало файла.
+
+    Returns:
+        str: Причина брака или None, если кадр годный
+    """
+    rows = iter_png_rows(filepath)
+    saved_width, saved_height, channels = next(rows)
+    if (saved_width, saved_height) != (width, height):
+        return f"сохранён кадр {saved_width}×{saved_height} вместо {width}×{height}"
+    if not check_content:
+        return None
+
+    first = None
+    varied = False
+    opaque = channels != 4
+    for row in rows:
+        if first is None:
+            first = row[0].copy()
+        if not opaque and row[:, 3].any():
+            opaque = True
+        if not varied and (row != first).any():
+            varied = True
+        if varied and opaque:
+            return None
+    if not opaque:
+        return "кадр полностью прозрачный"
+    return None if varied else "кадр пустой (один цвет)"
+
+
+def read_image_pixels(image):
+    """Пиксели изображения Blender в массив NumPy (None, если Blender их не отдаёт, как у Render Result)"""
+    count = len(image.pixels)
+    if count == 0:
+        return None
+    pixels = np.empty(count, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels
+
+
+def load_image_pixels(filepath):
+    """
+    Загрузить изображение с диска и вернуть его пиксели.
+
+    Returns:
+        tuple: (pixels или None, ширина, высота, каналы)
+    """
+    image = bpy.data.images.load(filepath, check_existing=False)
+    try:
+        width, height = image.size
+        return read_image_pixels(image), width, height, image.channels
+    finally:
+        bpy.data.images.remove(image)
+
+
+def read_saved_frame(filepath):
+    """
+    Прочитать сохранённый кадр в 8-битные пиксели.
+
+    PNG декодируется напрямую (read_png_pixels); другие форматы и неподдерживаемые PNG
+    загружаются через bpy.data.images.
+
+    Returns:
+        np.ndarray: Пиксели uint8 (высота × ширина × каналы, строки сверху вниз) или None
+    """
+    try:
+        return read_png_pixels(filepath)
+    except ValueError as e:
+        logger.debug("Кадр %s читается через Blender: %s", filepath, e)
+    pixels, width, height, channels = load_image_pixels(filepath)
+    if pixels is None:
+        return None
+    # Blender хранит строки снизу вверх
+    return np.rint(pixels.reshape(height, width, channels)[::-1] * 255).astype(np.uint8)
+
+
+def save_validated_render(filepath, width, height, check_content=True):
+    """
+    Сохранить Render Result в filepath, только если кадр прошёл проверку.
+
+    Если пиксели Render Result доступны, они проверяются в памяти до записи. Иначе кадр
+    сохраняется во временный файл рядом, проверяется и переименовывается в filepath,
+    поэтому бракованный кадр никогда не появляется под итоговым именем.
+
+    Returns:
+        str: Причина брака или None, если файл сохранён
+    """
+    image = bpy.data.images.get('Render Result')
+    if not image:
+        return "Render Result не найден"
+
+    pixels = read_image_pixels(image)
+    if pixels is not None:
+        error = validate_render_pixels(pixels, width, height, image.channels) if check_content else None
+        if error is None:
+            image.save_render(filepath)
+        return error
+
+    root, ext = os.path.splitext(filepath)
+    temp_path = f"{root}.tmp{ext}"
+    try:
+        image.save_render(temp_path)
+        # Проверяется сам сохранённый файл, который затем переименовывается в filepath
+        try:
+            error = validate_png_file(temp_path, width, height, check_content)
+        except ValueError as e:
+            logger.debug("Кадр %s проверяется через Blender: %s", temp_path, e)
+            error = _validate_loaded_image(temp_path, width, height, check_content)
+        if error:
+            return error
+        os.replace(temp_path, filepath)
+        return None
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _validate_loaded_image(filepath, width, height, check_content):
+    """Проверить сохранённый кадр, загрузив его через bpy.data.images (форматы, кроме 8-битного PNG)"""
+    pixels, saved_width, saved_height, channels = load_image_pixels(filepath)
+    if pixels is None or (saved_width, saved_height) != (width, height):
+        return f"сохранён кадр {saved_width}×{saved_height} вместо {width}×{height}"
+    if check_content:
+        return validate_render_pixels(pixels, width, height, channels)
+    return None
+
+
+def try_render_method(method, context, view3d_area, cam, filepath, check_content=True, timings=None):
+    """Отрендерить камеру указанным методом и сохранить кадр, если он прошёл проверку"""
+    phase = timings.phase if timings else _no_phase
+    try:
+        logger.debug("Метод рендера %s", method)
+        with phase('render'):
+            RENDER_METHODS[method](context, view3d_area, cam)
+        width, height = get_output_size(context.scene)
+        with phase('save'):
+            error = save_validated_render(filepath, width, height, check_content)
+    except Exception as e:
+        logger.debug("Метод %s неудачен: %s", method, e)
+        return False
+    if error:
+        logger.debug("Метод %s: брак кадра - %s", method, error)
+        return False
+    return True
+
+
+def _render_method_key(view3d_area):
+    # Метод 2 доступен только при наличии 3D viewport
+    return 'VIEW_3D' if view3d_area else 'NO_VIEW'
+
+
+def remember_render_method(view3d_area, method):
+    """Запомнить рабочий метод рендера до конца сеанса Blender"""
+    _render_method_cache[_render_method_key(view3d_area)] = method
+
+
+def probe_render_method(context, view3d_area, cam, methods=VIEWPORT_RENDER_METHODS):
+    """
+    Определить рабочий метод рендера viewport тестовым рендером маленького кадра.
+
+    Результат кэшируется до конца сеанса Blender, повторная проверка не выполняется.
+
+    Returns:
+        str: Ключ RENDER_METHODS или None, если ни один метод не сработал
+    """
+    key = _render_method_key(view3d_area)
+    if key in _render_method_cache:
+        return _render_method_cache[key]
+
+    scene = context.scene
+    render = scene.render
+    saved = (scene.camera, render.resolution_x, render.resolution_y, render.resolution_percentage, render.filepath)
+    probe_path = os.path.join(bpy.app.tempdir or tempfile.gettempdir(), "sde_render_probe" + render.file_extension)
+    try:
+        scene.camera = cam
+        render.resolution_x = render.resolution_y = RENDER_PROBE_SIZE
+        render.resolution_percentage = 100
+        render.filepath = probe_path
+
+        for method in methods:
+            if os.path.exists(probe_path):
+                os.remove(probe_path)
+            # Проверяется только работоспособность метода, содержимое тестового кадра не важно
+            if try_render_method(method, context, view3d_area, cam, probe_path, check_content=False):
+                remember_render_method(view3d_area, method)
+                logger.info("[RENDER] Рабочий метод рендера: %s", method)
+                return method
+
+        logger.warning("[RENDER] Тестовый рендер не удался ни одним методом, для каждой камеры будут пробоваться все")
+        return None
+    finally:
+        scene.camera, render.resolution_x, render.resolution_y, render.resolution_percentage, render.filepath = saved
+        try:
+            if os.path.exists(probe_path):
+                os.remove(probe_path)
+        except OSError:
+            pass
+
+
+# ------------------------------------------------------------------------
+# ТАЙЛОВЫЙ РЕНДЕР БОЛЬШИХ ОРТОГРАФИЧЕСКИХ ФАСАДОВ
+# ------------------------------------------------------------------------
+def needs_tiled_render(settings, cam, width, height):
+    """Рендерить ли камеру тайлами: ортографическая камера, PNG и кадр больше размера тайла"""
+    return (settings.use_tiled_render and settings.output_format == 'PNG'
+            and cam.data.type == 'ORTHO' and max(width, height) > settings.tile_size)
+
+
+def get_tile_grid(width, height, tile_size):
+    """
+    Разбить кадр на сетку тайлов не больше tile_size (тайлы почти равные, без узких краёв).
+
+    Returns:
+        list: Полосы [(y0, y1, [(x0, x1), ...])], y считается сверху вниз
+    """
+    columns = math.ceil(width / tile_size)
+    rows = math.ceil(height / tile_size)
+    xs = [width * i // columns for i in range(columns + 1)]
+    ys = [height * i // rows for i in range(rows + 1)]
+    return [(ys[r], ys[r + 1], [(xs[c], xs[c + 1]) for c in range(columns)]) for r in range(rows)]
+
+
+def get_ortho_pixel_size(cam_data, width, height):
+    """Размер пикселя кадра в мировых единицах для ортографической камеры"""
+    if cam_data.sensor_fit == 'HORIZONTAL':
+        span = width
+    elif cam_data.sensor_fit == 'VERTICAL':
+        span = height
+    else:
+        span = max(width, height)
+    return cam_data.ortho_scale / span
 
-        # Вычисляем расстояния от камеры до всех вершин вдоль направления камеры
-        distances = []
-        for vertex in world_vertices:
-            # Вектор от камеры к вершине
-            to_vertex = vertex - camera_location
-            # Проекция на направление камеры (отрицательное значение = позади камеры)
-            distance = to_vertex.dot(camera_dir_normalized)
-            distances.append(distance)
 
-        if not distances:
-            return DEFAULT_CLIPPING_START, DEFAULT_CLIPPING_END
+def render_tile_pixels(method, context, view3d_area, cam, temp_path):
+    """
+    Отрендерить тайл указанным методом и вернуть его пиксели.
 
-        min_distance = min(distances)
-        max_distance = max(distances)
+    Returns:
+        np.ndarray: Пиксели тайла uint8 (высота × ширина × каналы, строки сверху вниз)
+    """
+    RENDER_METHODS[method](context, view3d_area, cam)
+    image = bpy.data.images.get('Render Result')
+    if not image:
+        raise RuntimeError("Render Result не найден")
+    image.save_render(temp_path)
+    try:
+        pixels = read_saved_frame(temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if pixels is None:
+        raise RuntimeError("пиксели тайла недоступны")
+    return pixels
 
-        # Рассчитываем более точные clipping planes на основе габаритов меша
-        
-        # Clip start: минимальное расстояние минус небольшой буфер (но не меньше 0.001)
-        if min_distance > 0:
-            # Если объект перед камерой
-            clip_start = max(0.001, min_distance * 0.9 - 1.0)
-        else:
-            # Если объект позади камеры или пересекает плоскость камеры
-            clip_start = 0.001
-        
-        # Clip end: максимальное расстояние с разумным буфером
-        if max_distance > 0:
-            # Добавляем буфер 20% от максимального расстояния, но минимум 2 метра
-            buffer = max(2.0, abs(max_distance) * 0.2)
-            clip_end = max_distance + buffer
-        else:
-            # Если весь объект позади камеры - устанавливаем разумное значение
-            clip_end = max(10.0, abs(min_distance) + 5.0)
 
-        # Проверяем минимальный диапазон между start и end
-        if clip_end - clip_start < MIN_CLIPPING_RANGE:
-            clip_end = clip_start + 10.0  # Минимальный диапазон 10 метров вместо 1000
+def render_tiled(context, view3d_area, cam, filepath, methods, tile_size, channels=4, level=6):
+    """
+    Отрендерить ортографическую камеру сеткой тайлов и сшить их в один PNG.
 
-        return clip_start, clip_end
+    Каждый тайл - тот же кадр с уменьшенным ortho_scale и сдвигом shift_x/shift_y, поэтому
+    пиксели тайлов совпадают с сеткой полного кадра. В памяти хранится только одна полоса
+    тайлов, полосы сразу дописываются в файл (StreamingPNGWriter).
 
-    except (AttributeError, ValueError, TypeError) as e:
-        print(f"Ошибка при расчёте clipping planes: {e}")
-        return DEFAULT_CLIPPING_START, DEFAULT_CLIPPING_END
-    except Exception as e:
-        print(f"Неожиданная ошибка при расчёте clipping planes: {e}")
-        return DEFAULT_CLIPPING_START, DEFAULT_CLIPPING_END
+    Returns:
+        tuple: (метод рендера, None) при успехе или (None, причина брака)
+    """
+    scene = context.scene
+    render = scene.render
+    cam_data = cam.data
+    width, height = get_output_size(scene)
+    pixel_size = get_ortho_pixel_size(cam_data, width, height)
+    # Смещение центра кадра в мировых единицах (shift задаётся в долях ortho_scale)
+    base_x = cam_data.shift_x * cam_data.ortho_scale
+    base_y = cam_data.shift_y * cam_data.ortho_scale
+
+    saved_render = (render.resolution_x, render.resolution_y, render.resolution_percentage,
+                    render.image_settings.compression)
+    saved_camera = (cam_data.ortho_scale, cam_data.shift_x, cam_data.shift_y, cam_data.sensor_fit)
+    temp_path = os.path.splitext(filepath)[0] + ".tile.png"
+    writer = None
+    committed = False
+    method_used = None
+    first_pixel = None
+    varied = False
+    has_alpha = False
+    try:
+        render.resolution_percentage = 100
+        render.image_settings.compression = 0  # Промежуточные тайлы - без сжатия
+        cam_data.sensor_fit = 'AUTO'
+
+        grid = get_tile_grid(width, height, tile_size)
+        logger.info("[TILES] %s: %s×%s, тайлов %s", cam.name, width, height, len(grid) * len(grid[0][2]))
+        for y0, y1, columns in grid:
+            band = None
+            for x0, x1 in columns:
+                tile_width, tile_height = x1 - x0, y1 - y0
+                tile_scale = pixel_size * max(tile_width, tile_height)
+                render.resolution_x = tile_width
+                render.resolution_y = tile_height
+                cam_data.ortho_scale = tile_scale
+                cam_data.shift_x = (base_x + ((x0 + x1) / 2 - width / 2) * pixel_size) / tile_scale
+                cam_data.shift_y = (base_y + (height / 2 - (y0 + y1) / 2) * pixel_size) / tile_scale
+
+                tile = None
+                for method in ([method_used] if method_used else methods):
+                    try:
+                        tile = render_tile_pixels(method, context, view3d_area, cam, temp_path)
+                    except Exception as e:
+                        logger.debug("[TILES] Метод %s неудачен: %s", method, e)
+                        continue
+                    if tile.shape[:2] == (tile_height, tile_width):
+                        method_used = method
+                        break
+                    tile = None
+                if tile is None:
+                    return None, f"не удалось отрендерить тайл ({x0}, {y0}) {tile_width}×{tile_height}"
+
+                if band is None:
+                    channels = min(channels, tile.shape[2])
+                    band = np.empty((tile_height, width, channels), dtype=np.uint8)
+                band[:, x0:x1] = tile[..., :channels]
+
+            # Проверка кадра по всем полосам: отдельный тайл может быть однотонным
+            if first_pixel is None:
+                first_pixel = band[0, 0].copy()
+            varied = varied or not (band == first_pixel).all()
+            has_alpha = has_alpha or channels != 4 or band[..., 3].any()
+
+            if writer is None:
+                writer = StreamingPNGWriter(filepath, width, height, channels, level)
+            writer.write_rows(band)
+
+        if not has_alpha:
+            return None, "кадр полностью прозрачный"
+        if not varied:
+            return None, "кадр пустой (один цвет)"
+        committed = True
+        return method_used, None
+    finally:
+        if writer is not None:
+            writer.close(commit=committed)
+        (render.resolution_x, render.resolution_y, render.resolution_percentage,
+         render.image_settings.compression) = saved_render
+        cam_data.ortho_scale, cam_data.shift_x, cam_data.shift_y, cam_data.sensor_fit = saved_camera
 
 
-def validate_output_path(output_path, blend_filepath):
+# ------------------------------------------------------------------------
+# ЛИСТ ПРОСМОТРА ПРЕВЬЮ
+# ------------------------------------------------------------------------
+def write_contact_sheet(preview_dir, entries):
     """
-    Валидировать путь вывода для предотвращения path traversal.
+    Записать лист просмотра превью (HTML-сетка кадров с именами камер) в папку превью.
 
     Args:
-        output_path: Путь для проверки
-        blend_filepath: Путь к .blend файлу
+        entries: [{'camera', 'object', 'direction', 'file', 'size', 'preview_size', 'status'}]
 
     Returns:
-        str: Валидированный путь или None если невалиден
+        str: Путь к листу просмотра или None, если записать не удалось
     """
-    if not output_path or not blend_filepath:
+    cells = []
+    for entry in sorted(entries, key=lambda entry: (entry['object'], entry['camera'])):
+        full_width, full_height = entry['size']
+        preview_width, preview_height = entry['preview_size']
+        if entry['status'] == 'failed':
+            image = '<div class="failed">Ошибка рендера</div>'
+        else:
+            image = f'<img src="{html.escape(entry["file"])}" loading="lazy">'
+        cells.append(
+            f'<figure>{image}<figcaption><b>{html.escape(entry["camera"])}</b><br>'
+            f'{html.escape(entry["object"])}, {html.escape(entry["direction"])}<br>'
+            f'превью {preview_width}×{preview_height}, полный {full_width}×{full_height}</figcaption></figure>')
+
+    created = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    filepath = os.path.join(preview_dir, CONTACT_SHEET_NAME)
+    try:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write('<!DOCTYPE html>\n<html lang="ru"><head><meta charset="utf-8">'
+                    f'<title>Превью фасадов - {created}</title><style>'
+                    'body{font-family:sans-serif;background:#2b2b2b;color:#ddd}'
+                    '.grid{display:grid;grid-template-columns:repeat(auto-fill,minmax(320px,1fr));gap:12px}'
+                    'figure{margin:0;background:#3a3a3a;padding:8px}'
+                    'img{width:100%;background:#fff}'
+                    '.failed{padding:40px;text-align:center;color:#f66}'
+                    'figcaption{font-size:13px;margin-top:6px}'
+                    '</style></head><body>\n')
+            f.write(f'<h1>Превью фасадов ({len(cells)} камер, {created})</h1>\n'
+                    '<p>Выделите в Blender камеры, которые можно рендерить в полном размере, '
+                    'нажмите «Одобрить выделенные», затем «Рендер одобренных».</p>\n<div class="grid">\n')
+            f.write("\n".join(cells))
+            f.write('\n</div></body></html>\n')
+    except OSError as e:
+        logger.warning("[PREVIEW] Не удалось записать лист просмотра: %s", e)
         return None
+    logger.info("[PREVIEW] Лист просмотра: %s", filepath)
+    return filepath
 
-    try:
-        # Получаем абсолютные пути
-        abs_output = os.path.abspath(bpy.path.abspath(output_path))
-        abs_blend_dir = os.path.abspath(os.path.dirname(blend_filepath))
 
-        # Получаем реальные пути без символических ссылок
-        real_output = os.path.realpath(abs_output)
-        real_blend = os.path.realpath(abs_blend_dir)
+# ------------------------------------------------------------------------
+# ЗАМЕРЫ ВРЕМЕНИ РЕНДЕРА ПО ФАЗАМ
+# ------------------------------------------------------------------------
+def _timing_stats(values):
+    """Сумма, среднее, p50, p95 и максимум ряда замеров (секунды)"""
+    if not values:
+        return {'total': 0.0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        'total': round(float(values.sum()), 4),
+        'mean': round(float(values.mean()), 4),
+        'p50': round(float(np.percentile(values, 50)), 4),
+        'p95': round(float(np.percentile(values, 95)), 4),
+        'max': round(float(values.max()), 4),
+    }
+
+
+class RenderTimings:
+    """
+    Замеры времени рендера по фазам (time.perf_counter): на каждую камеру и на сессию.
 
-        # Проверяем что output находится внутри проекта
-        # Разрешаем путь только если он находится в папке blend файла или её подпапках
-        if real_output.startswith(real_blend):
-            return abs_output
+    Фазы учитываются в текущей камере (между begin_camera() и end_camera()), вне камеры -
+    в фазах сессии.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.cameras = []
+        self.by_name = {}
+        self.session_phases = {}
+        self.current = None
+        self.profile = None             # Профиль качества сессии (например, профиль Workbench)
+        self.profile_comparison = None  # Сравнение с последним отчётом другого профиля
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Замерить фазу блоком with"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        """Добавить время фазы к текущей камере или сессии"""
+        if self.current is not None:
+            phases = self.current['phases']
         else:
-            print(f"[SECURITY WARNING] Путь {output_path} находится за пределами проекта")
+            phases = self.session_phases
+        phases[name] = phases.get(name, 0.0) + seconds
+
+    def begin_camera(self, cam_name):
+        self.current = {'camera': cam_name, 'status': 'failed', 'pixels': 0, 'phases': {},
+                        '_start': time.perf_counter()}
+        self.by_name[cam_name] = self.current
+
+    def set_pixels(self, width, height):
+        if self.current is not None:
+            self.current['pixels'] = width * height
+
+    def set_status(self, cam_name, status):
+        if cam_name in self.by_name:
+            self.by_name[cam_name]['status'] = status
+
+    def end_camera(self):
+        if self.current is None:
+            return
+        self.current['seconds'] = time.perf_counter() - self.current.pop('_start')
+        self.cameras.append(self.current)
+        self.current = None
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    def aggregate(self):
+        """Сводка: время камер и фаз (p50/p95), камер в минуту и пикселей в секунду"""
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        rendered = [camera for camera in self.cameras if camera['status'] == 'ok']
+        rendered_pixels = sum(camera['pixels'] for camera in rendered)
+        phase_names = sorted({name for camera in self.cameras for name in camera['phases']})
+        stats = {
+            'cameras': len(self.cameras),
+            'rendered': sum(1 for camera in self.cameras if camera['status'] == 'ok'),
+            'elapsed_seconds': round(elapsed, 3),
+            'cameras_per_minute': round(len(self.cameras) / elapsed * 60.0, 2) if elapsed > 0 else 0.0,
+            'pixels_per_second': round(rendered_pixels / elapsed) if elapsed > 0 else 0,
+            'camera_seconds': _timing_stats([camera['seconds'] for camera in self.cameras]),
+            'phases': {name: _timing_stats([camera['phases'].get(name, 0.0) for camera in self.cameras])
+                       for name in phase_names},
+            'session_phases': {name: round(seconds, 4) for name, seconds in self.session_phases.items()},
+            # Время камеры на мегапиксель - сравнимо между запусками с разными камерами
+            'seconds_per_megapixel': (round(sum(camera['seconds'] for camera in rendered) / rendered_pixels * 1e6, 4)
+                                      if rendered_pixels else None),
+        }
+        if self.profile:
+            stats['profile'] = self.profile
+        if self.profile_comparison:
+            stats['profile_comparison'] = self.profile_comparison
+        return stats
+
+    def summary_text(self):
+        """Краткая строка для сообщения оператора"""
+        stats = self.aggregate()
+        camera_seconds = stats['camera_seconds']
+        text = (f"p50 {camera_seconds['p50']:.2f} с, p95 {camera_seconds['p95']:.2f} с, "
+                f"{stats['cameras_per_minute']:.1f} камер/мин, {stats['pixels_per_second'] / 1e6:.1f} Мпикс/с")
+        comparison = self.profile_comparison
+        if comparison:
+            text += (f", {self.profile}: {comparison['seconds_per_megapixel']:.2f} с/Мпикс против "
+                     f"{comparison['baseline_seconds_per_megapixel']:.2f} у {comparison['baseline_profile']} "
+                     f"(×{comparison['speedup']:.2f})")
+        return text
+
+    def compare_with_previous(self, output_dir, label):
+        """
+        Сравнить время на мегапиксель с последним отчётом того же бэкенда, снятым с другим профилем.
+
+        Returns:
+            dict: Сравнение (также попадает в aggregate()) или None, если сравнивать не с чем
+        """
+        current = self.aggregate()['seconds_per_megapixel']
+        if not self.profile or not current:
             return None
-    except (OSError, ValueError) as e:
-        print(f"[SECURITY ERROR] Ошибка валидации пути: {e}")
+        prefix = f"{TIMING_REPORT_PREFIX}{label}_"
+        try:
+            # Отметка времени в имени отчёта сортируется как строка
+            names = sorted((name for name in os.listdir(output_dir)
+                            if name.startswith(prefix) and name.endswith('.json')), reverse=True)
+        except OSError:
+            return None
+        for name in names:
+            try:
+                with open(os.path.join(output_dir, name), 'r', encoding='utf-8') as f:
+                    previous = json.load(f)['aggregate']
+            except (OSError, ValueError, KeyError) as e:
+                logger.debug("[TIMING] Отчёт %s пропущен: %s", name, e)
+                continue
+            baseline = previous.get('seconds_per_megapixel')
+            if previous.get('profile') in (None, self.profile) or not baseline:
+                continue
+            self.profile_comparison = {
+                'seconds_per_megapixel': current,
+                'baseline_profile': previous['profile'],
+                'baseline_seconds_per_megapixel': baseline,
+                'baseline_report': name,
+                'speedup': round(baseline / current, 3),
+            }
+            return self.profile_comparison
         return None
 
+    def write_report(self, output_dir, label="render"):
+        """
+        Записать отчёт JSON (сводка и камеры) и CSV (строка на камеру) в папку рендеров.
+
+        Returns:
+            str: Путь к JSON-отчёту или None, если записать не удалось
+        """
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        base_path = os.path.join(output_dir, f"{TIMING_REPORT_PREFIX}{label}_{timestamp}")
+        cameras = [dict(camera, seconds=round(camera['seconds'], 4),
+                        phases={name: round(seconds, 4) for name, seconds in camera['phases'].items()})
+                   for camera in self.cameras]
+        phase_names = sorted({name for camera in self.cameras for name in camera['phases']})
+        try:
+            with open(f"{base_path}.json", 'w', encoding='utf-8') as f:
+                json.dump({'addon_version': ".".join(map(str, bl_info['version'])), 'label': label,
+                           'aggregate': self.aggregate(), 'cameras': cameras}, f, ensure_ascii=False, indent=2)
+            with open(f"{base_path}.csv", 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['camera', 'status', 'pixels', 'seconds'] + phase_names)
+                for camera in cameras:
+                    writer.writerow([camera['camera'], camera['status'], camera['pixels'], camera['seconds']]
+                                    + [camera['phases'].get(name, 0.0) for name in phase_names])
+        except OSError as e:
+            logger.warning("[TIMING] Не удалось записать отчёт о времени рендера: %s", e)
+            return None
+        logger.info("[TIMING] %s", self.summary_text())
+        logger.info("[TIMING] Отчёт: %s.json", base_path)
+        return f"{base_path}.json"
+
 
-def find_3d_viewport(context):
+def _no_phase(name):
+    return contextlib.nullcontext()
+
+
+# ------------------------------------------------------------------------
+# СЕССИЯ РЕНДЕРА КАМЕР
+# ------------------------------------------------------------------------
+def plan_render_batches(cameras):
     """
-    Найти первый 3D viewport и сохранить его настройки.
+    Сгруппировать камеры в пакеты по целевому объекту.
 
     Returns:
-        tuple: (area, space_data, original_settings_dict) или (None, None, {})
+        list: [(имя_объекта, [камеры])] по именам объектов, камеры внутри пакета - по имени
     """
-    if not context.screen:
-        return None, None, {}
-
-    for area in context.screen.areas:
-        if area.type == 'VIEW_3D':
-            space_data = area.spaces.active
-            original_settings = {
-                'view_persp': space_data.region_3d.view_perspective,
-                'show_overlays': space_data.overlay.show_overlays,
-                'shading_type': space_data.shading.type,
-                'shading_light': space_data.shading.light,
-                'shading_color': space_data.shading.color_type,
-                'wireframe_threshold': getattr(space_data.overlay, 'wireframe_threshold', None),
-                'show_wireframes': getattr(space_data.overlay, 'show_wireframes', None),
-            }
-            return area, space_data, original_settings
-    return None, None, {}
+    batches = {}
+    for cam in cameras:
+        batches.setdefault(get_camera_target_name(cam), []).append(cam)
+    return [(name, sorted(batch, key=lambda cam: cam.name)) for name, batch in sorted(batches.items())]
 
 
-def restore_3d_viewport(area, space_data, original_settings):
-    """Восстановить настройки 3D viewport"""
-    if not area or not space_data or not original_settings:
-        return
+def format_duration(seconds):
+    """Форматировать длительность в виде М:СС или Ч:ММ:СС"""
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
 
-    try:
-        if 'view_persp' in original_settings and original_settings['view_persp']:
-            space_data.region_3d.view_perspective = original_settings['view_persp']
-        if 'show_overlays' in original_settings:
-            space_data.overlay.show_overlays = original_settings['show_overlays']
-        if 'shading_type' in original_settings and original_settings['shading_type']:
-            space_data.shading.type = original_settings['shading_type']
-        if 'shading_light' in original_settings and original_settings['shading_light']:
-            space_data.shading.light = original_settings['shading_light']
-        if 'shading_color' in original_settings and original_settings['shading_color']:
-            space_data.shading.color_type = original_settings['shading_color']
-        if 'wireframe_threshold' in original_settings and original_settings['wireframe_threshold'] is not None:
-            if hasattr(space_data.overlay, 'wireframe_threshold'):
-                space_data.overlay.wireframe_threshold = original_settings['wireframe_threshold']
-        if 'show_wireframes' in original_settings and original_settings['show_wireframes'] is not None:
-            if hasattr(space_data.overlay, 'show_wireframes'):
-                space_data.overlay.show_wireframes = original_settings['show_wireframes']
-    except Exception as e:
-        print(f"[WARNING] Ошибка при восстановлении настроек viewport: {e}")
 
+class RenderIsolation:
+    """
+    Изоляция объекта для рендера через исключение коллекций слоя (LayerCollection.exclude).
 
-def render_cameras_common(operator, context, settings, cameras_to_render):
+    begin() один раз за сессию исключает коллекции верхнего уровня активного view layer
+    и создаёт временную коллекцию изоляции. Смена объекта или камеры - это отвязка
+    и привязка одного объекта к этой коллекции, без обхода всех объектов сцены.
     """
-    Общий метод рендера для всех операторов.
 
-    Args:
-        operator: Экземпляр оператора для report()
-        context: Blender context
-        settings: sde_cam_pro_settings
-        cameras_to_render: Список камер для рендера
+    def __init__(self, scene, view_layer):
+        self.scene = scene
+        self.view_layer = view_layer
+        self.collection = None
+        self.excluded_names = []   # Коллекции слоя, исключённые на время рендера
+        self.hidden_state = {}     # Меши мастер-коллекции сцены: имя -> (hide_viewport, hide_render)
+        self.target = None
+        self.target_state = None
+        self.cameras = []
+
+    def begin(self):
+        """Исключить коллекции сцены и создать коллекцию изоляции"""
+        self.collection = bpy.data.collections.new(ISOLATION_COLLECTION_NAME)
+        self.scene.collection.children.link(self.collection)
+
+        # Источники света остаются в кадре через коллекцию изоляции (важно для EEVEE/Cycles)
+        for obj in self.view_layer.objects:
+            if obj.type == 'LIGHT' and not obj.hide_render:
+                self.collection.objects.link(obj)
+
+        for layer_collection in self.view_layer.layer_collection.children:
+            if layer_collection.collection != self.collection and not layer_collection.exclude:
+                layer_collection.exclude = True
+                self.excluded_names.append(layer_collection.name)
+
+        # Объекты прямо в мастер-коллекции сцены не исключаются - скрываем их один раз за сессию
+        for obj in self.scene.collection.objects:
+            if obj.type == 'MESH':
+                self.hidden_state[obj.name] = (obj.hide_viewport, obj.hide_render)
+                obj.hide_viewport = True
+                obj.hide_render = True
+
+        logger.debug("Изоляция: исключено коллекций %s, скрыто мешей мастер-коллекции %s",
+                     len(self.excluded_names), len(self.hidden_state))
+
+    def isolate(self, target, cameras):
+        """
+        Показать только целевой объект и камеры его пакета.
+
+        Returns:
+            bool: True, если сменился целевой объект
+        """
+        for cam in self.cameras:
+            self._unlink(cam)
+        for cam in cameras:
+            self._link(cam)
+        self.cameras = list(cameras)
+
+        if target is None or target == self.target:
+            return False
 
-    Returns:
-        {'FINISHED'} или {'CANCELLED'}
-    """
-    # Сохранение исходных настроек
-    original_camera = context.scene.camera
-    original_res_x = context.scene.render.resolution_x
-    original_res_y = context.scene.render.resolution_y
-    original_percentage = context.scene.render.resolution_percentage
-    original_filepath = context.scene.render.filepath
-    original_format = context.scene.render.image_settings.file_format
-    original_mode = context.mode
+        self._release_target()
+        self.target = target
+        self.target_state = (target.hide_viewport, target.hide_render)
+        self._link(target)
+        target.hide_viewport = False
+        target.hide_render = False
+        return True
+
+    def end(self):
+        """Вернуть исключение коллекций и видимость объектов, удалить коллекцию изоляции"""
+        if self.collection is None:
+            return
+        self._release_target()
+        self.cameras = []
+
+        for obj_name, (hide_viewport, hide_render) in self.hidden_state.items():
+            obj = bpy.data.objects.get(obj_name)
+            if obj:
+                obj.hide_viewport = hide_viewport
+                obj.hide_render = hide_render
 
-    # Добавленные сохранения для рендера
-    scene = context.scene
-    original_display_device = scene.display_settings.display_device
-    original_view_transform = scene.view_settings.view_transform
-
-    # Безопасный поиск 3D viewport для сохранения настроек outline
-    original_show_object_outline = False
-    for screen in bpy.data.screens:
-        for area in screen.areas:
-            if area.type == 'VIEW_3D':
-                space = area.spaces.active
-                if hasattr(space, 'shading') and hasattr(space.shading, 'show_object_outline'):
-                    original_show_object_outline = space.shading.show_object_outline
-                    break
+        layer_children = self.view_layer.layer_collection.children
+        for name in self.excluded_names:
+            layer_collection = layer_children.get(name)
+            if layer_collection:
+                layer_collection.exclude = False
 
-    # Используем новую функцию для поиска viewport
-    view3d_area, space_data, original_viewport_settings = find_3d_viewport(context)
+        bpy.data.collections.remove(self.collection)
+        self.collection = None
 
-    wm = context.window_manager
-    rendered_count = 0
-    original_visibility_state = {}
+    def _release_target(self):
+        if self.target is None:
+            return
+        try:
+            self.target.hide_viewport, self.target.hide_render = self.target_state
+            self._unlink(self.target)
+        except ReferenceError:
+            # Объект удалён во время рендера
+            pass
+        self.target = None
+        self.target_state = None
+
+    def _link(self, obj):
+        if obj is not None and obj.name not in self.collection.objects:
+            self.collection.objects.link(obj)
+
+    def _unlink(self, obj):
+        # Источники света привязаны на всю сессию, объекты и камеры - только пока активны
+        try:
+            if obj is not None and obj.type != 'LIGHT' and obj.name in self.collection.objects:
+                self.collection.objects.unlink(obj)
+        except ReferenceError:
+            pass
 
-    try:
-        # Переходим в Object Mode
-        if context.mode != 'OBJECT':
-            bpy.ops.object.mode_set(mode='OBJECT')
-
-        # Определяем объект для рендера - ищем меш, а не камеру
-        target_object = context.active_object
-        # Если активный объект - камера, ищем меш по имени камеры
-        if target_object and target_object.type == 'CAMERA':
-            cam_name = target_object.name
-            print(f"[DEBUG] Активная камера: {cam_name}")
-
-            # Способ 1: извлекаем имя объекта из имени камеры (формат: ObjectName_face_XXX)
-            if '_face_' in cam_name:
-                object_name = cam_name.split('_face_')[0]
-                mesh_object = bpy.data.objects.get(object_name)
-                if mesh_object and mesh_object.type == 'MESH':
-                    target_object = mesh_object
-                    print(f"[DEBUG] Найден меш по имени камеры: {target_object.name}")
-
-            # Способ 2: ищем через коллекции камер (если первый не сработал)
-            if target_object.type == 'CAMERA':
-                for collection in bpy.data.collections:
-                    if collection.name.startswith(CAM_COLLECTION_PREFIX) and target_object in collection.objects.values():
-                        # Извлекаем имя объекта из имени коллекции
-                        obj_name_from_collection = collection.name[len(CAM_COLLECTION_PREFIX):]
-                        mesh_object = bpy.data.objects.get(obj_name_from_collection)
-                        if mesh_object and mesh_object.type == 'MESH':
-                            target_object = mesh_object
-                            print(f"[DEBUG] Найден меш через коллекцию: {target_object.name}")
-                            break
-
-        print(f"[DEBUG] Целевой объект для рендера: {target_object.name if target_object else 'None'}")
-
-        # Сохраняем исходное состояние видимости всех объектов для восстановления
-        for obj in context.scene.objects:
-            if obj.type == 'MESH':
-                original_visibility_state[obj.name] = (obj.hide_viewport, obj.hide_render)
-        print("[DEBUG] Используем динамическое управление видимостью для каждой камеры")
 
-        # Настройки рендера
-        if settings.ignore_percentage:
-            context.scene.render.resolution_percentage = 100
+class CameraRenderSession:
+    """
+    Сессия рендера камер: сохранение состояния сцены, рендер по одной камере и восстановление.
 
-        # Специальные настройки для рендера
-        scene.display_settings.display_device = 'sRGB'
-        scene.view_settings.view_transform = 'Standard'
+    begin() сохраняет и настраивает сцену, render_next() рендерит одну камеру из очереди,
+    end() восстанавливает всё сохранённое. Блокирующий рендер вызывает render_next() в цикле,
+    модальные операторы - по одной камере на тик таймера. Способ получения кадра задаёт
+    бэкенд (ключ RENDER_BACKENDS): viewport OpenGL или движок сцены. С preview_percentage
+    сессия рендерит уменьшенные кадры в подпапку превью и пишет лист просмотра.
+    """
 
-        # Безопасное отключение outline во всех 3D viewport
+    def __init__(self, operator, settings, cameras, output_dir=None, summary=None, backend='OPENGL',
+                 preview_percentage=None):
+        self.operator = operator
+        self.settings = settings
+        self.backend = RENDER_BACKENDS[backend]
+        self.preview_percentage = preview_percentage  # Процент разрешения превью (None - полный размер)
+        self.preview_entries = {}           # Папка превью -> записи листа просмотра
+        # Очередь: (номер пакета, камера); настройка сцены выполняется один раз на пакет объекта
+        self.batches = plan_render_batches(cameras)
+        self.queue = deque((index, cam) for index, (_, batch) in enumerate(self.batches) for cam in batch)
+        self.total = len(self.queue)
+        self.current_batch = None
+        self.output_dir = output_dir        # Общая папка вывода (None - автоматическая папка каждого объекта)
+        self.batch_output_dir = None
+        self.output_dirs = []
+        self.version_indexes = {}           # Папка -> VersionIndex, строится один раз на папку
+        self.render_caches = {}             # Папка -> RenderCache (в режимах пропуска неизменённых камер)
+        self.render_settings_key = None     # Настройки сессии для отпечатков рендера (None - кэш выключен)
+        self.batch_object_hash = None
+        self.summary = summary
+        self.rendered_count = 0
+        self.skipped_count = 0
+        self.processed_count = 0
+        self.started_at = None
+        self.finished = False
+        self.render_method = None
+        self.render_method_probed = False
+        self.timings = RenderTimings()
+        self.extension = get_output_extension(settings)
+
+        self.original_state = {}
+        self.workbench_state = None         # Исходные настройки scene.display при профиле Workbench
+        self.isolation = None
+        self.original_show_object_outline = False
+        self.view3d_area = None
+        self.space_data = None
+        self.original_viewport_settings = {}
+
+    def begin(self, context):
+        """Сохранить исходное состояние сцены и подготовить её к рендеру"""
+        scene = context.scene
+        self.original_state = {
+            'camera': scene.camera,
+            'res_x': scene.render.resolution_x,
+            'res_y': scene.render.resolution_y,
+            'percentage': scene.render.resolution_percentage,
+            'filepath': scene.render.filepath,
+            'image_settings': save_image_settings(scene.render.image_settings),
+            'engine': scene.render.engine,
+            'mode': context.mode,
+            'display_device': scene.display_settings.display_device,
+            'view_transform': scene.view_settings.view_transform,
+        }
+
+        # Безопасный поиск 3D viewport для сохранения настроек outline
         for screen in bpy.data.screens:
             for area in screen.areas:
                 if area.type == 'VIEW_3D':
                     space = area.spaces.active
                     if hasattr(space, 'shading') and hasattr(space.shading, 'show_object_outline'):
-                        space.shading.show_object_outline = False
-
-        # Настройки viewport
-        if view3d_area and space_data:
-            space_data.shading.type = 'SOLID'
-            space_data.shading.light = 'FLAT'
-            space_data.shading.color_type = 'TEXTURE'
-            # Включаем overlays для wireframe
-            space_data.overlay.show_overlays = True
-            # Настраиваем wireframe
-            if hasattr(space_data.overlay, 'show_wireframes'):
-                space_data.overlay.show_wireframes = True
-            if hasattr(space_data.overlay, 'wireframe_threshold'):
-                space_data.overlay.wireframe_threshold = 0.5
+                        self.original_show_object_outline = space.shading.show_object_outline
+                        break
 
-        # Создаем папку для рендеров с валидацией
-        if settings.output_path:
-            validated_path = validate_output_path(settings.output_path, bpy.data.filepath)
-            if validated_path:
-                output_dir = validated_path
-            else:
-                operator.report({'WARNING'}, "Путь находится за пределами проекта. Используется автоматический путь.")
-                output_dir = bpy.path.abspath(get_auto_output_path(target_object.name if target_object else "renders"))
-        else:
-            output_dir = bpy.path.abspath(get_auto_output_path(target_object.name if target_object else "renders"))
+        # Используем новую функцию для поиска viewport
+        self.view3d_area, self.space_data, self.original_viewport_settings = find_3d_viewport(context)
+        context.window_manager.progress_begin(0, self.total)
+        self.started_at = time.perf_counter()
+        self.timings = RenderTimings()
 
         try:
-            os.makedirs(output_dir, exist_ok=True)
-        except OSError as e:
-            operator.report({'ERROR'}, f"Не удалось создать папку {output_dir}: {str(e)}. Используется временная папка")
-            output_dir = os.path.join(bpy.app.tempdir, "renders")
-            os.makedirs(output_dir, exist_ok=True)
+            # Переходим в Object Mode
+            if context.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode='OBJECT')
 
-        cameras_to_render.sort(key=lambda cam: cam.name)
-        wm.progress_begin(0, len(cameras_to_render))
+            # Изоляция объектов через исключение коллекций: настраивается один раз за сессию
+            self.isolation = RenderIsolation(scene, context.view_layer)
+            self.isolation.begin()
 
-        # Цикл рендера
-        for i, cam in enumerate(cameras_to_render):
-            try:
-                print(f"[DEBUG] Рендер камеры: {cam.name}")
-
-                # Динамическое управление видимостью - показываем только объект этой камеры
-                current_cam_object = None
-                # Определяем объект для текущей камеры
-                cam_name_parts = cam.name.split('_face_')
-                if len(cam_name_parts) == 2:
-                    current_obj_name = cam_name_parts[0]
-                    current_cam_object = bpy.data.objects.get(current_obj_name)
-
-                # Скрываем все объекты кроме нужного
-                if current_cam_object:
-                    print(f"[DEBUG] Показываем только объект: {current_cam_object.name}")
-                    for obj in context.scene.objects:
-                        if obj.type == 'MESH':
-                            if obj == current_cam_object:
-                                obj.hide_viewport = False
-                                obj.hide_render = False
-                            else:
-                                obj.hide_viewport = True
-                                obj.hide_render = True
-
-                # Принудительно обновляем сцену для отображения изменений
-                context.view_layer.update()
-
-                # Устанавливаем камеру
-                context.scene.camera = cam
-                # Безопасное получение разрешения с проверками
-                res_x = cam.get(CAM_RES_X_PROP, 1920)
-                res_y = cam.get(CAM_RES_Y_PROP, 1080)
-                context.scene.render.resolution_x = res_x
-                context.scene.render.resolution_y = res_y
-
-                print(f"[DEBUG] Разрешение: {res_x} x {res_y}")
-                print(f"[DEBUG] Clipping: {cam.data.clip_start} - {cam.data.clip_end}")
-                print(f"[DEBUG] Позиция камеры: {cam.location}")
-                print(f"[DEBUG] Ортографический масштаб: {cam.data.ortho_scale}")
-
-                # Отладка видимости объектов
-                print(f"[DEBUG] Проверка видимости объектов:")
-                visible_meshes = []
-                for obj in context.scene.objects:
-                    if obj.type == 'MESH':
-                        is_visible = not obj.hide_viewport and not obj.hide_render
-                        print(f"[DEBUG]   {obj.name}: viewport={not obj.hide_viewport}, render={not obj.hide_render}, видим={is_visible}")
-                        if is_visible:
-                            visible_meshes.append(obj.name)
-                print(f"[DEBUG] Видимых мешей: {len(visible_meshes)}: {visible_meshes}")
-
-                # Проверка настроек камеры
-                print(f"[DEBUG] Камера настройки:")
-                print(f"[DEBUG]   Тип: {cam.data.type}")
-                print(f"[DEBUG]   Ортографический масштаб: {cam.data.ortho_scale}")
-                print(f"[DEBUG]   Направление: {cam.rotation_euler}")
-                print(f"[DEBUG]   Матрица: {cam.matrix_world}")
-
-                # Принудительно обновляем сцену
-                context.view_layer.update()
-                context.evaluated_depsgraph_get().update()
-
-                # Настройка viewport для рендера
-                if view3d_area and space_data:
-                    space_data.region_3d.view_perspective = 'CAMERA'
-
-                    # Принудительно обновляем viewport
-                    for region in view3d_area.regions:
-                        if region.type == 'WINDOW':
-                            # Перерисовываем область
-                            region.tag_redraw()
-
-                    # Даём время на обновление
-                    bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
-
-                # Проверяем, что камера действительно активна
-                if context.scene.camera != cam:
-                    print(f"[ERROR] Камера не установилась! Ожидалась: {cam.name}, получена: {context.scene.camera.name if context.scene.camera else 'None'}")
-                    continue
+            # Настройки рендера
+            if self.settings.ignore_percentage:
+                scene.render.resolution_percentage = 100
+            if self.preview_percentage:
+                scene.render.resolution_percentage = self.preview_percentage
+
+            # Движок сцены для бэкендов движков; viewport рендерится в цветах sRGB без тонирования
+            engine = self.backend.resolve_engine()
+            if engine:
+                scene.render.engine = engine
+                if engine == 'BLENDER_WORKBENCH':
+                    profile = self.settings.workbench_profile
+                    self.timings.profile = profile
+                    if profile in WORKBENCH_PROFILES:
+                        self.workbench_state = apply_workbench_profile(scene.display, profile)
+                        logger.info("[WORKBENCH] Профиль рендера: %s", profile)
+            else:
+                scene.display_settings.display_device = 'sRGB'
+                scene.view_settings.view_transform = 'Standard'
+
+            # Формат файлов рендера (один раз на сессию)
+            self.extension = apply_output_format(scene.render.image_settings, self.settings)
+            if self.settings.render_skip_mode != 'ALL':
+                self.render_settings_key = get_render_settings_key(scene, context.view_layer,
+                                                                   self.settings, self.backend)
+
+            # Безопасное отключение outline во всех 3D viewport
+            for screen in bpy.data.screens:
+                for area in screen.areas:
+                    if area.type == 'VIEW_3D' and self.backend.viewport:
+                        space = area.spaces.active
+                        if hasattr(space, 'shading') and hasattr(space.shading, 'show_object_outline'):
+                            space.shading.show_object_outline = False
+
+            # Настройки viewport
+            if self.view3d_area and self.space_data and self.backend.viewport:
+                self.space_data.shading.type = 'SOLID'
+                self.space_data.shading.light = 'FLAT'
+                self.space_data.shading.color_type = 'TEXTURE'
+                # Включаем overlays для wireframe
+                self.space_data.overlay.show_overlays = True
+                # Настраиваем wireframe
+                if hasattr(self.space_data.overlay, 'show_wireframes'):
+                    self.space_data.overlay.show_wireframes = True
+                if hasattr(self.space_data.overlay, 'wireframe_threshold'):
+                    self.space_data.overlay.wireframe_threshold = 0.5
+                self.space_data.region_3d.view_perspective = 'CAMERA'
+
+            # Общая папка для рендеров с валидацией (без неё - автоматическая папка каждого объекта)
+            if self.output_dir:
+                self.output_dir = bpy.path.abspath(self.output_dir)
+            elif self.settings.output_path:
+                validated_path = validate_output_path(self.settings.output_path, bpy.data.filepath)
+                if validated_path:
+                    self.output_dir = validated_path
+                else:
+                    self.operator.report({'WARNING'}, "Путь находится за пределами проекта. Используется автоматический путь.")
 
-                # Подготавливаем файл для сохранения с новым именованием
-                # Извлекаем информацию из камеры
-                facade_direction = cam.get(CAM_DIRECTION_PROP, "Неизв")
+            logger.info("[PLAN] Бэкенд: %s, пакетов: %s, камер: %s", self.backend.label, len(self.batches), self.total)
+            for name, batch in self.batches:
+                batch_dir = self.output_dir or bpy.path.abspath(get_auto_output_path(name))
+                logger.info("[PLAN]   %s: %s камер -> %s", name, len(batch), batch_dir)
 
-                # Извлекаем имя объекта и номер фасада из имени камеры
-                cam_name_parts = cam.name.split('_face_')
-                if len(cam_name_parts) == 2:
-                    obj_name = cam_name_parts[0]
-                    face_number = cam_name_parts[1]
-                else:
-                    obj_name = cam.name
-                    face_number = "001"
+            self.timings.add('setup', time.perf_counter() - self.started_at)
+        except Exception as e:
+            self.operator.report({'ERROR'}, f"Критическая ошибка при рендере: {e}")
+            self.queue.clear()
+
+    def render_next(self, context):
+        """
+        Отрендерить следующую камеру из очереди.
+
+        Returns:
+            bool: True, если в очереди остались камеры
+        """
+        if not self.queue:
+            return False
+
+        cam_name = None
+        try:
+            batch_index, cam = self.queue.popleft()
+            cam_name = cam.name
+            self.timings.begin_camera(cam_name)
+            if batch_index != self.current_batch:
+                self._begin_batch(context, batch_index)
+            self._render_camera(context, cam)
+        except ReferenceError:
+            # Камеру удалили (или откатили отменой) после постановки в очередь
+            logger.warning("Камера %s удалена во время рендера, пропускаем", cam_name or "из очереди")
+        except Exception as e:
+            logger.error("Критическая ошибка при рендере камеры %s: %s", cam_name, e)
+            record_render_result(self.summary, cam, None, False, error=str(e))
+        self.timings.end_camera()
+
+        self.processed_count += 1
+        context.window_manager.progress_update(self.processed_count)
+        self.update_header()
+        return bool(self.queue)
+
+    def status_text(self):
+        """Строка прогресса: камеры, скорость (камер/мин) и оставшееся время"""
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        text = f"Рендер камер: {self.processed_count}/{self.total}"
+        if self.processed_count and elapsed > 0:
+            per_minute = self.processed_count / elapsed * 60.0
+            eta = (self.total - self.processed_count) * elapsed / self.processed_count
+            text += f" | {per_minute:.1f} камер/мин | осталось ≈ {format_duration(eta)}"
+        return text + " | Esc - отмена"
+
+    def update_header(self):
+        """Показать прогресс в заголовке 3D viewport"""
+        if self.view3d_area:
+            self.view3d_area.header_text_set(self.status_text())
+
+    def _begin_batch(self, context, batch_index):
+        """Настроить сцену для пакета камер одного объекта: изоляция, депсграф и папка вывода"""
+        self.current_batch = batch_index
+        target_name, batch = self.batches[batch_index]
+        logger.info("[PLAN] Пакет %s/%s: %s (%s камер)", batch_index + 1, len(self.batches), target_name, len(batch))
+
+        # Изоляция: одна привязка объекта к коллекции изоляции вместо обхода сцены
+        with self.timings.phase('isolation'):
+            if self.isolation.isolate(bpy.data.objects.get(target_name), batch):
+                logger.debug("Показываем только объект: %s", target_name)
+        with self.timings.phase('depsgraph'):
+            context.view_layer.update()
+
+        # Папка вывода объекта (превью - в её подпапке)
+        self.batch_output_dir = self.output_dir or bpy.path.abspath(get_auto_output_path(target_name))
+        if self.preview_percentage:
+            self.batch_output_dir = os.path.join(self.batch_output_dir, PREVIEW_DIR_NAME)
+        try:
+            os.makedirs(self.batch_output_dir, exist_ok=True)
+        except OSError as e:
+            self.operator.report({'ERROR'}, f"Не удалось создать папку {self.batch_output_dir}: {str(e)}. Используется временная папка")
+            self.batch_output_dir = os.path.join(bpy.app.tempdir, "renders")
+            os.makedirs(self.batch_output_dir, exist_ok=True)
+        if self.batch_output_dir not in self.output_dirs:
+            self.output_dirs.append(self.batch_output_dir)
+        if self.batch_output_dir not in self.version_indexes:
+            self.version_indexes[self.batch_output_dir] = VersionIndex(
+                self.batch_output_dir, extension=self.extension, use_manifest=self.settings.use_version_manifest)
+
+        # Хеш объекта для отпечатков рендера - один раз на пакет
+        self.batch_object_hash = None
+        if self.render_settings_key is not None:
+            if self.batch_output_dir not in self.render_caches:
+                self.render_caches[self.batch_output_dir] = RenderCache(self.batch_output_dir)
+            target = bpy.data.objects.get(target_name)
+            if target and target.type == 'MESH':
+                with self.timings.phase('cache'):
+                    self.batch_object_hash = compute_object_render_hash(target, context.evaluated_depsgraph_get())
+
+        # Перерисовка viewport после смены изоляции (движкам сцены она не нужна)
+        if self.view3d_area and self.backend.viewport:
+            with self.timings.phase('redraw'):
+                for region in self.view3d_area.regions:
+                    if region.type == 'WINDOW':
+                        region.tag_redraw()
+                bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
+
+    def _render_camera(self, context, cam):
+        """Отрендерить одну камеру текущего пакета"""
+        scene = context.scene
+        view3d_area = self.view3d_area
+        logger.debug("Рендер камеры: %s", cam.name)
+
+        # Устанавливаем камеру
+        scene.camera = cam
+        # Безопасное получение разрешения с проверками
+        res_x = cam.get(CAM_RES_X_PROP, 1920)
+        res_y = cam.get(CAM_RES_Y_PROP, 1080)
+        scene.render.resolution_x = res_x
+        scene.render.resolution_y = res_y
+
+        # Отладочный вывод настроек камеры (чтение свойств камеры - только при уровне DEBUG)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Разрешение: %s x %s", res_x, res_y)
+            logger.debug("Clipping: %s - %s", cam.data.clip_start, cam.data.clip_end)
+            logger.debug("Позиция камеры: %s", cam.location)
+            logger.debug("Ортографический масштаб: %s", cam.data.ortho_scale)
+            logger.debug("Камера настройки:")
+            logger.debug("  Тип: %s", cam.data.type)
+            logger.debug("  Направление: %s", cam.rotation_euler)
+            logger.debug("  Матрица: %s", cam.matrix_world)
+
+        # Проверяем, что камера действительно активна
+        if scene.camera != cam:
+            logger.error("Камера не установилась! Ожидалась: %s, получена: %s",
+                         cam.name, scene.camera.name if scene.camera else 'None')
+            return
+
+        # Кэш рендера: неизменённая камера пропускается (или ссылается на прошлый кадр)
+        cache_entry = None
+        if self.render_settings_key is not None and self.batch_object_hash is not None:
+            render_cache = self.render_caches[self.batch_output_dir]
+            with self.timings.phase('cache'):
+                fingerprint = compute_render_fingerprint(cam, self.batch_object_hash, self.render_settings_key)
+                previous = render_cache.lookup(cam.name, fingerprint)
+            if previous and self._reuse_render(cam, previous, render_cache, fingerprint):
+                return
+            cache_entry = (render_cache, fingerprint)
+
+        filepath = self._allocate_filepath(cam)
+        scene.render.filepath = filepath
+
+        # Рабочий метод viewport определяется один раз (тестовым рендером) и кэшируется на сеанс
+        if not self.render_method_probed:
+            if self.backend.viewport:
+                with self.timings.phase('probe'):
+                    self.render_method = probe_render_method(context, view3d_area, cam, self.backend.methods)
+            else:
+                self.render_method = self.backend.methods[0]
+            self.render_method_probed = True
+
+        # Сначала рабочий метод, остальные - только если он не сработал
+        render_success = False
+        methods = [self.render_method] if self.render_method else []
+        methods += [method for method in self.backend.methods if method != self.render_method]
+
+        # Большой ортографический кадр - сеткой тайлов безопасного размера
+        width, height = get_output_size(scene)
+        self.timings.set_pixels(width, height)
+        if needs_tiled_render(self.settings, cam, width, height):
+            with self.timings.phase('tiled'):
+                method, error = render_tiled(context, view3d_area, cam, filepath, methods, self.settings.tile_size,
+                                             get_output_channels(self.settings),
+                                             round(self.settings.output_compression * 9 / 100))
+            if error:
+                logger.error("[TILES] Камера %s: %s", cam.name, error)
+            else:
+                self._use_render_method(cam, method)
+            self._finish_camera(cam, filepath, error is None, cache_entry)
+            return
+
+        for method in methods:
+            if try_render_method(method, context, view3d_area, cam, filepath, timings=self.timings):
+                render_success = True
+                self._use_render_method(cam, method)
+                break
+
+        self._finish_camera(cam, filepath, render_success, cache_entry)
+
+    def _allocate_filepath(self, cam):
+        """Путь нового файла камеры с версией из индекса папки текущего пакета"""
+        if self.preview_percentage:
+            # Превью перезаписывается каждым проходом: в папке только актуальный кадр камеры
+            return os.path.join(self.batch_output_dir, bpy.path.clean_name(cam.name) + self.extension)
+
+        # Извлекаем информацию из камеры
+        facade_direction = cam.get(CAM_DIRECTION_PROP, "Неизв") + self.backend.direction_suffix
+
+        # Извлекаем имя объекта и номер фасада из имени камеры
+        cam_name_parts = cam.name.split('_face_')
+        if len(cam_name_parts) == 2:
+            obj_name = cam_name_parts[0]
+            face_number = cam_name_parts[1]
+        else:
+            obj_name = cam.name
+            face_number = "001"
+
+        # Создаем новое имя файла с версионностью
+        output_dir = self.batch_output_dir
+        filename = get_versioned_filename(output_dir, obj_name, face_number, facade_direction,
+                                          version_index=self.version_indexes[output_dir])
+        logger.debug("Имя файла: %s", filename)
+        logger.debug("Объект: %s, Фасад: %s, Направление: %s", obj_name, face_number, facade_direction)
+        return os.path.join(output_dir, filename)
+
+    def _reuse_render(self, cam, previous, render_cache, fingerprint):
+        """
+        Не рендерить камеру с неизменёнными входными данными: пропустить её
+        или (режим LINK) создать новую версию жёсткой ссылкой на прошлый кадр.
+
+        Returns:
+            bool: False, если ссылку создать не удалось и камеру нужно отрендерить
+        """
+        filepath = previous
+        if self.settings.render_skip_mode == 'LINK' and not self.preview_percentage:
+            filepath = self._allocate_filepath(cam)
+            try:
+                with self.timings.phase('link'):
+                    link_or_copy(previous, filepath)
+            except OSError as e:
+                logger.warning("[CACHE] Не удалось сослаться на %s: %s", previous, e)
+                return False
+            render_cache.store(cam.name, fingerprint, filepath)
+
+        logger.debug("[CACHE] Камера %s не изменилась: %s", cam.name, filepath)
+        self._record_preview(cam, filepath, 'skipped')
+        self.skipped_count += 1
+        record_render_result(self.summary, cam, filepath, True, skipped=True)
+        self.timings.set_status(cam.name, 'skipped')
+        return True
+
+    def _use_render_method(self, cam, method):
+        """Запомнить метод, сработавший для камеры, если он отличается от текущего"""
+        if method == self.render_method:
+            return
+        if self.render_method:
+            logger.warning("[RENDER] Метод %s не сработал для камеры %s, используем %s",
+                           self.render_method, cam.name, method)
+        self.render_method = method
+        if self.backend.viewport:
+            remember_render_method(self.view3d_area, method)
+
+    def _finish_camera(self, cam, filepath, render_success, cache_entry=None):
+        """Учесть результат камеры; при ошибке рядом с кадром пишется файл с описанием"""
+        record_render_result(self.summary, cam, filepath, render_success)
+        self.timings.set_status(cam.name, 'ok' if render_success else 'failed')
+        self._record_preview(cam, filepath, 'ok' if render_success else 'failed')
+        if render_success and cache_entry:
+            render_cache, fingerprint = cache_entry
+            render_cache.store(cam.name, fingerprint, filepath)
+        if render_success:
+            self.rendered_count += 1
+            logger.debug("Камера %s успешно отрендерена", cam.name)
+        else:
+            logger.error("Не удалось отрендерить камеру %s", cam.name)
+            # Создаём пустой файл для отладки
+            with open(os.path.splitext(filepath)[0] + '_ERROR.txt', 'w', encoding='utf-8') as f:
+                f.write(f"Ошибка рендера камеры {cam.name}\n")
+                f.write(f"Разрешение: {cam.get(CAM_RES_X_PROP, 'N/A')} x {cam.get(CAM_RES_Y_PROP, 'N/A')}\n")
+                f.write(f"Позиция: {cam.location}\n")
+                f.write(f"Clipping: {cam.data.clip_start} - {cam.data.clip_end}\n")
+
+    def _record_preview(self, cam, filepath, status):
+        """Добавить кадр превью в лист просмотра его папки"""
+        if not self.preview_percentage:
+            return
+        res_x = cam.get(CAM_RES_X_PROP, 1920)
+        res_y = cam.get(CAM_RES_Y_PROP, 1080)
+        self.preview_entries.setdefault(os.path.dirname(filepath), []).append({
+            'camera': cam.name,
+            'object': get_camera_target_name(cam),
+            'direction': cam.get(CAM_DIRECTION_PROP, "Неизв"),
+            'file': os.path.basename(filepath),
+            'size': (res_x, res_y),
+            'preview_size': (res_x * self.preview_percentage // 100, res_y * self.preview_percentage // 100),
+            'status': status,
+        })
+
+    def end(self, context, cancelled=False):
+        """
+        Восстановить сохранённое состояние сцены и viewport и сообщить итог.
+
+        Повторный вызов ничего не делает (модальный оператор может завершиться и через cancel()).
+
+        Returns:
+            {'FINISHED'} или {'CANCELLED'}
+        """
+        if self.finished:
+            return {'CANCELLED'} if cancelled else {'FINISHED'}
+        self.finished = True
 
-                # Создаем новое имя файла с версионностью
-                filename = get_versioned_filename(output_dir, obj_name, face_number, facade_direction)
-                filepath = os.path.join(output_dir, filename)
-                context.scene.render.filepath = filepath
-                context.scene.render.image_settings.file_format = 'PNG'
-                context.scene.render.image_settings.color_mode = 'RGBA'
-                context.scene.render.image_settings.color_depth = '8'
+        scene = context.scene
+        original = self.original_state
 
-                print(f"[DEBUG] Сохранение в: {filepath}")
-                print(f"[DEBUG] Имя файла: {filename}")
-                print(f"[DEBUG] Объект: {obj_name}, Фасад: {face_number}, Направление: {facade_direction}")
+        self.timings.finish()
 
-                # Пробуем разные методы рендера
-                render_success = False
+        try:
+            # Восстановление настроек
+            context.window_manager.progress_end()
+            if self.view3d_area:
+                self.view3d_area.header_text_set(None)
+
+            # Восстанавливаем видимость объектов и исключение коллекций
+            if self.isolation:
+                self.isolation.end()
+
+            scene.camera = original['camera']
+            scene.render.resolution_x = original['res_x']
+            scene.render.resolution_y = original['res_y']
+            scene.render.resolution_percentage = original['percentage']
+            scene.render.filepath = original['filepath']
+            restore_image_settings(scene.render.image_settings, original['image_settings'])
+            scene.render.engine = original['engine']
+
+            # Восстанавливаем специальные настройки
+            scene.display_settings.display_device = original['display_device']
+            scene.view_settings.view_transform = original['view_transform']
+
+            # Восстанавливаем outline во всех 3D viewport
+            for screen in bpy.data.screens:
+                for area in screen.areas:
+                    if area.type == 'VIEW_3D':
+                        space = area.spaces.active
+                        if hasattr(space, 'shading') and hasattr(space.shading, 'show_object_outline'):
+                            space.shading.show_object_outline = self.original_show_object_outline
 
-                # Метод 1: Стандартный OpenGL рендер
+            # Восстанавливаем режим
+            original_mode = original['mode']
+            if original_mode != 'OBJECT' and context.mode == 'OBJECT':
                 try:
-                    print("[DEBUG] Попытка 1: bpy.ops.render.opengl")
-                    bpy.ops.render.opengl(write_still=True)
-
-                    # Проверяем, создался ли файл
-                    if os.path.exists(filepath):
-                        try:
-                            if os.path.getsize(filepath) > MIN_FILE_SIZE:
-                                render_success = True
-                                print("[DEBUG] Успех методом 1")
-                        except OSError as e:
-                            print(f"[DEBUG] Не удалось проверить размер файла: {e}")
+                    if original_mode and '_' in original_mode:
+                        mode_name = original_mode.split('_')[-1]
+                        if mode_name in ['EDIT', 'SCULPT', 'VERTEX_PAINT', 'WEIGHT_PAINT', 'TEXTURE_PAINT']:
+                            bpy.ops.object.mode_set(mode=mode_name)
                 except Exception as e:
-                    print(f"[DEBUG] Метод 1 неудачен: {e}")
+                    logger.warning("Не удалось восстановить режим %s: %s", original_mode, e)
+        finally:
+            if self.workbench_state is not None:
+                restore_workbench_profile(scene.display, self.workbench_state)
+                self.workbench_state = None
+            # Восстанавливаем viewport используя новую функцию
+            restore_3d_viewport(self.view3d_area, self.space_data, self.original_viewport_settings)
+            for version_index in self.version_indexes.values():
+                version_index.save()
+            for render_cache in self.render_caches.values():
+                if not render_cache.save():
+                    self.operator.report({'WARNING'}, f"Кэш рендера не сохранён: {render_cache.path}")
+
+        # Листы просмотра превью (после записи всех кадров)
+        contact_sheets = [path for path in (write_contact_sheet(preview_dir, entries)
+                                            for preview_dir, entries in self.preview_entries.items()) if path]
+        if contact_sheets:
+            self.settings.contact_sheet_path = contact_sheets[0]
+
+        # Отчёт о времени рендера по фазам
+        timing = ""
+        if self.timings.cameras:
+            report_dir = self.output_dirs[0] if self.output_dirs else None
+            label = self.backend.key.lower() + ("_preview" if self.preview_percentage else "")
+            if report_dir and self.timings.profile:
+                self.timings.compare_with_previous(report_dir, label)
+            timing = f" | {self.timings.summary_text()}"
+            if self.settings.write_timing_report and report_dir:
+                self.timings.write_report(report_dir, label=label)
+
+        if self.summary is not None:
+            self.summary['output_dir'] = self.output_dir or (self.output_dirs[0] if self.output_dirs else None)
+            self.summary['output_dirs'] = list(self.output_dirs)
+            self.summary['render_method'] = self.render_method
+            self.summary['backend'] = self.backend.key
+            if self.preview_percentage:
+                self.summary['preview_percentage'] = self.preview_percentage
+                self.summary['contact_sheets'] = contact_sheets
+            self.summary['timings'] = self.timings.aggregate()
+
+        if len(self.output_dirs) == 1:
+            saved_to = self.output_dirs[0]
+        else:
+            saved_to = f"{len(self.output_dirs)} папок объектов"
 
-                # Метод 2: Если первый не сработал, пробуем viewport рендер
-                if not render_success:
-                    try:
-                        print("[DEBUG] Попытка 2: viewport рендер")
-
-                        # Делаем снимок viewport напрямую
-                        if view3d_area:
-                            # Находим 3D viewport region
-                            for region in view3d_area.regions:
-                                if region.type == 'WINDOW':
-                                    # Устанавливаем контекст для области
-                                    override = {
-                                        'area': view3d_area,
-                                        'region': region,
-                                        'scene': context.scene,
-                                        'camera': cam
-                                    }
-
-                                    with context.temp_override(**override):
-                                        bpy.ops.render.opengl(write_still=True, view_context=True)
-
-                                    if os.path.exists(filepath):
-                                        try:
-                                            if os.path.getsize(filepath) > MIN_FILE_SIZE:
-                                                render_success = True
-                                                print("[DEBUG] Успех методом 2")
-                                        except OSError as e:
-                                            print(f"[DEBUG] Не удалось проверить размер файла: {e}")
-                                    break
-                    except Exception as e:
-                        print(f"[DEBUG] Метод 2 неудачен: {e}")
+        if cancelled:
+            self.operator.report({'WARNING'}, f"Рендер прерван: отрендерено {self.rendered_count} из {self.total} "
+                                              f"(сохранено в {saved_to}){timing}")
+            return {'CANCELLED'}
 
-                # Метод 3: Ручное сохранение изображения
-                if not render_success:
-                    try:
-                        print("[DEBUG] Попытка 3: ручное сохранение")
-
-                        # Принудительно рендерим в память
-                        bpy.ops.render.opengl(write_still=False)
-
-                        # Получаем изображение из рендера
-                        image = bpy.data.images.get('Render Result')
-                        if image:
-                            # Сохраняем вручную
-                            image.save_render(filepath)
-                            if os.path.exists(filepath):
-                                try:
-                                    if os.path.getsize(filepath) > MIN_FILE_SIZE:
-                                        render_success = True
-                                        print("[DEBUG] Успех методом 3")
-                                except OSError as e:
-                                    print(f"[DEBUG] Не удалось проверить размер файла: {e}")
-                    except Exception as e:
-                        print(f"[DEBUG] Метод 3 неудачен: {e}")
+        skipped = f", без изменений пропущено: {self.skipped_count}" if self.skipped_count else ""
+        sheet = f" | лист просмотра: {contact_sheets[0]}" if contact_sheets else ""
+        if self.rendered_count > 0:
+            self.operator.report({'INFO'}, f"Рендер завершён: {self.rendered_count} изображений сохранено в {saved_to} "
+                                           f"({self.backend.label}, метод: {self.render_method}){skipped}{timing}{sheet}")
+        elif self.skipped_count:
+            self.operator.report({'INFO'}, f"Камеры не изменились с прошлого рендера{skipped}{timing}{sheet}")
+        else:
+            self.operator.report({'WARNING'}, "Ни одно изображение не было отрендерено")
+        return {'FINISHED'}
 
-                if render_success:
-                    rendered_count += 1
-                    print(f"[DEBUG] Камера {cam.name} успешно отрендерена")
-                else:
-                    print(f"[ERROR] Не удалось отрендерить камеру {cam.name}")
-                    # Создаём пустой файл для отладки
-                    with open(filepath.replace('.png', '_ERROR.txt'), 'w', encoding='utf-8') as f:
-                        f.write(f"Ошибка рендера камеры {cam.name}\n")
-                        f.write(f"Разрешение: {cam.get(CAM_RES_X_PROP, 'N/A')} x {cam.get(CAM_RES_Y_PROP, 'N/A')}\n")
-                        f.write(f"Позиция: {cam.location}\n")
-                        f.write(f"Clipping: {cam.data.clip_start} - {cam.data.clip_end}\n")
 
-                wm.progress_update(i + 1)
+def render_cameras_common(operator, context, settings, cameras_to_render, output_dir=None, summary=None,
+                          backend='OPENGL', preview_percentage=None):
+    """
+    Общий метод блокирующего рендера для всех операторов.
 
-            except Exception as e:
-                print(f"[ERROR] Критическая ошибка при рендере камеры {cam.name}: {e}")
-                # Продолжаем с следующей камерой
-                continue
+    Args:
+        operator: Экземпляр оператора (или ConsoleReporter) для report()
+        context: Blender context
+        settings: sde_cam_pro_settings
+        cameras_to_render: Список камер для рендера
+        output_dir: Папка вывода (если задана - используется без автоматического определения)
+        summary: Словарь для итогов пакета (заполняется через record_render_result)
+        backend: Бэкенд рендера (ключ RENDER_BACKENDS)
+        preview_percentage: Процент разрешения прохода превью (None - полный размер)
 
-    except Exception as e:
-        operator.report({'ERROR'}, f"Критическая ошибка при рендере: {e}")
+    Returns:
+        {'FINISHED'} или {'CANCELLED'}
+    """
+    session = CameraRenderSession(operator, settings, cameras_to_render, output_dir, summary, backend,
+                                  preview_percentage)
+    session.begin(context)
+    try:
+        while session.render_next(context):
+            pass
     finally:
-        # Восстановление настроек
-        wm.progress_end()
+        result = session.end(context)
+    return result
 
-        # Восстанавливаем видимость объектов
-        for obj_name, original_visibility in original_visibility_state.items():
-            obj = bpy.data.objects.get(obj_name)
-            if obj:
-                if isinstance(original_visibility, tuple):
-                    obj.hide_viewport, obj.hide_render = original_visibility
-                else:
-                    # Совместимость со старым форматом
-                    obj.hide_viewport = original_visibility
 
-        context.scene.camera = original_camera
-        context.scene.render.resolution_x = original_res_x
-        context.scene.render.resolution_y = original_res_y
-        context.scene.render.resolution_percentage = original_percentage
-        context.scene.render.filepath = original_filepath
-        context.scene.render.image_settings.file_format = original_format
+class ModalRenderMixin:
+    """
+    Запуск рендера камер оператором.
 
-        # Восстанавливаем специальные настройки
-        scene.display_settings.display_device = original_display_device
-        scene.view_settings.view_transform = original_view_transform
+    Из интерфейса (invoke) рендер идёт модально: одна камера на тик таймера, навигация
+    во viewport остаётся доступной, Esc прерывает рендер с восстановлением сцены. Остальные
+    события (правка, сохранение, отмена) поглощаются, пока сцена изолирована. Из скриптов
+    (execute) рендер блокирующий.
 
-        # Восстанавливаем outline во всех 3D viewport
-        for screen in bpy.data.screens:
-            for area in screen.areas:
-                if area.type == 'VIEW_3D':
-                    space = area.spaces.active
-                    if hasattr(space, 'shading') and hasattr(space.shading, 'show_object_outline'):
-                        space.shading.show_object_outline = original_show_object_outline
+    Оператор обязан определить метод collect_cameras(context): камеры для рендера; пустой
+    список - отмена, причина уже сообщена через report.
+    """
+    _timer = None
+    _session = None
+    render_backend = None   # Ключ RENDER_BACKENDS (None - бэкенд из настроек аддона)
+    preview = False         # Проход превью: уменьшенные кадры и лист просмотра
+
+    def _prepare_cameras(self, context):
+        if bpy.data.filepath == "":
+            self.report({'WARNING'}, "Перед рендером сохраните файл .blend")
+            return []
+
+        cameras = self.collect_cameras(context)
+        # Обновляем старые камеры без информации о направлении
+        for cam in cameras:
+            if CAM_DIRECTION_PROP not in cam:
+                logger.info("[MIGRATION] Обновляем камеру %s - добавляем информацию о направлении", cam.name)
+                cam[CAM_DIRECTION_PROP] = "Неизв"  # Для совместимости со старыми камерами
+            if cam.sde_target_object is None:
+                target = get_camera_target(cam)
+                if target is not None:
+                    logger.info("[MIGRATION] Камера %s привязана к объекту %s", cam.name, target.name)
+                    bind_camera_target(cam, target)
+        return cameras
+
+    def get_render_backend(self, context):
+        return self.render_backend or context.scene.sde_cam_pro_settings.render_backend
+
+    def get_preview_percentage(self, context):
+        return context.scene.sde_cam_pro_settings.preview_percentage if self.preview else None
+
+    def execute(self, context):
+        cameras = self._prepare_cameras(context)
+        if not cameras:
+            return {'CANCELLED'}
+        return render_cameras_common(self, context, context.scene.sde_cam_pro_settings, cameras,
+                                     backend=self.get_render_backend(context),
+                                     preview_percentage=self.get_preview_percentage(context))
+
+    def invoke(self, context, event):
+        cameras = self._prepare_cameras(context)
+        if not cameras:
+            return {'CANCELLED'}
+
+        self._session = CameraRenderSession(self, context.scene.sde_cam_pro_settings, cameras,
+                                            backend=self.get_render_backend(context),
+                                            preview_percentage=self.get_preview_percentage(context))
+        self._session.begin(context)
+        self._session.update_header()
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(MODAL_RENDER_INTERVAL, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            return self._finish_modal(context, cancelled=True)
 
-        # Восстанавливаем режим
-        if original_mode != 'OBJECT' and context.mode == 'OBJECT':
+        if event.type == 'TIMER':
             try:
-                if original_mode and '_' in original_mode:
-                    mode_name = original_mode.split('_')[-1]
-                    if mode_name in ['EDIT', 'SCULPT', 'VERTEX_PAINT', 'WEIGHT_PAINT', 'TEXTURE_PAINT']:
-                        bpy.ops.object.mode_set(mode=mode_name)
+                if not self._session.render_next(context):
+                    return self._finish_modal(context)
             except Exception as e:
-                print(f"Не удалось восстановить режим {original_mode}: {e}")
+                # Сцена должна вернуться из изоляции при любой ошибке
+                logger.error("Критическая ошибка модального рендера: %s", e)
+                self.report({'ERROR'}, f"Критическая ошибка при рендере: {e}")
+                return self._finish_modal(context, cancelled=True)
+            return {'RUNNING_MODAL'}
 
-        # Восстанавливаем viewport используя новую функцию
-        restore_3d_viewport(view3d_area, space_data, original_viewport_settings)
+        # Сохранение и правка изолированной сцены записали бы в .blend временное состояние рендера
+        if event.type in MODAL_NAVIGATION_EVENTS:
+            return {'PASS_THROUGH'}
+        return {'RUNNING_MODAL'}
 
-    if rendered_count > 0:
-        operator.report({'INFO'}, f"Рендер завершён: {rendered_count} изображений сохранено в {output_dir}")
-    else:
-        operator.report({'WARNING'}, "Ни одно изображение не было отрендерено")
+    def cancel(self, context):
+        # Blender прерывает модальный оператор (например, при загрузке файла)
+        self._finish_modal(context, cancelled=True)
 
-    return {'FINISHED'}
+    def _finish_modal(self, context, cancelled=False):
+        if self._timer:
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+        return self._session.end(context, cancelled)
 
 
 # ------------------------------------------------------------------------
@@ -700,6 +3439,26 @@ class SDE_CameraProSettings(bpy.types.PropertyGroup):
         description="Автоматически рассчитывать clipping planes на основе габаритов объекта",
         default=True
     )
+    use_extreme_points: bpy.props.BoolProperty(
+        name="Кэш экстремальных точек",
+        description="Для плотных мешей заранее отбирать точки выпуклой оболочки и кэшировать их между запусками. Результат совпадает с перебором всех вершин",
+        default=True
+    )
+    cluster_coplanar: bpy.props.BoolProperty(
+        name="Одна камера на плоскость",
+        description="Объединять выделенные полигоны одной плоскости фасада (триангулированные и подразделённые стены) и создавать одну камеру на плоскость",
+        default=False
+    )
+    cluster_angle: bpy.props.FloatProperty(
+        name="Допуск угла",
+        description="Максимальный угол между нормалями полигонов одной плоскости",
+        default=math.radians(1.0), min=0.0, max=math.radians(45.0), subtype='ANGLE'
+    )
+    cluster_distance: bpy.props.FloatProperty(
+        name="Допуск смещения",
+        description="Максимальное расстояние между плоскостями полигонов одной плоскости",
+        default=0.01, min=0.0, unit='LENGTH'
+    )
     max_resolution: bpy.props.IntProperty(
         name="Максимальное разрешение",
         description="Разрешение для большей стороны кадра (базовое значение, процент рендера применяется отдельно)",
@@ -716,6 +3475,92 @@ class SDE_CameraProSettings(bpy.types.PropertyGroup):
         subtype='DIR_PATH',
         default=""
     )
+    render_backend: bpy.props.EnumProperty(
+        name="Бэкенд рендера",
+        description="Способ рендера кнопок «Все камеры», «Выделенные» и «Камеры объекта»",
+        items=RENDER_BACKEND_ITEMS,
+        default='OPENGL'
+    )
+    preview_percentage: bpy.props.IntProperty(
+        name="Масштаб превью",
+        description="Процент сохранённого разрешения камер для прохода превью",
+        default=25, min=1, max=100, subtype='PERCENTAGE'
+    )
+    contact_sheet_path: bpy.props.StringProperty(
+        name="Лист просмотра",
+        description="Лист просмотра последнего прохода превью",
+        default="", subtype='FILE_PATH'
+    )
+    workbench_profile: bpy.props.EnumProperty(
+        name="Профиль Workbench",
+        description="Настройки Workbench на время рендера (после рендера настройки сцены возвращаются)",
+        items=WORKBENCH_PROFILE_ITEMS,
+        default='DRAFT'
+    )
+    output_format: bpy.props.EnumProperty(
+        name="Формат файла",
+        description="Формат файлов рендера фасадов",
+        items=OUTPUT_FORMAT_ITEMS,
+        default='PNG'
+    )
+    output_color_mode: bpy.props.EnumProperty(
+        name="Цвет",
+        description="Каналы изображения (для JPEG прозрачность не сохраняется)",
+        items=OUTPUT_COLOR_MODE_ITEMS,
+        default='RGBA'
+    )
+    output_compression: bpy.props.IntProperty(
+        name="Сжатие",
+        description="Сжатие PNG: 0 - быстрее всего и крупнее файлы, 100 - медленнее и компактнее",
+        default=15, min=0, max=100, subtype='PERCENTAGE'
+    )
+    output_quality: bpy.props.IntProperty(
+        name="Качество",
+        description="Качество JPEG/WebP (WebP при 100 - без потерь)",
+        default=90, min=1, max=100, subtype='PERCENTAGE'
+    )
+    render_skip_mode: bpy.props.EnumProperty(
+        name="Неизменённые камеры",
+        description="Что делать с камерами, входные данные которых (камера, геометрия, материалы, настройки) не изменились с прошлого рендера в эту папку",
+        items=[('ALL', "Рендерить все", "Рендерить каждую камеру заново"),
+               ('SKIP', "Пропускать", "Не рендерить неизменённые камеры, новая версия файла не создаётся"),
+               ('LINK', "Ссылка на прошлый кадр", "Создать новую версию файла жёсткой ссылкой на прошлый кадр без рендера")],
+        default='ALL'
+    )
+    use_tiled_render: bpy.props.BoolProperty(
+        name="Тайловый рендер",
+        description="Рендерить большие ортографические фасады сеткой тайлов и сшивать их в один PNG (обходит ограничение размера текстуры GPU)",
+        default=True
+    )
+    tile_size: bpy.props.IntProperty(
+        name="Размер тайла",
+        description="Максимальная сторона тайла в пикселях; кадры больше этого размера рендерятся тайлами",
+        default=4096, min=256, soft_max=8192, max=16384
+    )
+    write_timing_report: bpy.props.BoolProperty(
+        name="Отчёт о времени",
+        description="Записывать в папку рендеров отчёт о времени по фазам (render_timings_*.json и .csv): p50/p95 на камеру, камер/мин, пикселей/с",
+        default=True
+    )
+    use_version_manifest: bpy.props.BoolProperty(
+        name="Манифест версий",
+        description="Хранить номера версий файлов в папке рендера (.sde_versions.json), чтобы следующие запуски не просматривали папку целиком",
+        default=False
+    )
+    farm_workers: bpy.props.IntProperty(
+        name="Воркеры фермы",
+        description="Количество фоновых процессов Blender для рендера фермой",
+        default=4, min=1, soft_max=32, max=256
+    )
+    farm_engine: bpy.props.EnumProperty(
+        name="Движок фермы",
+        description="Движок рендера фоновых процессов",
+        items=[('WORKBENCH', "Workbench", "Быстрый рендер Workbench (подходит для локальной проверки)"),
+               ('EEVEE', "EEVEE", "Финальный рендер EEVEE"),
+               ('CYCLES', "Cycles", "Финальный рендер Cycles"),
+               ('OPENGL', "OpenGL", "Рендер viewport (требует GPU-контекста в фоновом режиме)")],
+        default='WORKBENCH'
+    )
     preset: bpy.props.EnumProperty(
         name="Шаблон",
         description="Готовые шаблоны настроек для быстрой настройки",
@@ -733,18 +3578,24 @@ class SDE_CameraProSettings(bpy.types.PropertyGroup):
             self.auto_clipping = True
             self.ignore_percentage = True
             self.output_path = ""  # Использовать автоматический путь
+            self.output_format = 'PNG'
+            self.output_compression = 15
         elif self.preset == 'QUICK_PREVIEW':
             self.max_resolution = 4000
             self.auto_distance = False
             self.auto_clipping = True
             self.ignore_percentage = False
             self.output_path = ""  # Использовать автоматический путь
+            self.output_format = 'PNG'
+            self.output_compression = 0  # Черновик: быстрое кодирование важнее размера
         elif self.preset == 'DEFAULT':
             self.max_resolution = 2000
             self.auto_distance = True
             self.auto_clipping = True
             self.ignore_percentage = True
             self.output_path = ""
+            self.output_format = 'PNG'
+            self.output_compression = 15
 
 
 # ------------------------------------------------------------------------
@@ -758,6 +3609,10 @@ class SDE_Preset(bpy.types.PropertyGroup):
     max_resolution: bpy.props.IntProperty(default=2000)
     ignore_percentage: bpy.props.BoolProperty(default=True)
     output_path: bpy.props.StringProperty(default="")
+    output_format: bpy.props.EnumProperty(items=OUTPUT_FORMAT_ITEMS, default='PNG')
+    output_color_mode: bpy.props.EnumProperty(items=OUTPUT_COLOR_MODE_ITEMS, default='RGBA')
+    output_compression: bpy.props.IntProperty(default=15, min=0, max=100)
+    output_quality: bpy.props.IntProperty(default=90, min=1, max=100)
 
 
 # ------------------------------------------------------------------------
@@ -768,6 +3623,16 @@ class SDE_AddonPreferences(bpy.types.AddonPreferences):
 
     presets: bpy.props.CollectionProperty(type=SDE_Preset)
     selected_preset_index: bpy.props.IntProperty(default=0)
+    log_level: bpy.props.EnumProperty(
+        name="Уровень логирования",
+        description="Подробность вывода аддона в системную консоль",
+        items=LOG_LEVEL_ITEMS,
+        default=DEFAULT_LOG_LEVEL,
+        update=_update_log_level
+    )
+
+    def draw(self, context):
+        self.layout.prop(self, "log_level")
 
 
 # ------------------------------------------------------------------------
@@ -790,6 +3655,10 @@ class SDE_OT_add_preset(bpy.types.Operator):
         new_preset.max_resolution = settings.max_resolution
         new_preset.ignore_percentage = settings.ignore_percentage
         new_preset.output_path = settings.output_path
+        new_preset.output_format = settings.output_format
+        new_preset.output_color_mode = settings.output_color_mode
+        new_preset.output_compression = settings.output_compression
+        new_preset.output_quality = settings.output_quality
         prefs.selected_preset_index = len(prefs.presets) - 1
         self.report({'INFO'}, f"Пресет «{new_preset.name}» добавлен")
         return {'FINISHED'}
@@ -844,6 +3713,10 @@ class SDE_OT_load_preset(bpy.types.Operator):
             settings.max_resolution = preset.max_resolution
             settings.ignore_percentage = preset.ignore_percentage
             settings.output_path = preset.output_path
+            settings.output_format = preset.output_format
+            settings.output_color_mode = preset.output_color_mode
+            settings.output_compression = preset.output_compression
+            settings.output_quality = preset.output_quality
             settings.preset = 'DEFAULT'  # Сбросить встроенный пресет
             self.report({'INFO'}, f"Пресет «{preset.name}» загружен")
         return {'FINISHED'}
@@ -870,6 +3743,10 @@ class SDE_OT_create_cameras_from_faces(bpy.types.Operator):
     max_resolution: bpy.props.IntProperty()
     auto_distance: bpy.props.BoolProperty()
     auto_clipping: bpy.props.BoolProperty()
+    use_extreme_points: bpy.props.BoolProperty()
+    cluster_coplanar: bpy.props.BoolProperty()
+    cluster_angle: bpy.props.FloatProperty(subtype='ANGLE', default=math.radians(1.0))
+    cluster_distance: bpy.props.FloatProperty(unit='LENGTH', default=0.01)
 
     @classmethod
     def poll(cls, context):
@@ -884,14 +3761,26 @@ class SDE_OT_create_cameras_from_faces(bpy.types.Operator):
             self.report({'WARNING'}, "Выберите объект типа Mesh")
             return {'CANCELLED'}
 
-        bm = bmesh.from_edit_mesh(obj.data)
-        selected_faces = [f for f in bm.faces if f.select]
+        # Синхронизируем данные меша с режимом редактирования для чтения через foreach_get
+        if obj.mode == 'EDIT':
+            obj.update_from_editmode()
 
-        if not selected_faces:
+        face_indices, face_normals, face_centers, face_areas = get_selected_faces_world(obj)
+
+        if len(face_indices) == 0:
             self.report({'WARNING'}, "Не выделен ни один полигон")
             return {'CANCELLED'}
 
-        world_matrix = obj.matrix_world
+        selected_count = len(face_indices)
+        face_groups = [[int(i)] for i in face_indices]
+        if self.cluster_coplanar:
+            # Одна камера на плоскость фасада: имя камеры - по наименьшему индексу полигона кластера
+            clusters = cluster_coplanar_faces(face_normals, face_centers, self.cluster_angle, self.cluster_distance)
+            merged = [merge_face_cluster(face_normals, face_centers, face_areas, cluster) for cluster in clusters]
+            face_groups = [sorted(int(i) for i in face_indices[cluster]) for cluster in clusters]
+            face_indices = np.array([group[0] for group in face_groups])
+            face_normals = np.array([normal for normal, _ in merged])
+            face_centers = np.array([center for _, center in merged])
 
         short_name = bpy.path.clean_name(obj.name)
         cam_collection_name = f"{CAM_COLLECTION_PREFIX}{short_name}"
@@ -900,204 +3789,215 @@ class SDE_OT_create_cameras_from_faces(bpy.types.Operator):
             cam_collection = bpy.data.collections.new(cam_collection_name)
             context.scene.collection.children.link(cam_collection)
 
-        created_cameras = []
-        for face in selected_faces:
-            # Всегда используем весь объект для кадрирования
-            verts_to_project = [world_matrix @ v.co for v in bm.verts]
-            all_verts = bm.verts
+        params = get_framing_params(self.distance, self.auto_distance, self.auto_clipping, self.max_resolution)
 
-            if not verts_to_project:
-                continue
+        # Всегда используем весь объект для кадрирования: вершины читаются один раз для всех полигонов
+        try:
+            framing = compute_framing_batch(get_framing_points(obj, self.use_extreme_points), face_normals,
+                                            face_centers, **params)
+        except Exception as e:
+            self.report({'ERROR'}, f"Ошибка при расчёте кадрирования: {e}")
+            return {'CANCELLED'}
 
-            cam_data_tuple = self.get_framing_data(face, world_matrix, verts_to_project, all_verts, obj)
+        # Плоскость и топология исходных полигонов: по ним обновление находит полигоны после перенумерации
+        local_normals, local_centers, local_areas = get_faces_local(obj.data)
+        topology_hash = get_mesh_topology_hash(obj.data)
+
+        created_cameras = []
+        for face_index, face_group, normal, center, cam_data_tuple in zip(face_indices, face_groups, face_normals,
+                                                                          face_centers, framing):
             if not cam_data_tuple:
                 continue
 
-            final_cam_location, cam_rotation_quat, ortho_scale, res_x, res_y, clip_start, clip_end, facade_direction = cam_data_tuple
-
-            # Валидация параметров камеры
-            if ortho_scale <= 0:
-                print(f"[CAMERA ERROR] Некорректный ortho_scale={ortho_scale:.3f}, используем значение по умолчанию")
-                ortho_scale = 10.0
-
-            if clip_start >= clip_end:
-                print(f"[CAMERA ERROR] clip_start ({clip_start:.3f}) >= clip_end ({clip_end:.3f}), корректируем")
-                clip_start = DEFAULT_CLIPPING_START
-                clip_end = max(clip_start + 10.0, DEFAULT_CLIPPING_END)
-
-            if clip_start < 0.001:
-                clip_start = DEFAULT_CLIPPING_START
-
-            cam_name = f"{short_name}_face_{face.index:03d}"
+            cam_name = f"{short_name}_face_{face_index:03d}"
             camera_data = bpy.data.cameras.new(name=cam_name)
-            camera_data.type = 'ORTHO'
-            camera_data.ortho_scale = ortho_scale
-            camera_data.clip_start = clip_start
-            camera_data.clip_end = clip_end
-
             camera_obj = bpy.data.objects.new(name=cam_name, object_data=camera_data)
-            camera_obj.location = final_cam_location
-            if cam_rotation_quat is not None:
-                camera_obj.rotation_euler = cam_rotation_quat.to_euler()
-            else:
-                print(f"[ERROR] Не удалось установить поворот камеры {cam_name}")
+            apply_framing_to_camera(camera_obj, cam_data_tuple)
 
-            camera_obj[CAM_RES_X_PROP] = res_x
-            camera_obj[CAM_RES_Y_PROP] = res_y
-            camera_obj[CAM_DIRECTION_PROP] = facade_direction
+            # Данные для инкрементального обновления камер
+            bind_camera_target(camera_obj, obj)
+            camera_obj[CAM_SOURCE_FACES_PROP] = face_group
+            camera_obj[CAM_SOURCE_PLANE_PROP] = get_faces_plane(local_normals, local_centers, local_areas, face_group)
+            camera_obj[CAM_SOURCE_TOPOLOGY_PROP] = topology_hash
+            camera_obj[CAM_FRAMING_PARAMS_PROP] = params
+            camera_obj[CAM_FINGERPRINT_PROP] = compute_geometry_fingerprint(obj, normal, center, params)
 
             cam_collection.objects.link(camera_obj)
             created_cameras.append(camera_obj)
 
-        bmesh.update_edit_mesh(obj.data)
-        self.report({'INFO'}, f"Создано камер: {len(created_cameras)} в коллекции «{cam_collection.name}»")
+        if self.cluster_coplanar:
+            self.report({'INFO'}, f"Создано камер: {len(created_cameras)} в коллекции «{cam_collection.name}» "
+                                  f"(полигонов: {selected_count}, плоскостей: {len(face_indices)})")
+        else:
+            self.report({'INFO'}, f"Создано камер: {len(created_cameras)} в коллекции «{cam_collection.name}»")
         return {'FINISHED'}
 
-    def get_framing_data(self, face, world_matrix, vertices, all_verts, obj):
-        try:
-            # Проверяем наличие вершин
-            if not all_verts or len(all_verts) == 0:
-                print("Ошибка: объект не содержит вершин")
-                return None
-
-            # Получаем нормаль полигона в мировых координатах
-            # По стандарту Blender нормаль направлена "наружу" от поверхности
-            face_normal_world = (world_matrix.to_3x3() @ face.normal).normalized()
-            face_center = world_matrix @ face.calc_center_median()
-
-            # Проверяем ориентацию нормали относительно вертикали
-            # ВАЖНО: Инвертируем ТОЛЬКО для горизонтальных полов, не для наклонных поверхностей!
-            z_component = face_normal_world.z
-
-            # Для истинно горизонтального пола (нормаль почти строго вниз):
-            # - z < -0.707 (более 45° вниз)
-            # - x и y компоненты малы (поверхность горизонтальна)
-            # Тогда инвертируем нормаль, чтобы камера была сверху и смотрела вниз
-            is_horizontal = abs(face_normal_world.x) < 0.1 and abs(face_normal_world.y) < 0.1
-            is_floor = abs(z_component) > ANGLE_45_DEGREES and z_component < 0
-
-            if is_floor and is_horizontal:
-                # Только для истинно горизонтальных полов инвертируем нормаль
-                face_normal_world = -face_normal_world
-
-            # Вычисляем проекции всех вершин на нормаль для расчета расстояния
-            projs = [(world_matrix @ v.co - face_center).dot(face_normal_world) for v in all_verts]
-
-            # ВАЖНО: В Blender камера смотрит вдоль локальной оси -Z
-            # Нормаль (face_normal_world) указывает ОТ поверхности
-            # Камера должна смотреть НА поверхность (против нормали)
-            # to_track_quat('Z', 'Y') выравнивает +Z вдоль нормали, тогда -Z смотрит против нормали
-            rotation = face_normal_world.to_track_quat('Z', 'Y')
-            rotation_mat = rotation.to_matrix()
-
-            if self.auto_distance:
-                min_proj = min(projs)
-                buffer = max(10.0, -min_proj * 0.1)
-                final_distance = max(self.distance, -min_proj + buffer)
-            else:
-                final_distance = self.distance
 
-            # Позиция камеры = центр полигона + нормаль * расстояние
-            initial_location = face_center + face_normal_world * final_distance
+# ------------------------------------------------------------------------
+# ОПЕРАТОР: ОБНОВЛЕНИЕ КАМЕР С ИЗМЕНЁННОЙ ГЕОМЕТРИЕЙ
+# ------------------------------------------------------------------------
+class SDE_OT_refresh_cameras(bpy.types.Operator):
+    bl_idname = "object.sde_refresh_cameras"
+    bl_label = "Обновить камеры"
+    bl_description = "Пересчитать кадрирование только для камер, исходная геометрия которых изменилась"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return get_ui_state(context)['camera_collections']
 
-            view_matrix = (Matrix.Translation(initial_location) @ rotation_mat.to_4x4()).inverted()
-            projected_points = [view_matrix @ v for v in vertices]
+    def execute(self, context):
+        settings = context.scene.sde_cam_pro_settings
 
-            min_x = min(p.x for p in projected_points)
-            max_x = max(p.x for p in projected_points)
-            min_y = min(p.y for p in projected_points)
-            max_y = max(p.y for p in projected_points)
+        # Группируем камеры аддона по исходному объекту
+        cameras_by_object = {}
+        skipped_count = 0
+        for coll in bpy.data.collections:
+            if not coll.name.startswith(CAM_COLLECTION_PREFIX):
+                continue
+            for cam in coll.objects:
+                if cam.type != 'CAMERA' or CAM_RES_X_PROP not in cam:
+                    continue
+                if CAM_SOURCE_OBJECT_PROP not in cam or CAM_SOURCE_FACES_PROP not in cam:
+                    # Камеры старых версий не хранят исходные полигоны
+                    skipped_count += 1
+                    continue
+                cameras_by_object.setdefault(get_camera_target_name(cam), []).append(cam)
 
-            width = max_x - min_x
-            height = max_y - min_y
-            if width <= 0 or height <= 0:
-                return None
+        updated_count = 0
+        unchanged_count = 0
+        for obj_name, cameras in cameras_by_object.items():
+            obj = bpy.data.objects.get(obj_name)
+            if not obj or obj.type != 'MESH':
+                logger.warning("[REFRESH] Объект «%s» не найден, пропущено камер: %s", obj_name, len(cameras))
+                skipped_count += len(cameras)
+                continue
 
-            center_x = (min_x + max_x) / 2
-            center_y = (min_y + max_y) / 2
+            if obj.mode == 'EDIT':
+                obj.update_from_editmode()
+
+            # Индексы полигонов верны, только пока топология меша не менялась; после перенумерации
+            # полигоны ищутся по сохранённой плоскости, иначе камера пропускается
+            topology_hash = get_mesh_topology_hash(obj.data)
+            polygon_count = len(obj.data.polygons)
+            local_faces = None
+            valid_cameras = []
+            for cam in cameras:
+                faces = [int(i) for i in cam[CAM_SOURCE_FACES_PROP]]
+                plane = cam.get(CAM_SOURCE_PLANE_PROP)
+                if plane is not None and cam.get(CAM_SOURCE_TOPOLOGY_PROP) == topology_hash:
+                    valid_cameras.append((cam, faces))
+                    continue
 
-            offset = rotation_mat @ Vector((center_x, center_y, 0))
-            final_location = initial_location + offset
+                if local_faces is None:
+                    local_faces = get_faces_local(obj.data)
+                if plane is None:
+                    # Камера создана до сохранения плоскости: плоскость можно записать, только если
+                    # геометрия не менялась с момента создания (отпечаток совпадает)
+                    if not faces or max(faces) >= polygon_count or not self._is_unchanged(obj, cam, faces, settings):
+                        logger.warning("[REFRESH] Камера %s создана без плоскости полигонов, а геометрия «%s» "
+                                       "изменилась - камера пропущена, создайте её заново", cam.name, obj_name)
+                        skipped_count += 1
+                        continue
+                    cam[CAM_SOURCE_PLANE_PROP] = get_faces_plane(*local_faces, faces)
+                    cam[CAM_SOURCE_TOPOLOGY_PROP] = topology_hash
+                    valid_cameras.append((cam, faces))
+                    continue
 
-            padding = FRAME_PADDING
+                matched = match_plane_faces(local_faces[0], local_faces[1], list(plane),
+                                            settings.cluster_angle, settings.cluster_distance)
+                if not matched:
+                    logger.warning("[REFRESH] Топология «%s» изменилась, и полигонов в плоскости камеры %s нет - "
+                                   "камера пропущена", obj_name, cam.name)
+                    skipped_count += 1
+                    continue
+                logger.info("[REFRESH] Камера %s: полигоны найдены по плоскости (%s)", cam.name, len(matched))
+                cam[CAM_SOURCE_FACES_PROP] = matched
+                cam[CAM_SOURCE_TOPOLOGY_PROP] = topology_hash
+                valid_cameras.append((cam, matched))
+            if not valid_cameras:
+                continue
 
-            effective_max_res = self.max_resolution
-            content_aspect = width / height if height != 0 else 1.0
-            res_x, res_y = 1920, 1080
-            if effective_max_res > 0:
-                if content_aspect > 1.0:
-                    res_x = int(effective_max_res)
-                    res_y = int(effective_max_res / content_aspect) if content_aspect != 0 else 1
-                else:
-                    res_y = int(effective_max_res)
-                    res_x = int(effective_max_res * content_aspect)
+            # Данные полигонов всех камер объекта читаются одним вызовом
+            all_faces = [i for _, faces in valid_cameras for i in faces]
+            normals, centers, areas = get_faces_world(obj, all_faces)
+
+            changed = {}
+            start = 0
+            for cam, faces in valid_cameras:
+                positions = list(range(start, start + len(faces)))
+                start += len(faces)
+                normal, center = self._get_group_plane(normals, centers, areas, positions)
+                params = self._get_params(cam, settings)
+
+                fingerprint = compute_geometry_fingerprint(obj, normal, center, params)
+                if cam.get(CAM_FINGERPRINT_PROP) == fingerprint:
+                    unchanged_count += 1
+                    continue
 
-            res_x = max(res_x, 1)
-            res_y = max(res_y, 1)
+                key = tuple(sorted(params.items()))
+                changed.setdefault(key, []).append((cam, normal, center, params, fingerprint))
+
+            # Пересчитываем кадрирование пакетно для изменившихся камер
+            for group in changed.values():
+                params = group[0][3]
+                framing = compute_framing_batch(get_framing_points(obj, settings.use_extreme_points),
+                                                [item[1] for item in group], [item[2] for item in group], **params)
+                for (cam, _, _, params, fingerprint), cam_data_tuple in zip(group, framing):
+                    if not cam_data_tuple:
+                        logger.warning("[REFRESH] Не удалось рассчитать кадрирование камеры %s", cam.name)
+                        skipped_count += 1
+                        continue
+                    apply_framing_to_camera(cam, cam_data_tuple)
+                    cam[CAM_FRAMING_PARAMS_PROP] = params
+                    cam[CAM_FINGERPRINT_PROP] = fingerprint
+                    updated_count += 1
 
-            final_scale = max(width, height) * padding
+        message = f"Обновлено камер: {updated_count}, без изменений: {unchanged_count}, пропущено: {skipped_count}"
+        self.report({'WARNING'} if skipped_count else {'INFO'}, message)
+        return {'FINISHED'}
 
-            # Рассчитываем clipping planes
-            if self.auto_clipping:
-                # Направление взгляда камеры - против нормали (камера смотрит на поверхность)
-                camera_direction = -face_normal_world
-                clip_start, clip_end = calculate_clipping_planes(obj, final_location, camera_direction)
-            else:
-                # Значения по умолчанию
-                clip_start = 0.001
-                clip_end = max(100000.0, final_scale * 1000.0)
+    @staticmethod
+    def _get_params(cam, settings):
+        stored_params = cam.get(CAM_FRAMING_PARAMS_PROP)
+        if stored_params is not None:
+            return get_framing_params(**stored_params.to_dict())
+        return get_framing_params(settings.distance, settings.auto_distance,
+                                  settings.auto_clipping, settings.max_resolution)
 
-            # Определяем сторону света для фасада
-            facade_direction = get_cardinal_direction(face_normal_world)
+    @staticmethod
+    def _get_group_plane(normals, centers, areas, positions):
+        if len(positions) > 1:
+            return merge_face_cluster(normals, centers, areas, positions)
+        return normals[positions[0]], centers[positions[0]]
 
-            return (final_location, rotation, final_scale, res_x, res_y, clip_start, clip_end, facade_direction)
-        except Exception as e:
-            print(f"Ошибка при обработке полигона: {e}")
-            return None
+    def _is_unchanged(self, obj, cam, faces, settings):
+        """Совпадает ли отпечаток геометрии камеры с текущим (геометрия не менялась)"""
+        normals, centers, areas = get_faces_world(obj, faces)
+        normal, center = self._get_group_plane(normals, centers, areas, list(range(len(faces))))
+        return cam.get(CAM_FINGERPRINT_PROP) == compute_geometry_fingerprint(obj, normal, center,
+                                                                             self._get_params(cam, settings))
 
 
 # ------------------------------------------------------------------------
 # ОПЕРАТОР: РЕНДЕР ВЫДЕЛЕННЫХ КАМЕР
 # ------------------------------------------------------------------------
-class SDE_OT_render_selected_cameras(bpy.types.Operator):
+class SDE_OT_render_selected_cameras(ModalRenderMixin, bpy.types.Operator):
     bl_idname = "object.sde_render_selected_cameras"
     bl_label = "Отрендерить выделенные камеры"
-    bl_description = "Выполнить рендер только выделенных камер с изоляцией активного объекта"
+    bl_description = "Выполнить рендер только выделенных камер с изоляцией активного объекта (Esc - отмена)"
     bl_options = {'REGISTER'}
 
     @classmethod
     def poll(cls, context):
-        # Более эффективная проверка - прерываем на первом найденном объекте
-        if bpy.data.filepath == "":
-            return False
-        
-        for obj in context.scene.objects:
-            if obj.select_get() and obj.type == 'CAMERA' and CAM_RES_X_PROP in obj:
-                return True
-        return False
-
-    def execute(self, context):
-        settings = context.scene.sde_cam_pro_settings
-        if bpy.data.filepath == "":
-            self.report({'WARNING'}, "Перед рендером сохраните файл .blend")
-            return {'CANCELLED'}
+        return bpy.data.filepath != "" and get_ui_state(context)['selected_cameras'] > 0
 
+    def collect_cameras(self, context):
         # Получаем только выделенные камеры аддона
-        selected_cameras = [obj for obj in context.scene.objects
-                            if obj.select_get() and obj.type == 'CAMERA' and CAM_RES_X_PROP in obj]
-                            
-        # Обновляем старые камеры без информации о направлении
-        for cam in selected_cameras:
-            if CAM_DIRECTION_PROP not in cam:
-                print(f"[MIGRATION] Обновляем камеру {cam.name} - добавляем информацию о направлении")
-                cam[CAM_DIRECTION_PROP] = "Неизв"  # Для совместимости со старыми камерами
-
+        selected_cameras = get_selected_addon_cameras(context)
         if not selected_cameras:
             self.report({'WARNING'}, "Не выделено ни одной камеры, созданной аддоном")
-            return {'CANCELLED'}
-
-        # Используем общую функцию рендера
-        return render_cameras_common(self, context, settings, selected_cameras)
+        return selected_cameras
 
 
 # ------------------------------------------------------------------------
@@ -1111,31 +4011,29 @@ class SDE_OT_delete_active_object_cameras(bpy.types.Operator):
 
     @classmethod
     def poll(cls, context):
-        if not context.active_object:
-            return False
-        obj_name = bpy.path.clean_name(context.active_object.name)
-        target_collection_name = f"{CAM_COLLECTION_PREFIX}{obj_name}"
-        return bpy.data.collections.get(target_collection_name) is not None
+        return bool(get_object_cameras(context.active_object))
 
     def invoke(self, context, event):
         return context.window_manager.invoke_confirm(self, event)
 
     def execute(self, context):
         try:
-            obj_name = bpy.path.clean_name(context.active_object.name)
-            target_collection_name = f"{CAM_COLLECTION_PREFIX}{obj_name}"
-            target_collection = bpy.data.collections.get(target_collection_name)
-
-            if not target_collection:
-                self.report({'WARNING'}, f"Коллекция камер для объекта «{context.active_object.name}» не найдена")
+            cameras = get_object_cameras(context.active_object)
+            if not cameras:
+                self.report({'WARNING'}, f"Камеры объекта «{context.active_object.name}» не найдены")
                 return {'CANCELLED'}
 
-            cameras_in_coll = [obj for obj in target_collection.objects if obj.type == 'CAMERA']
-            deleted_cameras_count = len(cameras_in_coll)
+            # Коллекции камер аддона, которые опустеют после удаления
+            cam_collections = {coll.name: coll for cam in cameras for coll in cam.users_collection
+                               if coll.name.startswith(CAM_COLLECTION_PREFIX)}
+            deleted_cameras_count = len(cameras)
 
-            for cam in cameras_in_coll:
+            for cam in cameras:
                 bpy.data.objects.remove(cam, do_unlink=True)
-            bpy.data.collections.remove(target_collection)
+            for coll in cam_collections.values():
+                if not coll.objects:
+                    bpy.data.collections.remove(coll)
+            invalidate_camera_index()
 
             self.report({'INFO'}, f"Удалено камер: {deleted_cameras_count} для объекта «{context.active_object.name}»")
             return {'FINISHED'}
@@ -1147,50 +4045,22 @@ class SDE_OT_delete_active_object_cameras(bpy.types.Operator):
 # ------------------------------------------------------------------------
 # ОПЕРАТОР: РЕНДЕР КАМЕР АКТИВНОГО ОБЪЕКТА
 # ------------------------------------------------------------------------
-class SDE_OT_render_active_object_cameras(bpy.types.Operator):
+class SDE_OT_render_active_object_cameras(ModalRenderMixin, bpy.types.Operator):
     bl_idname = "object.sde_render_active_object_cameras"
     bl_label = "Отрендерить камеры объекта"
-    bl_description = "Выполнить рендер камер только для активного объекта с изоляцией"
+    bl_description = "Выполнить рендер камер только для активного объекта с изоляцией (Esc - отмена)"
     bl_options = {'REGISTER'}
 
     @classmethod
     def poll(cls, context):
-        if not context.active_object:
-            return False
-        obj_name = bpy.path.clean_name(context.active_object.name)
-        target_collection_name = f"{CAM_COLLECTION_PREFIX}{obj_name}"
-        return bpy.data.collections.get(target_collection_name) is not None and bpy.data.filepath != ""
-
-    def execute(self, context):
-        settings = context.scene.sde_cam_pro_settings
-        if bpy.data.filepath == "":
-            self.report({'WARNING'}, "Перед рендером сохраните файл .blend")
-            return {'CANCELLED'}
-
-        obj_name = bpy.path.clean_name(context.active_object.name)
-        target_collection_name = f"{CAM_COLLECTION_PREFIX}{obj_name}"
-        target_collection = bpy.data.collections.get(target_collection_name)
-
-        if not target_collection:
-            self.report({'WARNING'}, f"Коллекция камер для объекта «{context.active_object.name}» не найдена")
-            return {'CANCELLED'}
-
-        # Получаем камеры аддона из коллекции
-        cameras_to_render = [obj for obj in target_collection.objects
-                             if obj.type == 'CAMERA' and CAM_RES_X_PROP in obj]
-                             
-        # Обновляем старые камеры без информации о направлении
-        for cam in cameras_to_render:
-            if CAM_DIRECTION_PROP not in cam:
-                print(f"[MIGRATION] Обновляем камеру {cam.name} - добавляем информацию о направлении")
-                cam[CAM_DIRECTION_PROP] = "Неизв"  # Для совместимости со старыми камерами
+        return bpy.data.filepath != "" and bool(get_object_cameras(context.active_object))
 
+    def collect_cameras(self, context):
+        # Камеры объекта из реестра - независимо от имён камер и коллекций
+        cameras_to_render = get_object_cameras(context.active_object)
         if not cameras_to_render:
-            self.report({'WARNING'}, "Нет подходящих камер для рендера в коллекции объекта")
-            return {'CANCELLED'}
-
-        # Используем метод рендера из SDE_OT_render_selected_cameras
-        return SDE_OT_render_selected_cameras._render_cameras(self, context, settings, cameras_to_render)
+            self.report({'WARNING'}, f"Нет камер для рендера у объекта «{context.active_object.name}»")
+        return cameras_to_render
 
 
 # ------------------------------------------------------------------------
@@ -1225,240 +4095,262 @@ class SDE_OT_apply_camera_resolution(bpy.types.Operator):
 # ------------------------------------------------------------------------
 # ОПЕРАТОР: РЕНДЕР ИЗ ВСЕХ КАМЕР С ИЗОЛЯЦИЕЙ ОБЪЕКТА
 # ------------------------------------------------------------------------
-class SDE_OT_render_all_cameras(bpy.types.Operator):
+class SDE_OT_render_all_cameras(ModalRenderMixin, bpy.types.Operator):
     bl_idname = "object.sde_render_all_cameras"
     bl_label = "Отрендерить все камеры"
-    bl_description = "Выполнить рендер всех камер с изоляцией активного объекта"
+    bl_description = "Выполнить рендер всех камер с изоляцией активного объекта (Esc - отмена)"
     bl_options = {'REGISTER'}
 
     @classmethod
     def poll(cls, context):
-        return any(
-            coll.name.startswith(CAM_COLLECTION_PREFIX) for coll in bpy.data.collections) and bpy.data.filepath != ""
-
-    def execute(self, context):
-        settings = context.scene.sde_cam_pro_settings
-        if bpy.data.filepath == "":
-            self.report({'WARNING'}, "Перед рендером сохраните файл .blend")
-            return {'CANCELLED'}
+        return bpy.data.filepath != "" and get_ui_state(context)['camera_collections']
 
+    def collect_cameras(self, context):
         # Собираем все камеры из всех коллекций аддона
         all_cameras = []
         collections = [c for c in bpy.data.collections if c.name.startswith(CAM_COLLECTION_PREFIX)]
         for coll in collections:
             all_cameras.extend([obj for obj in coll.objects if obj.type == 'CAMERA' and CAM_RES_X_PROP in obj])
 
-        # Обновляем старые камеры без информации о направлении
-        for cam in all_cameras:
-            if CAM_DIRECTION_PROP not in cam:
-                print(f"[MIGRATION] Обновляем камеру {cam.name} - добавляем информацию о направлении")
-                cam[CAM_DIRECTION_PROP] = "Неизв"  # Для совместимости со старыми камерами
-
         if not all_cameras:
             self.report({'WARNING'}, "Нет камер для рендера")
-            return {'CANCELLED'}
-
-        # Используем общую функцию рендера
-        return render_cameras_common(self, context, settings, all_cameras)
+        return all_cameras
 
 
 # ------------------------------------------------------------------------
-# ОПЕРАТОР: АЛЬТЕРНАТИВНЫЙ РЕНДЕР ДЛЯ VULKAN
+# ОПЕРАТОРЫ: ПРЕВЬЮ, ОДОБРЕНИЕ И РЕНДЕР ОДОБРЕННЫХ КАМЕР
 # ------------------------------------------------------------------------
-class SDE_OT_render_vulkan_compatible(bpy.types.Operator):
-    bl_idname = "object.sde_render_vulkan_compatible"
-    bl_label = "Рендер (совместимый с Vulkan)"
-    bl_description = "Альтернативный метод рендера, совместимый с Vulkan API"
+class SDE_OT_render_preview_pass(ModalRenderMixin, bpy.types.Operator):
+    bl_idname = "object.sde_render_preview_pass"
+    bl_label = "Превью камер"
+    bl_description = "Отрендерить уменьшенные кадры камер (выделенных или всех) в папку превью и собрать лист просмотра (Esc - отмена)"
     bl_options = {'REGISTER'}
 
+    preview = True
+
     @classmethod
     def poll(cls, context):
-        # Более эффективная проверка - прерываем на первом найденном объекте
-        if bpy.data.filepath == "":
-            return False
-        
-        for obj in context.scene.objects:
-            if obj.select_get() and obj.type == 'CAMERA' and CAM_RES_X_PROP in obj:
-                return True
-        return False
+        return bpy.data.filepath != "" and get_ui_state(context)['camera_collections']
+
+    def collect_cameras(self, context):
+        cameras = get_selected_addon_cameras(context) or collect_addon_cameras()
+        if not cameras:
+            self.report({'WARNING'}, "Нет камер для превью")
+            return []
+        # Новый проход превью требует нового одобрения
+        for cam in cameras:
+            cam.sde_preview_approved = False
+        invalidate_ui_state()
+        return cameras
+
+
+class SDE_OT_approve_cameras(bpy.types.Operator):
+    bl_idname = "object.sde_approve_cameras"
+    bl_label = "Одобрить выделенные"
+    bl_description = "Отметить выделенные камеры для рендера в полном размере (или снять отметку)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    approve: bpy.props.BoolProperty(name="Одобрить", default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return get_ui_state(context)['selected_cameras'] > 0
 
     def execute(self, context):
-        settings = context.scene.sde_cam_pro_settings
-        if bpy.data.filepath == "":
-            self.report({'WARNING'}, "Перед рендером сохраните файл .blend")
-            return {'CANCELLED'}
+        cameras = get_selected_addon_cameras(context)
+        for cam in cameras:
+            cam.sde_preview_approved = self.approve
+        invalidate_ui_state()
+        if self.approve:
+            self.report({'INFO'}, f"Одобрено камер: {len(cameras)}")
+        else:
+            self.report({'INFO'}, f"Снято одобрение с камер: {len(cameras)}")
+        return {'FINISHED'}
 
-        # Получаем выделенные камеры аддона
-        selected_cameras = [obj for obj in context.scene.objects
-                            if obj.select_get() and obj.type == 'CAMERA' and CAM_RES_X_PROP in obj]
-                            
-        # Обновляем старые камеры без информации о направлении
-        for cam in selected_cameras:
-            if CAM_DIRECTION_PROP not in cam:
-                print(f"[MIGRATION] Обновляем камеру {cam.name} - добавляем информацию о направлении")
-                cam[CAM_DIRECTION_PROP] = "Неизв"  # Для совместимости со старыми камерами
 
-        if not selected_cameras:
-            self.report({'WARNING'}, "Не выделено ни одной камеры, созданной аддоном")
+class SDE_OT_render_approved_cameras(ModalRenderMixin, bpy.types.Operator):
+    bl_idname = "object.sde_render_approved_cameras"
+    bl_label = "Рендер одобренных"
+    bl_description = "Отрендерить в полном размере только камеры, одобренные по превью (Esc - отмена)"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return bpy.data.filepath != "" and get_ui_state(context)['approved_cameras'] > 0
+
+    def collect_cameras(self, context):
+        approved_cameras = [cam for cam in collect_addon_cameras() if cam.sde_preview_approved]
+        if not approved_cameras:
+            self.report({'WARNING'}, "Нет одобренных камер: сначала сделайте превью и одобрите камеры")
+        return approved_cameras
+
+
+class SDE_OT_open_contact_sheet(bpy.types.Operator):
+    bl_idname = "object.sde_open_contact_sheet"
+    bl_label = "Открыть лист просмотра"
+    bl_description = "Открыть лист просмотра последнего прохода превью в браузере"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.sde_cam_pro_settings.contact_sheet_path != ""
+
+    def execute(self, context):
+        filepath = context.scene.sde_cam_pro_settings.contact_sheet_path
+        if not os.path.exists(filepath):
+            self.report({'WARNING'}, f"Лист просмотра не найден: {filepath}")
             return {'CANCELLED'}
+        bpy.ops.wm.path_open(filepath=filepath)
+        return {'FINISHED'}
 
-        return self._vulkan_render(context, settings, selected_cameras)
 
-    def _vulkan_render(self, context, settings, cameras_to_render):
-        # Сохранение настроек
-        original_camera = context.scene.camera
-        original_res_x = context.scene.render.resolution_x
-        original_res_y = context.scene.render.resolution_y
-        original_percentage = context.scene.render.resolution_percentage
-        original_filepath = context.scene.render.filepath
-        original_format = context.scene.render.image_settings.file_format
-        original_engine = context.scene.render.engine
+# ------------------------------------------------------------------------
+# ОПЕРАТОР: АЛЬТЕРНАТИВНЫЙ РЕНДЕР ДЛЯ VULKAN
+# ------------------------------------------------------------------------
+class SDE_OT_render_vulkan_compatible(ModalRenderMixin, bpy.types.Operator):
+    bl_idname = "object.sde_render_vulkan_compatible"
+    bl_label = "Рендер (совместимый с Vulkan)"
+    bl_description = "Рендер выделенных камер движком Workbench, совместимый с Vulkan API (Esc - отмена)"
+    bl_options = {'REGISTER'}
 
-        wm = context.window_manager
-        rendered_count = 0
-        original_visibility_state = {}
+    render_backend = 'WORKBENCH'
 
-        try:
-            # Переходим в Object Mode
-            if context.mode != 'OBJECT':
-                bpy.ops.object.mode_set(mode='OBJECT')
+    @classmethod
+    def poll(cls, context):
+        return bpy.data.filepath != "" and get_ui_state(context)['selected_cameras'] > 0
 
-            # Определяем объект для рендера - ищем меш, а не камеру
-            target_object = context.active_object
-            # Если активный объект - камера, ищем меш по имени камеры
-            if target_object and target_object.type == 'CAMERA':
-                cam_name = target_object.name
-                print(f"[DEBUG] Активная камера: {cam_name}")
-                
-                # Способ 1: извлекаем имя объекта из имени камеры (формат: ObjectName_face_XXX)
-                if '_face_' in cam_name:
-                    object_name = cam_name.split('_face_')[0]
-                    mesh_object = bpy.data.objects.get(object_name)
-                    if mesh_object and mesh_object.type == 'MESH':
-                        target_object = mesh_object
-                        print(f"[DEBUG] Найден меш по имени камеры: {target_object.name}")
-                
-                # Способ 2: ищем через коллекции камер (если первый не сработал)
-                if target_object.type == 'CAMERA':
-                    for collection in bpy.data.collections:
-                        if collection.name.startswith(CAM_COLLECTION_PREFIX) and target_object in collection.objects.values():
-                            # Извлекаем имя объекта из имени коллекции
-                            obj_name_from_collection = collection.name[len(CAM_COLLECTION_PREFIX):]
-                            mesh_object = bpy.data.objects.get(obj_name_from_collection)
-                            if mesh_object and mesh_object.type == 'MESH':
-                                target_object = mesh_object
-                                print(f"[DEBUG] Найден меш через коллекцию: {target_object.name}")
-                                break
-            
-            print(f"[DEBUG] Целевой объект для рендера: {target_object.name if target_object else 'None'}")
-            
-            # Сохраняем исходное состояние видимости всех объектов для восстановления
-            for obj in context.scene.objects:
-                if obj.type == 'MESH':
-                    original_visibility_state[obj.name] = (obj.hide_viewport, obj.hide_render)
-            print("[DEBUG] Используем динамическое управление видимостью для каждой камеры")
+    def collect_cameras(self, context):
+        selected_cameras = get_selected_addon_cameras(context)
+        if not selected_cameras:
+            self.report({'WARNING'}, "Не выделено ни одной камеры, созданной аддоном")
+        return selected_cameras
 
-            # Настройки рендера
-            if settings.ignore_percentage:
-                context.scene.render.resolution_percentage = 100
 
-            # Используем Workbench для Vulkan совместимости
-            context.scene.render.engine = 'BLENDER_WORKBENCH'
+# ------------------------------------------------------------------------
+# ОПЕРАТОР: РЕНДЕР ФЕРМОЙ ФОНОВЫХ ПРОЦЕССОВ
+# ------------------------------------------------------------------------
+class SDE_OT_render_farm(bpy.types.Operator):
+    bl_idname = "object.sde_render_farm"
+    bl_label = "Рендер фермой"
+    bl_description = "Распределить камеры (выделенные или все) между несколькими фоновыми процессами Blender и отрендерить параллельно (Esc - отмена)"
+    bl_options = {'REGISTER'}
 
-            # Создаем папку для рендеров
-            if settings.output_path:
-                output_dir = bpy.path.abspath(settings.output_path)
-            else:
-                output_dir = bpy.path.abspath(get_auto_output_path(target_object.name if target_object else "renders"))
+    _timer = None
+    _farm = None
+    _area = None
 
-            try:
-                os.makedirs(output_dir, exist_ok=True)
-            except OSError as e:
-                self.report({'ERROR'}, f"Не удалось создать папку {output_dir}: {str(e)}. Используется временная папка")
-                output_dir = os.path.join(bpy.app.tempdir, "renders")
-                os.makedirs(output_dir, exist_ok=True)
+    @classmethod
+    def poll(cls, context):
+        return bpy.data.filepath != "" and get_ui_state(context)['camera_collections']
+
+    def _create_farm(self, context):
+        """Проверить файл и камеры и подготовить ферму (None - отмена, причина уже сообщена)"""
+        settings = context.scene.sde_cam_pro_settings
+        if bpy.data.filepath == "":
+            self.report({'WARNING'}, "Перед рендером сохраните файл .blend")
+            return None
+        if bpy.data.is_dirty:
+            self.report({'WARNING'}, "Сохраните файл .blend: воркеры рендерят сохранённую версию")
+            return None
 
-            cameras_to_render.sort(key=lambda cam: cam.name)
-            wm.progress_begin(0, len(cameras_to_render))
+        cameras = [obj for obj in context.selected_objects if obj.type == 'CAMERA' and CAM_RES_X_PROP in obj]
+        if not cameras:
+            cameras = collect_addon_cameras()
+        if not cameras:
+            self.report({'WARNING'}, "Нет камер для рендера")
+            return None
 
-            # Цикл рендера с Workbench
-            for i, cam in enumerate(cameras_to_render):
-                try:
-                    print(f"[VULKAN DEBUG] Рендер камеры: {cam.name}")
-
-                    context.scene.camera = cam
-                    # Безопасное получение разрешения с проверками
-                    res_x = cam.get(CAM_RES_X_PROP, 1920)
-                    res_y = cam.get(CAM_RES_Y_PROP, 1080)
-                    context.scene.render.resolution_x = res_x
-                    context.scene.render.resolution_y = res_y
-
-                    # Создаем имя файла с vulkan суффиксом
-                    facade_direction = cam.get(CAM_DIRECTION_PROP, "Неизв")
-                    cam_name_parts = cam.name.split('_face_')
-                    if len(cam_name_parts) == 2:
-                        obj_name = cam_name_parts[0]
-                        face_number = cam_name_parts[1]
-                    else:
-                        obj_name = cam.name
-                        face_number = "001"
-                    
-                    # Для vulkan добавляем суффикс в направление
-                    facade_direction_vulkan = f"{facade_direction}-V"
-                    filename = get_versioned_filename(output_dir, obj_name, face_number, facade_direction_vulkan)
-                    filepath = os.path.join(output_dir, filename)
-                    context.scene.render.filepath = filepath
-                    context.scene.render.image_settings.file_format = 'PNG'
-
-                    print(f"[VULKAN DEBUG] Рендер через Workbench engine")
-                    print(f"[VULKAN DEBUG] Имя файла: {filename}")
-                    print(f"[VULKAN DEBUG] Объект: {obj_name}, Фасад: {face_number}, Направление: {facade_direction_vulkan}")
-
-                    # Используем стандартный рендер вместо OpenGL
-                    bpy.ops.render.render(write_still=True)
-
-                    if os.path.exists(filepath) and os.path.getsize(filepath) > MIN_FILE_SIZE:
-                        rendered_count += 1
-                        print(f"[VULKAN DEBUG] Камера {cam.name} успешно отрендерена")
-                    else:
-                        print(f"[VULKAN ERROR] Не удалось отрендерить камеру {cam.name}")
-
-                    wm.progress_update(i + 1)
+        output_dir = None
+        if settings.output_path:
+            output_dir = validate_output_path(settings.output_path, bpy.data.filepath)
+            if not output_dir:
+                self.report({'WARNING'}, "Путь находится за пределами проекта. Используется автоматический путь.")
 
-                except Exception as e:
-                    print(f"[VULKAN ERROR] Ошибка при рендере камеры {cam.name}: {e}")
-                    continue
+        return RenderFarm(cameras, settings.farm_workers, settings.farm_engine, output_dir)
 
-        except Exception as e:
-            self.report({'ERROR'}, f"Критическая ошибка при Vulkan рендере: {e}")
+    def _start_farm(self, farm):
+        try:
+            farm.start()
+        except (OSError, subprocess.SubprocessError) as e:
+            self.report({'ERROR'}, f"Не удалось запустить ферму рендера: {e}")
+            return False
+        return True
+
+    def _report_summary(self, summary):
+        message = (f"Ферма: отрендерено {summary['rendered']} из {summary['cameras_total']}, "
+                   f"без изменений: {summary['skipped']}, ошибок: {summary['failed']}, "
+                   f"воркеров: {len(summary['workers'])}")
+        if summary['cancelled']:
+            self.report({'WARNING'}, f"{message} (отменено)")
+            return {'CANCELLED'}
+        self.report({'WARNING'} if summary['failed'] else {'INFO'}, message)
+        return {'FINISHED'}
+
+    def execute(self, context):
+        farm = self._create_farm(context)
+        if farm is None:
+            return {'CANCELLED'}
+
+        # Из скриптов ферма блокирующая
+        wm = context.window_manager
+        wm.progress_begin(0, len(farm.cameras))
+        try:
+            if not self._start_farm(farm):
+                return {'CANCELLED'}
+            summary = farm.wait(progress_callback=wm.progress_update)
         finally:
-            # Восстановление настроек
             wm.progress_end()
+        return self._report_summary(summary)
 
-            # Восстанавливаем видимость объектов
-            for obj_name, original_visibility in original_visibility_state.items():
-                obj = bpy.data.objects.get(obj_name)
-                if obj:
-                    if isinstance(original_visibility, tuple):
-                        obj.hide_viewport, obj.hide_render = original_visibility
-                    else:
-                        # Совместимость со старым форматом
-                        obj.hide_viewport = original_visibility
-
-            context.scene.camera = original_camera
-            context.scene.render.resolution_x = original_res_x
-            context.scene.render.resolution_y = original_res_y
-            context.scene.render.resolution_percentage = original_percentage
-            context.scene.render.filepath = original_filepath
-            context.scene.render.image_settings.file_format = original_format
-            context.scene.render.engine = original_engine
-
-        if rendered_count > 0:
-            self.report({'INFO'}, f"Vulkan рендер завершён: {rendered_count} изображений сохранено в {output_dir}")
-        else:
-            self.report({'WARNING'}, "Ни одно изображение не было отрендерено")
+    def invoke(self, context, event):
+        farm = self._create_farm(context)
+        if farm is None or not self._start_farm(farm):
+            return {'CANCELLED'}
+        self._farm = farm
 
-        return {'FINISHED'}
+        # Воркеры опрашиваются по таймеру, интерфейс остаётся отзывчивым
+        wm = context.window_manager
+        wm.progress_begin(0, len(farm.cameras))
+        self._area = context.area if context.area and context.area.type == 'VIEW_3D' else None
+        self._update_progress(context)
+        self._timer = wm.event_timer_add(FARM_POLL_INTERVAL, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._farm.cancel()
+            return self._finish_modal(context)
+
+        if event.type == 'TIMER':
+            running = self._farm.poll()
+            self._update_progress(context)
+            if not running:
+                return self._finish_modal(context)
+            return {'RUNNING_MODAL'}
+
+        return {'PASS_THROUGH'}
+
+    def cancel(self, context):
+        # Blender прерывает модальный оператор (например, при загрузке файла) - воркеры не должны остаться
+        self._farm.cancel()
+        self._finish_modal(context)
+
+    def _update_progress(self, context):
+        context.window_manager.progress_update(self._farm.completed())
+        if self._area:
+            self._area.header_text_set(self._farm.status_text())
+
+    def _finish_modal(self, context):
+        wm = context.window_manager
+        if self._timer:
+            wm.event_timer_remove(self._timer)
+            self._timer = None
+        wm.progress_end()
+        if self._area:
+            self._area.header_text_set(None)
+            self._area = None
+        return self._report_summary(self._farm.finish())
 
 
 class SDE_OT_preview_camera(bpy.types.Operator):
@@ -1567,7 +4459,7 @@ class SDE_OT_delete_all_addon_cameras(bpy.types.Operator):
 
     @classmethod
     def poll(cls, context):
-        return any(coll.name.startswith(CAM_COLLECTION_PREFIX) for coll in bpy.data.collections)
+        return get_ui_state(context)['camera_collections']
 
     def invoke(self, context, event):
         return context.window_manager.invoke_confirm(self, event)
@@ -1615,6 +4507,12 @@ class SDE_PT_cameras_pro_panel(bpy.types.Panel):
         row.prop(settings, "distance", slider=True)
         creation_col.prop(settings, "auto_distance")
         creation_col.prop(settings, "auto_clipping")
+        creation_col.prop(settings, "use_extreme_points")
+        creation_col.prop(settings, "cluster_coplanar")
+        if settings.cluster_coplanar:
+            row = creation_col.row(align=True)
+            row.prop(settings, "cluster_angle")
+            row.prop(settings, "cluster_distance")
         creation_col.prop(settings, "max_resolution")
 
         op_create = creation_col.operator(SDE_OT_create_cameras_from_faces.bl_idname, text="Создать камеры", icon='ADD')
@@ -1623,9 +4521,14 @@ class SDE_PT_cameras_pro_panel(bpy.types.Panel):
         op_create.max_resolution = settings.max_resolution
         op_create.auto_distance = settings.auto_distance
         op_create.auto_clipping = settings.auto_clipping
+        op_create.use_extreme_points = settings.use_extreme_points
+        op_create.cluster_coplanar = settings.cluster_coplanar
+        op_create.cluster_angle = settings.cluster_angle
+        op_create.cluster_distance = settings.cluster_distance
 
         if not SDE_OT_create_cameras_from_faces.poll(context):
             creation_box.label(text="Доступно в режиме редактирования", icon='INFO')
+        creation_box.operator(SDE_OT_refresh_cameras.bl_idname, text="Обновить изменённые", icon='FILE_REFRESH')
 
         # Блок пользовательских пресетов
         preset_box = layout.box()
@@ -1649,6 +4552,27 @@ class SDE_PT_cameras_pro_panel(bpy.types.Panel):
             auto_path = get_auto_output_path(context.active_object.name)
             render_col.label(text=f"Автоматический путь: {auto_path}", icon='FOLDER_REDIRECT')
         render_col.prop(settings, "output_path")
+        render_col.prop(settings, "render_backend")
+        render_col.prop(settings, "workbench_profile")
+        row = render_col.row(align=True)
+        row.prop(settings, "output_format", text="")
+        row.prop(settings, "output_color_mode", text="")
+        if settings.output_format == 'PNG':
+            render_col.prop(settings, "output_compression")
+        elif settings.output_format in {'JPEG', 'WEBP'}:
+            render_col.prop(settings, "output_quality")
+        render_col.prop(settings, "render_skip_mode")
+        if settings.output_format == 'PNG':
+            row = render_col.row(align=True)
+            row.prop(settings, "use_tiled_render")
+            sub = row.row(align=True)
+            sub.active = settings.use_tiled_render
+            sub.prop(settings, "tile_size", text="")
+        render_col.prop(settings, "use_version_manifest")
+        render_col.prop(settings, "write_timing_report")
+        row = render_col.row(align=True)
+        row.prop(settings, "farm_workers")
+        row.prop(settings, "farm_engine", text="")
 
         # Блок управления
         manage_box = layout.box()
@@ -1669,9 +4593,8 @@ class SDE_PT_cameras_pro_panel(bpy.types.Panel):
         row = manage_col.row(align=True)
         row.operator(SDE_OT_render_all_cameras.bl_idname, text="Все камеры", icon='RENDER_STILL')
 
-        # Проверяем есть ли выделенные камеры аддона
-        selected_addon_cameras = [obj for obj in context.scene.objects
-                                  if obj.select_get() and obj.type == 'CAMERA' and CAM_RES_X_PROP in obj]
+        # Проверяем есть ли выделенные камеры аддона (из кэша состояния интерфейса)
+        selected_addon_cameras = get_ui_state(context)['selected_cameras']
         if selected_addon_cameras:
             row.operator(SDE_OT_render_selected_cameras.bl_idname, text="Выделенные", icon='RESTRICT_SELECT_OFF')
 
@@ -1680,10 +4603,27 @@ class SDE_PT_cameras_pro_panel(bpy.types.Panel):
             manage_col.operator(SDE_OT_render_vulkan_compatible.bl_idname, text="Рендер (Vulkan)",
                                 icon='OUTLINER_OB_CAMERA')
 
+        manage_col.operator(SDE_OT_render_farm.bl_idname, text="Ферма рендера", icon='NETWORK_DRIVE')
+
         if SDE_OT_render_active_object_cameras.poll(context):
             manage_col.operator(SDE_OT_render_active_object_cameras.bl_idname, text="Камеры объекта",
                                 icon='RENDER_STILL')
 
+        # Превью и одобрение: полный размер рендерится только для одобренных камер
+        preview_col = manage_col.column(align=True)
+        row = preview_col.row(align=True)
+        row.operator(SDE_OT_render_preview_pass.bl_idname, text="Превью", icon='IMAGE_REFERENCE')
+        row.prop(settings, "preview_percentage", text="")
+        row = preview_col.row(align=True)
+        row.operator(SDE_OT_open_contact_sheet.bl_idname, text="Лист просмотра", icon='DOCUMENTS')
+        if selected_addon_cameras:
+            row = preview_col.row(align=True)
+            row.operator(SDE_OT_approve_cameras.bl_idname, text="Одобрить выделенные", icon='CHECKMARK').approve = True
+            row.operator(SDE_OT_approve_cameras.bl_idname, text="", icon='X').approve = False
+        approved_count = get_ui_state(context)['approved_cameras']
+        preview_col.operator(SDE_OT_render_approved_cameras.bl_idname, text=f"Рендер одобренных ({approved_count})",
+                             icon='RENDER_STILL')
+
         # Кнопки удаления
         row = manage_col.row(align=True)
         row.operator(SDE_OT_delete_all_addon_cameras.bl_idname, text="Все", icon='TRASH')
@@ -1698,6 +4638,428 @@ class SDE_PT_cameras_pro_panel(bpy.types.Panel):
         help_col.operator(SDE_OT_help_popup.bl_idname, text="Справка", icon='INFO')
 
 
+# ------------------------------------------------------------------------
+# ПАКЕТНЫЙ РЕНДЕР ИЗ КОМАНДНОЙ СТРОКИ (blender -b)
+# ------------------------------------------------------------------------
+# Движки пакетного режима - ключи RENDER_BACKENDS: OPENGL - рендер viewport, остальные - render.render
+class ConsoleReporter:
+    """Замена оператора для report() в пакетном режиме: печатает сообщения и сохраняет их для итогов"""
+
+    def __init__(self):
+        self.messages = []
+
+    def report(self, level, message):
+        level_name = next(iter(level), 'INFO')
+        self.messages.append({'level': level_name, 'message': message})
+        logger.log(REPORT_LOG_LEVELS.get(level_name, logging.INFO), "%s", message)
+
+
+def collect_addon_cameras():
+    """Все камеры аддона из коллекций CAMS_"""
+    cameras = {}
+    for coll in bpy.data.collections:
+        if coll.name.startswith(CAM_COLLECTION_PREFIX):
+            for obj in coll.objects:
+                if obj.type == 'CAMERA' and CAM_RES_X_PROP in obj:
+                    cameras[obj.name] = obj
+    return list(cameras.values())
+
+
+def filter_batch_cameras(cameras, object_patterns=(), collection_name=None):
+    """
+    Отфильтровать камеры по объектам и коллекции.
+
+    Args:
+        cameras: Список камер аддона
+        object_patterns: Имена или шаблоны fnmatch объектов, для которых созданы камеры
+        collection_name: Коллекция объектов (или коллекция камер CAMS_...)
+
+    Returns:
+        list: Отфильтрованные камеры
+    """
+    if collection_name:
+        collection = bpy.data.collections.get(collection_name)
+        if collection is None:
+            raise ValueError(f"Коллекция «{collection_name}» не найдена")
+        member_names = {obj.name for obj in collection.all_objects}
+        cameras = [cam for cam in cameras
+                   if cam.name in member_names or get_camera_target_name(cam) in member_names]
+
+    if object_patterns:
+        cameras = [cam for cam in cameras
+                   if any(fnmatch.fnmatchcase(get_camera_target_name(cam), pattern) for pattern in object_patterns)]
+    return cameras
+
+
+def record_render_result(summary, cam, filepath, success, error=None, skipped=False):
+    """Добавить результат рендера камеры в итоги пакета (если итоги собираются)"""
+    if summary is None:
+        return
+    status = 'skipped' if skipped else ('ok' if success else 'failed')
+    result = {'camera': cam.name, 'object': get_camera_target_name(cam), 'file': filepath, 'status': status}
+    if error:
+        result['error'] = error
+    summary.setdefault('results', []).append(result)
+
+    # Воркер фермы сообщает диспетчеру о прогрессе строкой на каждую камеру
+    progress_file = summary.get('progress_file')
+    if progress_file:
+        try:
+            with open(progress_file, 'a', encoding='utf-8') as f:
+                f.write(f"{cam.name}\n")
+        except OSError as e:
+            logger.warning("[FARM] Не удалось записать прогресс: %s", e)
+
+
+def run_batch_render(context, object_patterns=(), collection_name=None, output_dir=None, engine='WORKBENCH',
+                     camera_names=None, progress_file=None):
+    """
+    Отрендерить камеры аддона без интерфейса.
+
+    Args:
+        camera_names: Явный список имён камер (шард воркера фермы)
+        progress_file: Файл, в который дописывается строка на каждую отрендеренную камеру
+
+    Returns:
+        dict: Итоги пакета (файл, движок, результаты по камерам, сообщения)
+    """
+    reporter = ConsoleReporter()
+    settings = context.scene.sde_cam_pro_settings
+    cameras = filter_batch_cameras(collect_addon_cameras(), object_patterns, collection_name)
+    if camera_names is not None:
+        wanted = set(camera_names)
+        cameras = [cam for cam in cameras if cam.name in wanted]
+
+    summary = {
+        'blend_file': bpy.data.filepath,
+        'engine': engine,
+        'cameras_total': len(cameras),
+        'results': [],
+        'messages': reporter.messages,
+    }
+    if progress_file:
+        summary['progress_file'] = progress_file
+    start_time = time.perf_counter()
+
+    if cameras:
+        render_cameras_common(reporter, context, settings, cameras, output_dir=output_dir, summary=summary,
+                              backend=engine)
+    else:
+        reporter.report({'WARNING'}, "Нет камер для рендера")
+
+    summary['rendered'] = sum(1 for result in summary['results'] if result['status'] == 'ok')
+    summary['skipped'] = sum(1 for result in summary['results'] if result['status'] == 'skipped')
+    summary['failed'] = len(summary['results']) - summary['rendered'] - summary['skipped']
+    summary['elapsed_seconds'] = round(time.perf_counter() - start_time, 3)
+    return summary
+
+
+def parse_batch_args(argv=None):
+    """Разобрать аргументы командной строки после «--»"""
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(
+        prog="blender -b file.blend --python fac_cams.py --",
+        description="Пакетный рендер камер фасадов без интерфейса",
+    )
+    parser.add_argument("--objects", nargs="*", default=[],
+                        help="Имена или шаблоны (fnmatch) объектов, камеры которых нужно отрендерить")
+    parser.add_argument("--collection", default=None,
+                        help="Коллекция объектов или коллекция камер CAMS_..., камеры которой нужно отрендерить")
+    parser.add_argument("--output-dir", default=None, help="Папка для рендеров (по умолчанию - автоматическая)")
+    parser.add_argument("--engine", default="WORKBENCH", choices=sorted(RENDER_BACKENDS),
+                        help="Движок рендера (OPENGL требует GPU-контекста)")
+    parser.add_argument("--summary", default=None,
+                        help="Путь к JSON с итогами (по умолчанию <output-dir>/render_summary.json)")
+    parser.add_argument("--camera-list", default=None,
+                        help="JSON со списком имён камер для рендера (используется фермой рендера)")
+    parser.add_argument("--progress-file", default=None,
+                        help="Файл прогресса: строка на каждую отрендеренную камеру (используется фермой рендера)")
+    parser.add_argument("--log-level", default=None, choices=[item[0] for item in LOG_LEVEL_ITEMS],
+                        help="Уровень логирования (по умолчанию - из настроек аддона)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Точка входа пакетного режима.
+
+    Примеры:
+        blender -b model.blend --python fac_cams.py -- --engine WORKBENCH --output-dir /renders/model
+        blender -b model.blend --python-expr "import fac_cams; fac_cams.main()" -- --objects "Корпус*"
+
+    Returns:
+        int: Код завершения (0 - все камеры отрендерены, 1 - были ошибки, 2 - ошибка запуска)
+    """
+    args = parse_batch_args(argv)
+
+    if not hasattr(bpy.types.Scene, "sde_cam_pro_settings"):
+        register()
+    setup_logging(args.log_level)
+
+    try:
+        camera_names = None
+        if args.camera_list:
+            with open(args.camera_list, encoding='utf-8') as f:
+                camera_names = json.load(f)
+        summary = run_batch_render(bpy.context, args.objects, args.collection, args.output_dir, args.engine,
+                                   camera_names=camera_names, progress_file=args.progress_file)
+    except (ValueError, OSError) as e:
+        logger.error("%s", e)
+        return 2
+
+    summary_path = args.summary
+    if not summary_path and summary.get('output_dir'):
+        summary_path = os.path.join(summary['output_dir'], "render_summary.json")
+    if summary_path:
+        try:
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            logger.info("Итоги пакета сохранены в %s", summary_path)
+        except OSError as e:
+            logger.error("Не удалось сохранить итоги пакета: %s", e)
+
+    logger.info("Отрендерено: %s из %s, без изменений: %s, ошибок: %s",
+                summary['rendered'], summary['cameras_total'], summary['skipped'], summary['failed'])
+    return 0 if summary['failed'] == 0 else 1
+
+
+# ------------------------------------------------------------------------
+# ФЕРМА РЕНДЕРА: ПАРАЛЛЕЛЬНЫЕ ФОНОВЫЕ ПРОЦЕССЫ BLENDER
+# ------------------------------------------------------------------------
+def partition_cameras(cameras, shard_count):
+    """
+    Разбить камеры на шарды подряд идущими блоками отсортированного списка.
+
+    Камеры одного объекта идут подряд, поэтому обычно попадают в один шард
+    и воркер настраивает сцену для объекта один раз.
+    """
+    ordered = sorted(cameras, key=lambda cam: (get_camera_target_name(cam), cam.name))
+    shard_count = max(1, min(shard_count, len(ordered)))
+    size, extra = divmod(len(ordered), shard_count)
+
+    shards = []
+    start = 0
+    for index in range(shard_count):
+        end = start + size + (1 if index < extra else 0)
+        shards.append(ordered[start:end])
+        start = end
+    return shards
+
+
+def build_worker_command(blend_path, engine, output_dir, camera_list, progress_file, summary_file):
+    """Команда запуска фонового Blender, который рендерит свой шард через main()"""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    file_module = os.path.splitext(os.path.basename(__file__))[0]
+    module_name = file_module if __name__ == "__main__" else __name__
+
+    # Если аддон включён в настройках, он уже загружен в воркере под своим именем
+    expr = (
+        "import importlib, sys\n"
+        f"sys.path.insert(0, {module_dir!r})\n"
+        "try:\n"
+        f"    module = importlib.import_module({module_name!r})\n"
+        "except ImportError:\n"
+        f"    module = importlib.import_module({file_module!r})\n"
+        "sys.exit(module.main())\n"
+    )
+    command = [
+        bpy.app.binary_path, "-b", blend_path, "--python-expr", expr, "--",
+        "--engine", engine,
+        "--camera-list", camera_list,
+        "--progress-file", progress_file,
+        "--summary", summary_file,
+        "--log-level", logging.getLevelName(logger.getEffectiveLevel()),
+    ]
+    if output_dir:
+        command += ["--output-dir", output_dir]
+    return command
+
+
+def _count_lines(path):
+    """Количество строк в файле прогресса (0, если файла ещё нет)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return sum(1 for _ in f)
+    except OSError:
+        return 0
+
+
+class RenderFarm:
+    """
+    Ферма рендера: фоновые процессы Blender рендерят шарды камер по сохранённому .blend.
+
+    Запуск (start) не ждёт воркеров: вызывающий код опрашивает их через poll() - модальный
+    оператор по таймеру, пакетный код в цикле run_render_farm(). finish() объединяет итоги.
+    """
+
+    def __init__(self, cameras, worker_count, engine='WORKBENCH', output_dir=None):
+        self.cameras = list(cameras)
+        self.worker_count = worker_count
+        self.engine = engine
+        self.output_dir = output_dir
+        self.blend_file = bpy.data.filepath
+        self.work_dir = None
+        self.workers = []
+        self.cancelled = False
+
+    def start(self):
+        """Запустить воркеры (при ошибке запуска уже запущенные воркеры останавливаются)"""
+        self.work_dir = tempfile.mkdtemp(prefix="sde_farm_")
+        try:
+            for index, shard in enumerate(partition_cameras(self.cameras, self.worker_count)):
+                prefix = os.path.join(self.work_dir, f"worker_{index:02d}")
+                camera_names = [cam.name for cam in shard]
+                with open(f"{prefix}_cameras.json", 'w', encoding='utf-8') as f:
+                    json.dump(camera_names, f, ensure_ascii=False)
+
+                log = open(f"{prefix}.log", 'w', encoding='utf-8')
+                worker = {'index': index, 'cameras': camera_names, 'prefix': prefix, 'log': log, 'process': None}
+                self.workers.append(worker)
+                command = build_worker_command(self.blend_file, self.engine, self.output_dir,
+                                               f"{prefix}_cameras.json", f"{prefix}_progress.txt",
+                                               f"{prefix}_summary.json")
+                worker['process'] = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+        except Exception:
+            self._stop_workers()
+            raise
+        logger.info("[FARM] Запущено воркеров: %s, камер: %s, рабочая папка: %s",
+                    len(self.workers), len(self.cameras), self.work_dir)
+
+    def poll(self):
+        """
+        Проверить воркеры без ожидания.
+
+        Returns:
+            bool: True, если хотя бы один воркер ещё работает
+        """
+        return any(w['process'] is not None and w['process'].poll() is None for w in self.workers)
+
+    def completed(self):
+        """Количество камер, готовых во всех воркерах (по файлам прогресса)"""
+        return sum(_count_lines(f"{w['prefix']}_progress.txt") for w in self.workers)
+
+    def status_text(self):
+        """Строка прогресса фермы для заголовка 3D viewport"""
+        running = sum(1 for w in self.workers if w['process'] is not None and w['process'].poll() is None)
+        return (f"Ферма рендера: {self.completed()}/{len(self.cameras)} | "
+                f"воркеров в работе: {running}/{len(self.workers)} | Esc - отмена")
+
+    def wait(self, progress_callback=None):
+        """
+        Дождаться воркеров (блокирующий опрос) и объединить итоги.
+
+        Args:
+            progress_callback: Функция(количество_готовых_камер) для обновления прогресса
+
+        Returns:
+            dict: Объединённые итоги всех воркеров
+        """
+        try:
+            while True:
+                running = self.poll()
+                if progress_callback:
+                    progress_callback(self.completed())
+                if not running:
+                    break
+                time.sleep(FARM_POLL_INTERVAL)
+        except KeyboardInterrupt:
+            self.cancel()
+        return self.finish()
+
+    def cancel(self):
+        """Прервать рендер: остановить все работающие воркеры"""
+        self.cancelled = True
+        logger.info("[FARM] Ферма отменена, останавливаем воркеры")
+        self._stop_workers()
+
+    def _stop_workers(self):
+        for worker in self.workers:
+            process = worker['process']
+            if process is not None and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=FARM_POLL_INTERVAL * 4)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+            worker['log'].close()
+
+    def finish(self):
+        """
+        Остановить оставшиеся воркеры и объединить их итоги.
+
+        Returns:
+            dict: Объединённые итоги всех воркеров
+        """
+        self._stop_workers()
+
+        merged = {
+            'blend_file': self.blend_file,
+            'engine': self.engine,
+            'work_dir': self.work_dir,
+            'cameras_total': len(self.cameras),
+            'cancelled': self.cancelled,
+            'workers': [],
+            'output_dirs': [],
+            'results': [],
+        }
+        for worker in self.workers:
+            returncode = worker['process'].returncode if worker['process'] is not None else None
+            merged['workers'].append({'index': worker['index'], 'cameras': len(worker['cameras']),
+                                      'returncode': returncode, 'log': f"{worker['prefix']}.log"})
+            try:
+                with open(f"{worker['prefix']}_summary.json", encoding='utf-8') as f:
+                    worker_summary = json.load(f)
+            except (OSError, ValueError):
+                # Воркер завершился (или был остановлен) до записи итогов - все его камеры считаются неудачными
+                if self.cancelled:
+                    error = "Ферма отменена"
+                else:
+                    error = f"Воркер {worker['index']} завершился с кодом {returncode}"
+                    logger.error("[FARM] Воркер %s завершился с кодом %s без итогов", worker['index'], returncode)
+                merged['results'].extend({'camera': name, 'status': 'failed', 'error': error}
+                                         for name in worker['cameras'])
+                continue
+
+            merged['results'].extend(worker_summary.get('results', []))
+            for worker_output in worker_summary.get('output_dirs') or [worker_summary.get('output_dir')]:
+                if worker_output and worker_output not in merged['output_dirs']:
+                    merged['output_dirs'].append(worker_output)
+
+        merged['rendered'] = sum(1 for result in merged['results'] if result.get('status') == 'ok')
+        merged['skipped'] = sum(1 for result in merged['results'] if result.get('status') == 'skipped')
+        merged['failed'] = len(self.cameras) - merged['rendered'] - merged['skipped']
+
+        summary_path = os.path.join(self.work_dir, "render_farm_summary.json")
+        try:
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(merged, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.error("[FARM] Не удалось сохранить итоги фермы: %s", e)
+        return merged
+
+
+def run_render_farm(cameras, worker_count, engine='WORKBENCH', output_dir=None, progress_callback=None):
+    """
+    Отрендерить камеры фермой и дождаться воркеров (блокирующий вариант для скриптов).
+
+    Args:
+        cameras: Камеры для рендера
+        worker_count: Количество воркеров
+        engine: Движок пакетного режима (ключ RENDER_BACKENDS)
+        output_dir: Папка вывода (None - автоматическая в каждом воркере)
+        progress_callback: Функция(количество_готовых_камер) для обновления прогресса
+
+    Returns:
+        dict: Объединённые итоги всех воркеров
+    """
+    farm = RenderFarm(cameras, worker_count, engine, output_dir)
+    farm.start()
+    return farm.wait(progress_callback)
+
+
 # ------------------------------------------------------------------------
 # РЕГИСТРАЦИЯ
 # ------------------------------------------------------------------------
@@ -1710,6 +5072,7 @@ classes = (
     SDE_OT_delete_preset,
     SDE_OT_load_preset,
     SDE_OT_create_cameras_from_faces,
+    SDE_OT_refresh_cameras,
     SDE_OT_apply_camera_resolution,
     SDE_OT_preview_camera,
     SDE_OT_auto_detect_settings,
@@ -1717,7 +5080,12 @@ classes = (
     SDE_OT_render_all_cameras,
     SDE_OT_render_selected_cameras,
     SDE_OT_render_vulkan_compatible,
+    SDE_OT_render_farm,
     SDE_OT_render_active_object_cameras,
+    SDE_OT_render_preview_pass,
+    SDE_OT_approve_cameras,
+    SDE_OT_render_approved_cameras,
+    SDE_OT_open_contact_sheet,
     SDE_OT_delete_all_addon_cameras,
     SDE_OT_delete_active_object_cameras,
     SDE_PT_cameras_pro_panel,
@@ -1727,14 +5095,55 @@ classes = (
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    setup_logging()
     bpy.types.Scene.sde_cam_pro_settings = bpy.props.PointerProperty(type=SDE_CameraProSettings)
+    bpy.types.Object.sde_target_object = bpy.props.PointerProperty(
+        type=bpy.types.Object,
+        name="Объект фасадов",
+        description="Объект, для которого создана камера",
+        poll=_poll_target_object
+    )
+    bpy.types.Object.sde_preview_approved = bpy.props.BoolProperty(
+        name="Одобрена по превью",
+        description="Камера будет отрендерена кнопкой «Рендер одобренных»",
+        default=False
+    )
+    bpy.app.handlers.depsgraph_update_post.append(_geometry_cache_depsgraph_handler)
+    bpy.app.handlers.depsgraph_update_post.append(_camera_index_depsgraph_handler)
+    bpy.app.handlers.depsgraph_update_post.append(_ui_state_depsgraph_handler)
+    bpy.app.handlers.load_post.append(_geometry_cache_load_handler)
+    bpy.app.handlers.load_post.append(_camera_index_load_handler)
+    bpy.app.handlers.load_post.append(_ui_state_load_handler)
+    subscribe_ui_state()
 
 
 def unregister():
+    bpy.msgbus.clear_by_owner(_ui_state_msgbus_owner)
+    if _ui_state_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_ui_state_load_handler)
+    if _ui_state_depsgraph_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_ui_state_depsgraph_handler)
+    if _camera_index_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_camera_index_load_handler)
+    if _geometry_cache_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_geometry_cache_load_handler)
+    if _camera_index_depsgraph_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_camera_index_depsgraph_handler)
+    if _geometry_cache_depsgraph_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_geometry_cache_depsgraph_handler)
+    invalidate_geometry_cache()
+    _camera_index_load_handler()
+    invalidate_ui_state()
+    teardown_logging()
+    del bpy.types.Object.sde_preview_approved
+    del bpy.types.Object.sde_target_object
     del bpy.types.Scene.sde_cam_pro_settings
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
 
 
 if __name__ == "__main__":
+    if bpy.app.background:
+        # blender -b file.blend --python fac_cams.py -- [аргументы пакетного режима]
+        sys.exit(main())
     register()
\ No newline at end of file